@@ -0,0 +1,66 @@
+"""
+Autenticação JWT com cache do usuário.
+
+O JWTAuthentication padrão faz um SELECT do usuário a cada autenticação e
+o acesso a user.company dispara outro. Como o CompanyMiddleware e o DRF
+autenticam a mesma requisição, eram 3+ consultas antes da view. Aqui:
+- o token é decodificado uma única vez por requisição (resultado guardado no HttpRequest)
+- o usuário é carregado com select_related('company') e guardado no cache
+  do Django (LocMem por processo ou Redis, ver CACHES) por JWT_CACHE_USUARIO_SEGUNDOS
+- salvar/excluir o usuário ou a company invalida o cache (core/signals.py)
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+# Atributo do HttpRequest com o resultado da autenticação da requisição
+ATRIBUTO_REQUISICAO = '_autenticacao_jwt'
+
+
+def chave_cache_usuario(user_id):
+    return f'auth:usuario:{user_id}'
+
+
+def invalidar_usuarios(user_ids):
+    """Remove os usuários do cache (próxima requisição relê do banco)"""
+    cache.delete_many([chave_cache_usuario(user_id) for user_id in user_ids])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que resolve usuário + company numa consulta (ou nenhuma, com cache)"""
+
+    def authenticate(self, request):
+        # O DRF passa o Request dele; o middleware, o HttpRequest original
+        http_request = getattr(request, '_request', request)
+        if hasattr(http_request, ATRIBUTO_REQUISICAO):
+            return getattr(http_request, ATRIBUTO_REQUISICAO)
+
+        resultado = super().authenticate(request)
+        setattr(http_request, ATRIBUTO_REQUISICAO, resultado)
+        return resultado
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        chave = chave_cache_usuario(user_id)
+        user = cache.get(chave)
+        if user is None:
+            try:
+                user = self.user_model.objects.select_related('company').get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            cache.set(chave, user, settings.JWT_CACHE_USUARIO_SEGUNDOS)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return user
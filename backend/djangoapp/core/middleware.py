@@ -1,43 +1,66 @@
-from threading import local
-from django.utils.deprecation import MiddlewareMixin
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from rest_framework_simplejwt.exceptions import InvalidToken
 
-_thread_locals = local()
+from .authentication import CachedJWTAuthentication
+
+# ContextVar (e não threading.local): no ASGI várias requisições dividem a
+# mesma thread, e o contexto é copiado para as threads do sync_to_async
+_company = ContextVar('company', default=None)
 
 def get_current_company():
     """Retorna a company ativa no contexto atual"""
-    return getattr(_thread_locals, 'company', None)
+    return _company.get()
 
 def set_current_company(company):
     """Define a company ativa no contexto atual"""
-    _thread_locals.company = company
+    _company.set(company)
 
 
-class CompanyMiddleware(MiddlewareMixin):
+class CompanyMiddleware:
     """
     Middleware que identifica a company do usuário logado
-    e define no contexto da thread
+    e define no contexto da requisição (funciona em WSGI e ASGI)
     """
-    
-    def process_request(self, request):
-        set_current_company(None)
-        
-        # Tenta autenticar via JWT
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = _company.set(self.resolver_company(request))
         try:
-            jwt_auth = JWTAuthentication()
+            return self.get_response(request)
+        finally:
+            # Limpa o contexto após a requisição
+            _company.reset(token)
+
+    async def __acall__(self, request):
+        company = await sync_to_async(self.resolver_company)(request)
+        token = _company.set(company)
+        try:
+            return await self.get_response(request)
+        finally:
+            _company.reset(token)
+
+    def resolver_company(self, request):
+        # Tenta autenticar via JWT (o resultado fica na requisição e o DRF reaproveita)
+        try:
+            jwt_auth = CachedJWTAuthentication()
             auth_result = jwt_auth.authenticate(request)
-            
+
             if auth_result is not None:
                 user, token = auth_result
                 if hasattr(user, 'company') and user.company:
-                    set_current_company(user.company)
+                    return user.company
         except (InvalidToken, Exception):
             pass
-        
+
         return None
-    
-    def process_response(self, request, response):
-        # Limpa o contexto após a requisição
-        set_current_company(None)
-        return response
\ No newline at end of file
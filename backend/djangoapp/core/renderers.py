@@ -0,0 +1,20 @@
+"""
+Renderer JSON do DRF com orjson (serialização em C, bytes UTF-8 direto).
+
+Mesmo formato do JSONRenderer padrão (compacto, UTF-8): tipos que o orjson
+não conhece (Decimal, lazy strings, querysets...) passam pelo JSONEncoder do DRF.
+"""
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=JSONEncoder().default)
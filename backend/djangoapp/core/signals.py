@@ -0,0 +1,17 @@
+"""Invalidação do cache de usuários da autenticação (core/authentication.py)"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidar_usuarios
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidar_usuario(sender, instance, **kwargs):
+    invalidar_usuarios([instance.pk])
+
+
+@receiver([post_save, post_delete], sender='companies.Company')
+def invalidar_usuarios_company(sender, instance, **kwargs):
+    # O usuário em cache carrega a company (select_related): relê todos os dela
+    invalidar_usuarios(instance.users.values_list('pk', flat=True))
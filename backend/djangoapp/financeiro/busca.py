@@ -0,0 +1,75 @@
+"""
+Busca textual indexada (pg_trgm) para os ViewSets do financeiro.
+
+O SearchFilter padrão do DRF gera `UPPER(campo) LIKE UPPER('%termo%')` em
+OR com um JOIN (ex.: fornecedor__nome), o que força varredura sequencial.
+Como os textos são gravados em UPPERCASE (normalizar()), aqui a busca usa
+`campo LIKE '%TERMO%'`, atendido pelos índices GIN trigram criados na
+migração 0009, e resolve os relacionamentos antes (ids do fornecedor), para
+que todas as condições fiquem na mesma tabela e o Postgres combine os
+índices (BitmapOr). Em outros bancos cai no SearchFilter padrão.
+"""
+from django.db import connections, models
+from django.db.models import Q
+from rest_framework import filters
+
+
+# Acima disso os ids do relacionamento vão como subquery em vez de lista
+LIMITE_IDS_RELACIONADOS = 1000
+
+
+class SimilaridadePalavra(models.Func):
+    """word_similarity(termo, campo) do pg_trgm: 0..1, usado para ordenar por relevância"""
+    function = 'word_similarity'
+    output_field = models.FloatField()
+
+
+class BuscaTrigramaFilter(filters.SearchFilter):
+    """
+    SearchFilter que usa os índices trigram no Postgres.
+
+    Atributos da view:
+    - `busca_campos`: campos da própria tabela (gravados em UPPERCASE ou numéricos)
+    - `busca_relacionados`: {campo_fk: (Model, [campos])} resolvidos antes da consulta principal
+    - `busca_relevancia`: campo usado para ordenar por relevância quando não há ?ordering=
+    `search_fields` continua valendo para o fallback (outros bancos).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        termos = self.get_search_terms(request)
+        campos = getattr(view, 'busca_campos', None)
+        if not termos or not campos or connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        for termo in termos:
+            termo = termo.upper()
+            condicao = Q()
+            for campo in campos:
+                condicao |= Q(**{f'{campo}__contains': termo})
+            for campo_fk, (model, campos_fk) in getattr(view, 'busca_relacionados', {}).items():
+                ids = self.ids_relacionados(request, model, campos_fk, termo)
+                if ids is not None:
+                    condicao |= Q(**{f'{campo_fk}__in': ids})
+            queryset = queryset.filter(condicao)
+
+        relevancia = getattr(view, 'busca_relevancia', None)
+        if relevancia and not request.query_params.get('ordering'):
+            queryset = queryset.annotate(
+                relevancia=SimilaridadePalavra(models.Value(' '.join(termos).upper()), models.F(relevancia))
+            ).order_by('-relevancia', *queryset.query.order_by)
+
+        return queryset
+
+    def ids_relacionados(self, request, model, campos, termo):
+        """Ids do relacionamento (na company do usuário) que casam com o termo, ou None se nenhum"""
+        condicao = Q()
+        for campo in campos:
+            condicao |= Q(**{f'{campo}__contains': termo})
+
+        relacionados = model.objects.filter(condicao, company=request.user.company).values_list('id', flat=True)
+        ids = list(relacionados[:LIMITE_IDS_RELACIONADOS + 1])
+        if not ids:
+            return None
+        if len(ids) > LIMITE_IDS_RELACIONADOS:
+            return relacionados
+        return ids
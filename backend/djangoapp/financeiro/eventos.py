@@ -0,0 +1,182 @@
+"""
+Feed de alterações de contas a pagar (Server-Sent Events) para os dashboards.
+
+O trigger da migração 0013 publica cada inclusão/alteração/exclusão no canal
+CANAL do Postgres (NOTIFY, entregue só no commit). Cada processo ASGI mantém
+uma única conexão em LISTEN, aberta com o primeiro assinante e fechada com o
+último, e distribui os eventos para as filas dos assinantes da company.
+
+Um assinante que não acompanha o ritmo (importação grande, cliente lento)
+não acumula memória: quando a fila enche os eventos são descartados e ele
+recebe um único `recarregar`. O NOTIFY não tem histórico, então ao (re)conectar
+o cliente deve se atualizar por /contas-pagar/changes/ e depois aplicar os eventos.
+"""
+import asyncio
+import json
+import logging
+import time
+
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+CANAL = 'financeiro_contas_pagar'
+
+OPERACOES = {'insert': 'criada', 'update': 'alterada', 'delete': 'excluida'}
+
+# Eventos pendentes por assinante antes de trocá-los por um `recarregar`
+LIMITE_FILA = 200
+
+# Comentário periódico para manter a conexão aberta em proxies (nginx: proxy_read_timeout 60s)
+INTERVALO_PING = 15
+
+# O stream termina depois disso e o EventSource reconecta: limita conexões órfãs,
+# já que o Django 4.2 não avisa a view quando o cliente desconecta
+DURACAO_MAXIMA = 30 * 60
+
+# Espera do EventSource antes de reconectar (ms)
+RECONEXAO_MS = 5000
+
+
+def disponivel():
+    """LISTEN/NOTIFY só existe no Postgres"""
+    return connections['default'].vendor == 'postgresql'
+
+
+class Assinatura:
+    """Fila de eventos de uma conexão SSE"""
+
+    def __init__(self, company_id):
+        self.company_id = company_id
+        self.fila = asyncio.Queue(maxsize=LIMITE_FILA)
+        self.atrasada = False
+        self.encerrada = False
+
+    def enviar(self, evento):
+        try:
+            self.fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.atrasada = True
+
+    def encerrar(self):
+        # Conexão com o Postgres perdida: o stream termina e o EventSource reconecta
+        self.encerrada = True
+        self.enviar(None)
+
+    def descartar_pendentes(self):
+        while not self.fila.empty():
+            self.fila.get_nowait()
+        self.atrasada = False
+
+
+class Ouvinte:
+    """Conexão LISTEN do processo e distribuição dos eventos por company"""
+
+    def __init__(self):
+        self._assinaturas = {}
+        self._conexao = None
+        self._trava = asyncio.Lock()
+
+    async def assinar(self, company_id):
+        async with self._trava:
+            if self._conexao is None:
+                await self._conectar()
+            assinatura = Assinatura(str(company_id))
+            self._assinaturas.setdefault(assinatura.company_id, set()).add(assinatura)
+            return assinatura
+
+    async def cancelar(self, assinatura):
+        async with self._trava:
+            assinaturas = self._assinaturas.get(assinatura.company_id, set())
+            assinaturas.discard(assinatura)
+            if not assinaturas:
+                self._assinaturas.pop(assinatura.company_id, None)
+            if not self._assinaturas:
+                self._desconectar()
+
+    async def _conectar(self):
+        import psycopg2
+
+        loop = asyncio.get_running_loop()
+        parametros = connections['default'].get_connection_params()
+        conexao = await loop.run_in_executor(None, lambda: psycopg2.connect(**parametros))
+        conexao.autocommit = True
+        with conexao.cursor() as cursor:
+            cursor.execute(f'LISTEN {CANAL}')
+        loop.add_reader(conexao.fileno(), self._ler)
+        self._conexao = conexao
+        self._loop = loop
+
+    def _desconectar(self):
+        if self._conexao is None:
+            return
+        conexao, self._conexao = self._conexao, None
+        try:
+            self._loop.remove_reader(conexao.fileno())
+            conexao.close()
+        except Exception:
+            pass
+
+    def _ler(self):
+        try:
+            self._conexao.poll()
+        except Exception:
+            logger.exception('Conexão LISTEN %s perdida', CANAL)
+            self._desconectar()
+            for assinaturas in self._assinaturas.values():
+                for assinatura in assinaturas:
+                    assinatura.encerrar()
+            self._assinaturas = {}
+            return
+
+        while self._conexao.notifies:
+            self.publicar(self._conexao.notifies.pop(0).payload)
+
+    def publicar(self, payload):
+        """Entrega uma notificação do canal aos assinantes da company"""
+        dados = json.loads(payload)
+        assinaturas = self._assinaturas.get(str(dados.pop('company')))
+        if not assinaturas:
+            return
+        dados['operacao'] = OPERACOES.get(dados['operacao'], dados['operacao'])
+        for assinatura in assinaturas:
+            assinatura.enviar(dados)
+
+
+def _mensagem(evento, dados):
+    return f'event: {evento}\ndata: {json.dumps(dados, separators=(",", ":"))}\n\n'
+
+
+async def fluxo(company_id):
+    """Stream SSE dos eventos da company: `conta` para cada alteração, `recarregar` após descartes"""
+    assinatura = await ouvinte().assinar(company_id)
+    fim = time.monotonic() + DURACAO_MAXIMA
+    try:
+        yield f'retry: {RECONEXAO_MS}\n\n'
+        while time.monotonic() < fim:
+            try:
+                evento = await asyncio.wait_for(assinatura.fila.get(), INTERVALO_PING)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            if assinatura.encerrada:
+                return
+            if assinatura.atrasada:
+                assinatura.descartar_pendentes()
+                yield _mensagem('recarregar', {})
+                continue
+            yield _mensagem('conta', evento)
+    finally:
+        await ouvinte().cancelar(assinatura)
+
+
+# Um ouvinte por processo (criado no event loop do servidor ASGI)
+_ouvinte = None
+
+
+def ouvinte():
+    global _ouvinte
+    if _ouvinte is None:
+        _ouvinte = Ouvinte()
+    return _ouvinte
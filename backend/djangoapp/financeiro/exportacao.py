@@ -0,0 +1,75 @@
+"""
+Geração de exportações de contas a pagar (CSV e NDJSON) em streaming.
+Usado pela action `export` do ContasPagarViewSet e pelas tarefas em segundo plano.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+# Colunas da exportação: (cabeçalho, campo no values_list())
+COLUNAS = [
+    ('id', 'id'),
+    ('descricao', 'descricao'),
+    ('filial', 'filial__nome'),
+    ('fornecedor', 'fornecedor__nome'),
+    ('categoria', 'categoria__nome'),
+    ('valor_original', 'valor_original'),
+    ('desconto', 'desconto'),
+    ('juros', 'juros'),
+    ('multa', 'multa'),
+    ('valor_final', 'valor_final'),
+    ('valor_pago', 'valor_pago'),
+    ('valor_restante', 'valor_restante'),
+    ('data_emissao', 'data_emissao'),
+    ('data_vencimento', 'data_vencimento'),
+    ('data_pagamento', 'data_pagamento'),
+    ('forma_pagamento', 'forma_pagamento__nome'),
+    ('status', 'status'),
+    ('e_parcelada', 'e_parcelada'),
+    ('parcela_atual', 'parcela_atual'),
+    ('total_parcelas', 'total_parcelas'),
+    ('e_recorrente', 'e_recorrente'),
+    ('frequencia_recorrencia', 'frequencia_recorrencia'),
+    ('numero_boleto', 'numero_boleto'),
+    ('notas_fiscais', 'notas_fiscais'),
+]
+CABECALHO = [nome for nome, _ in COLUNAS]
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+TAMANHO_LOTE = 2000
+
+
+class Echo:
+    """Pseudo-buffer para o csv.writer: devolve a linha em vez de gravá-la"""
+
+    def write(self, value):
+        return value
+
+
+def linhas(queryset):
+    """Tuplas das colunas exportadas, lidas do banco em lotes (cursor no servidor)"""
+    return queryset.values_list(*(campo for _, campo in COLUNAS)).iterator(chunk_size=TAMANHO_LOTE)
+
+
+def gerar_csv(linhas):
+    writer = csv.writer(Echo())
+    # BOM para o Excel reconhecer UTF-8; o cabeçalho sai antes da consulta rodar
+    yield '\ufeff' + writer.writerow(CABECALHO)
+    for linha in linhas:
+        yield writer.writerow(linha)
+
+
+def gerar_ndjson(linhas):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for linha in linhas:
+        yield encoder.encode(dict(zip(CABECALHO, linha))) + '\n'
+
+
+def gerar(formato, linhas):
+    """Gera o conteúdo da exportação no formato pedido ('csv' ou 'ndjson')"""
+    if formato == 'csv':
+        return gerar_csv(linhas)
+    return gerar_ndjson(linhas)
@@ -0,0 +1,398 @@
+"""
+Importação de contas a pagar via CSV em lote.
+
+O arquivo é processado em etapas, sem consultas por linha:
+1. Carrega os cadastros da company em dicionários por nome (case-insensitive)
+2. Lê e valida todas as linhas, resolvendo os nomes nesses dicionários
+   e aponta as possíveis duplicadas (assinatura já existente ou repetida no
+   arquivo): como aviso, ou como erro descartando a linha se rejeitar_duplicadas
+3. Cria em lote (bulk_create) os cadastros faltantes
+4. Insere as contas com bulk_create em lotes, tudo numa única transação
+"""
+import csv
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.validators import MinValueValidator
+from django.db import transaction
+
+from . import opcoes
+from .models import (
+    Filial, CategoriaFinanceira, Fornecedor, FormaPagamento, ContasPagar, NotaFiscalContaPagar,
+    assinatura_conta, numeros_nota_fiscal
+)
+from .resumo import estado_resumo, recalcular_buckets
+
+
+VALORES_SIM = {'sim', 'yes', 's', 'y', '1', 'true'}
+STATUS_VALIDOS = {valor for valor, _ in ContasPagar.STATUS_CHOICES}
+CNPJ_PLACEHOLDER = '00000000000000'
+
+
+class ErroLinha(Exception):
+    """Erro de validação de uma linha do CSV"""
+    pass
+
+
+class ResultadoImportacao:
+    def __init__(self):
+        self.sucesso = 0
+        self.erros = []
+        # Linhas importadas que merecem conferência (possíveis duplicatas)
+        self.avisos = []
+        self.cadastros_criados = 0
+
+
+def _chave(nome):
+    """Chave de busca case-insensitive (os cadastros são gravados em UPPERCASE)"""
+    return nome.strip().upper()
+
+
+def _texto(row, coluna, model, campo):
+    """
+    Texto da coluna, limitado ao max_length do campo do model: no Postgres um
+    valor maior abortaria a transação da importação inteira, não só a linha.
+    """
+    valor = (row.get(coluna) or '').strip()
+    limite = model._meta.get_field(campo).max_length
+    if len(valor) > limite:
+        raise ErroLinha(f"Campo '{coluna}' excede {limite} caracteres")
+    return valor
+
+
+def _limitar_decimal(numero, campo):
+    """Arredonda para as casas do campo de ContasPagar e recusa valores acima de max_digits"""
+    field = ContasPagar._meta.get_field(campo)
+    inteiros = field.max_digits - field.decimal_places
+    try:
+        numero = numero.quantize(Decimal(1).scaleb(-field.decimal_places))
+    except InvalidOperation:
+        # Além da precisão do contexto decimal: certamente acima de max_digits
+        numero = None
+    if numero is None or numero.adjusted() >= inteiros:
+        raise ErroLinha(f"Valor muito grande em '{campo}' (máximo de {inteiros} dígitos inteiros)")
+    return numero
+
+
+def _valor_minimo(campo):
+    """Mínimo do MinValueValidator do campo de ContasPagar (o bulk_create não roda os validators)"""
+    for validator in ContasPagar._meta.get_field(campo).validators:
+        if isinstance(validator, MinValueValidator):
+            return validator.limit_value
+    return None
+
+
+def _decimal(valor, campo, obrigatorio=False):
+    valor = (valor or '').strip()
+    if not valor:
+        if obrigatorio:
+            raise ErroLinha(f"Campo '{campo}' é obrigatório")
+        return Decimal('0')
+    try:
+        numero = Decimal(valor.replace(',', '.'))
+    except InvalidOperation:
+        raise ErroLinha(f"Valor inválido em '{campo}': {valor}")
+    if not numero.is_finite():
+        raise ErroLinha(f"Valor inválido em '{campo}': {valor}")
+    numero = _limitar_decimal(numero, campo)
+
+    minimo = _valor_minimo(campo)
+    if minimo is not None and numero < minimo:
+        raise ErroLinha(f"Valor em '{campo}' deve ser no mínimo {minimo}: {valor}")
+    return numero
+
+
+def _data(valor, campo, obrigatoria=False):
+    valor = (valor or '').strip()
+    if not valor:
+        if obrigatoria:
+            raise ErroLinha(f"Campo '{campo}' é obrigatório")
+        return None
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        raise ErroLinha(f"Data inválida em '{campo}': {valor} (use AAAA-MM-DD)")
+
+
+class ImportadorContasPagar:
+    """Importa contas a pagar de um CSV (modelo do admin) para a company informada"""
+
+    TAMANHO_LOTE = 1000
+
+    def __init__(self, company, user, ao_progredir=None, rejeitar_duplicadas=False):
+        self.company = company
+        self.user = user
+        self.rejeitar_duplicadas = rejeitar_duplicadas
+        # Callback opcional ao_progredir(etapa, linhas_lidas), usado pelas tarefas em segundo plano
+        self.ao_progredir = ao_progredir
+        self.resultado = ResultadoImportacao()
+
+        # Cadastros existentes e a criar, indexados pela chave do nome
+        self.filiais = {}
+        self.fornecedores = {}
+        self.categorias = {}
+        self.formas_pagamento = {}
+        self.cnpjs_filiais = set()
+        self.novos_cadastros = {Filial: [], Fornecedor: [], CategoriaFinanceira: [], FormaPagamento: []}
+
+    def importar(self, linhas_csv):
+        """Processa o CSV (iterável de linhas de texto) e retorna um ResultadoImportacao"""
+        self._carregar_cadastros()
+        linhas = [dados for _, dados in self._verificar_duplicadas(self._ler_linhas(linhas_csv))]
+        self._progredir('Gravando contas', len(linhas) + len(self.resultado.erros))
+
+        with transaction.atomic():
+            self._criar_cadastros_faltantes()
+            self._criar_contas(linhas)
+
+        return self.resultado
+
+    def _progredir(self, etapa, linhas_lidas):
+        if self.ao_progredir:
+            self.ao_progredir(etapa, linhas_lidas)
+
+    # 1. Cadastros existentes
+
+    def _carregar_cadastros(self):
+        for filial in Filial.objects.filter(company=self.company):
+            self.filiais.setdefault(_chave(filial.nome), filial)
+            self.cnpjs_filiais.add(filial.cnpj)
+
+        for fornecedor in Fornecedor.objects.filter(company=self.company):
+            self.fornecedores.setdefault(_chave(fornecedor.nome), fornecedor)
+
+        # Prefere categorias de despesa quando há receita e despesa com o mesmo nome
+        for categoria in CategoriaFinanceira.objects.filter(company=self.company).order_by('tipo'):
+            self.categorias.setdefault(_chave(categoria.nome), categoria)
+
+        for forma in FormaPagamento.objects.filter(company=self.company):
+            self.formas_pagamento.setdefault(_chave(forma.nome), forma)
+
+    # 2. Leitura e validação
+
+    def _ler_linhas(self, linhas_csv):
+        linhas = []
+        for row_num, row in enumerate(csv.DictReader(linhas_csv), start=2):
+            try:
+                linhas.append((row_num, self._validar_linha(row)))
+            except ErroLinha as e:
+                self.resultado.erros.append(f"Linha {row_num}: {e}")
+
+            if (row_num - 1) % self.TAMANHO_LOTE == 0:
+                self._progredir('Validando linhas', row_num - 1)
+        return linhas
+
+    def _verificar_duplicadas(self, linhas):
+        """
+        Aponta as linhas cuja conta já existe na company (mesmo fornecedor, boleto,
+        valor e vencimento) ou que repetem outra linha do arquivo. Contas distintas
+        podem coincidir (ex.: sem boleto), então por padrão a linha é importada com
+        um aviso; com rejeitar_duplicadas ela vira erro e é descartada.
+        A consulta é feita por lotes de assinaturas.
+        """
+        assinaturas = [
+            assinatura_conta(
+                dados['fornecedor'].id, dados['numero_boleto'], dados['valor_original'], dados['data_vencimento']
+            )
+            for _, dados in linhas
+        ]
+
+        existentes = set()
+        unicas = list(set(assinaturas))
+        for inicio in range(0, len(unicas), self.TAMANHO_LOTE):
+            existentes.update(ContasPagar.objects.filter(
+                company=self.company, assinatura__in=unicas[inicio:inicio + self.TAMANHO_LOTE]
+            ).values_list('assinatura', flat=True))
+
+        primeira_linha = {}
+        aceitas = []
+        for (row_num, dados), assinatura in zip(linhas, assinaturas):
+            motivo = None
+            if assinatura in existentes:
+                motivo = 'já cadastrada'
+            elif assinatura in primeira_linha:
+                motivo = f'repete a linha {primeira_linha[assinatura]}'
+            primeira_linha.setdefault(assinatura, row_num)
+
+            if motivo is None:
+                aceitas.append((row_num, dados))
+            elif self.rejeitar_duplicadas:
+                self.resultado.erros.append(f"Linha {row_num}: conta duplicada ({motivo})")
+            else:
+                self.resultado.avisos.append(f"Linha {row_num}: possível conta duplicada ({motivo})")
+                aceitas.append((row_num, dados))
+        return aceitas
+
+    def _validar_linha(self, row):
+        criar_automatico = (row.get('criar_se_nao_existir') or '').strip().lower() in VALORES_SIM
+
+        descricao = _texto(row, 'descricao', ContasPagar, 'descricao')
+        if not descricao:
+            raise ErroLinha("Campo 'descricao' é obrigatório")
+
+        status = (row.get('status') or '').strip() or 'pendente'
+        if status not in STATUS_VALIDOS:
+            raise ErroLinha(f"Status '{status}' inválido")
+
+        valor_original = _decimal(row.get('valor_original'), 'valor_original', obrigatorio=True)
+        desconto = _decimal(row.get('desconto'), 'desconto')
+        juros = _decimal(row.get('juros'), 'juros')
+        multa = _decimal(row.get('multa'), 'multa')
+        if desconto > valor_original + juros + multa:
+            raise ErroLinha("Desconto maior que o valor da conta (original + juros + multa)")
+
+        data_emissao = _data(row.get('data_emissao'), 'data_emissao') or date.today()
+        data_vencimento = _data(row.get('data_vencimento'), 'data_vencimento', obrigatoria=True)
+        data_pagamento = _data(row.get('data_pagamento'), 'data_pagamento')
+
+        # Conta paga: valor pago = valor final (original - desconto + juros + multa)
+        valor_pago = Decimal('0')
+        if status == 'paga' or data_pagamento:
+            valor_pago = _limitar_decimal(valor_original - desconto + juros + multa, 'valor_pago')
+
+        notas_fiscais = _texto(row, 'notas_fiscais', ContasPagar, 'notas_fiscais')
+        limite_nf = NotaFiscalContaPagar._meta.get_field('numero').max_length
+        if any(len(numero) > limite_nf for numero in numeros_nota_fiscal(notas_fiscais)):
+            raise ErroLinha(f"Número de nota fiscal com mais de {limite_nf} dígitos em 'notas_fiscais'")
+
+        return {
+            'filial': self._resolver_filial(row, criar_automatico),
+            'fornecedor': self._resolver_fornecedor(row, criar_automatico),
+            'categoria': self._resolver_categoria(row, criar_automatico),
+            'forma_pagamento': self._resolver_forma_pagamento(row, criar_automatico),
+            'descricao': descricao,
+            'valor_original': valor_original,
+            'desconto': desconto,
+            'juros': juros,
+            'multa': multa,
+            'valor_pago': valor_pago,
+            'data_emissao': data_emissao,
+            'data_vencimento': data_vencimento,
+            'data_pagamento': data_pagamento,
+            'status': status,
+            'numero_boleto': _texto(row, 'numero_boleto', ContasPagar, 'numero_boleto'),
+            'notas_fiscais': notas_fiscais,
+            'observacoes': (row.get('observacoes') or '').strip(),
+        }
+
+    def _novo_cadastro(self, model, **campos):
+        """Instancia (sem gravar) um cadastro a ser criado em lote"""
+        instancia = model(company=self.company, created_by=self.user, updated_by=self.user, **campos)
+        instancia.normalizar()
+        self.novos_cadastros[model].append(instancia)
+        return instancia
+
+    def _resolver_filial(self, row, criar_automatico):
+        nome = _texto(row, 'filial_nome', Filial, 'nome')
+        if not nome:
+            raise ErroLinha("Campo 'filial_nome' é obrigatório")
+
+        filial = self.filiais.get(_chave(nome))
+        if filial:
+            return filial
+        if not criar_automatico:
+            raise ErroLinha(f"Filial '{nome}' não encontrada")
+
+        cnpj = ''.join(filter(str.isdigit, row.get('filial_cnpj') or '')) or CNPJ_PLACEHOLDER
+        if len(cnpj) != 14:
+            raise ErroLinha("CNPJ da filial deve ter 14 dígitos")
+        if cnpj in self.cnpjs_filiais:
+            raise ErroLinha(f"Erro ao criar filial: já existe uma filial com o CNPJ {cnpj}")
+
+        filial = self._novo_cadastro(Filial, nome=nome, cnpj=cnpj, ativa=True)
+        self.filiais[_chave(nome)] = filial
+        self.cnpjs_filiais.add(cnpj)
+        return filial
+
+    def _resolver_fornecedor(self, row, criar_automatico):
+        nome = _texto(row, 'fornecedor_nome', Fornecedor, 'nome')
+        if not nome:
+            raise ErroLinha("Campo 'fornecedor_nome' é obrigatório")
+
+        fornecedor = self.fornecedores.get(_chave(nome))
+        if fornecedor:
+            return fornecedor
+        if not criar_automatico:
+            raise ErroLinha(f"Fornecedor '{nome}' não encontrado")
+
+        tipo_pessoa = (row.get('fornecedor_tipo_pessoa') or 'juridica').strip().lower()
+        if tipo_pessoa not in ['fisica', 'juridica']:
+            tipo_pessoa = 'juridica'
+
+        cpf_cnpj = ''.join(filter(str.isdigit, row.get('fornecedor_cpf_cnpj') or ''))
+        if cpf_cnpj:
+            if tipo_pessoa == 'fisica' and len(cpf_cnpj) != 11:
+                raise ErroLinha(f"CPF deve ter 11 dígitos (fornecido: {len(cpf_cnpj)})")
+            if tipo_pessoa == 'juridica' and len(cpf_cnpj) != 14:
+                raise ErroLinha(f"CNPJ deve ter 14 dígitos (fornecido: {len(cpf_cnpj)})")
+
+        fornecedor = self._novo_cadastro(
+            Fornecedor, nome=nome, tipo_pessoa=tipo_pessoa, cpf_cnpj=cpf_cnpj, ativo=True
+        )
+        self.fornecedores[_chave(nome)] = fornecedor
+        return fornecedor
+
+    def _resolver_categoria(self, row, criar_automatico):
+        nome = _texto(row, 'categoria_nome', CategoriaFinanceira, 'nome')
+        if not nome:
+            raise ErroLinha("Campo 'categoria_nome' é obrigatório")
+
+        categoria = self.categorias.get(_chave(nome))
+        if categoria:
+            return categoria
+        if not criar_automatico:
+            raise ErroLinha(f"Categoria '{nome}' não encontrada")
+
+        categoria = self._novo_cadastro(CategoriaFinanceira, nome=nome, tipo='despesa', ativa=True)
+        self.categorias[_chave(nome)] = categoria
+        return categoria
+
+    def _resolver_forma_pagamento(self, row, criar_automatico):
+        nome = _texto(row, 'forma_pagamento_nome', FormaPagamento, 'nome')
+        if not nome:
+            return None
+
+        forma = self.formas_pagamento.get(_chave(nome))
+        if forma or not criar_automatico:
+            return forma
+
+        forma = self._novo_cadastro(FormaPagamento, nome=nome, ativa=True)
+        self.formas_pagamento[_chave(nome)] = forma
+        return forma
+
+    # 3. Cadastros faltantes
+
+    def _criar_cadastros_faltantes(self):
+        for model, instancias in self.novos_cadastros.items():
+            if instancias:
+                model.objects.bulk_create(instancias, batch_size=self.TAMANHO_LOTE)
+                self.resultado.cadastros_criados += len(instancias)
+
+        # bulk_create não dispara os sinais que invalidam o cache das opções
+        if self.resultado.cadastros_criados:
+            company_id = self.company.id
+            transaction.on_commit(lambda: opcoes.invalidar(company_id))
+
+    # 4. Contas
+
+    def _criar_contas(self, linhas):
+        chaves_resumo = set()
+
+        for inicio in range(0, len(linhas), self.TAMANHO_LOTE):
+            lote = []
+            for dados in linhas[inicio:inicio + self.TAMANHO_LOTE]:
+                conta = ContasPagar(
+                    company=self.company,
+                    created_by=self.user,
+                    updated_by=self.user,
+                    **dados
+                )
+                conta.normalizar()
+                lote.append(conta)
+                chaves_resumo.add(estado_resumo(conta)[0])
+
+            ContasPagar.objects.bulk_create(lote)
+            NotaFiscalContaPagar.sincronizar(lote, novas=True)
+            self.resultado.sucesso += len(lote)
+
+        recalcular_buckets(chaves_resumo)
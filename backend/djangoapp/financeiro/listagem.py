@@ -0,0 +1,91 @@
+"""
+Listagem rápida de contas a pagar (action `list`, síncrona e assíncrona).
+
+Produz exatamente a saída do ContasPagarListSerializer sem instanciar models
+nem passar pelos campos do DRF: a consulta lê só as colunas da listagem
+(values_list, com os nomes de filial/fornecedor/categoria por JOIN) e cada
+linha vira um dict em uma única função, com as conversões resolvidas antes
+do laço. Com 10k+ linhas por resposta o custo por linha do serializer
+(source='filial.id', Decimal -> str, get_status_display) era o gargalo.
+Ao alterar os campos do ContasPagarListSerializer, altere também COLUNAS e _linha.
+"""
+from datetime import date
+
+from .models import ContasPagar
+
+
+# Ordem das colunas lidas; _linha desempacota na mesma ordem
+COLUNAS = [
+    'id', 'descricao',
+    'filial_id', 'filial__nome',
+    'fornecedor_id', 'fornecedor__nome',
+    'categoria_id', 'categoria__nome',
+    'valor_original', 'valor_final', 'valor_restante', 'valor_pago',
+    'data_vencimento', 'data_pagamento', 'data_emissao',
+    'status',
+    'e_parcelada', 'parcela_atual', 'total_parcelas',
+    'e_recorrente', 'frequencia_recorrencia',
+    # Posição usada pelos cursores da ContasPagarPagination
+    'status_order',
+]
+
+STATUS_DISPLAY = dict(ContasPagar.STATUS_CHOICES)
+
+
+def linhas(queryset):
+    """
+    Queryset (filtrado e ordenado) com só as colunas da listagem. As linhas
+    têm atributos nomeados (id, data_vencimento, status_order), então a
+    paginação por página ou por cursor funciona sem mudanças.
+    """
+    return queryset.values_list(*COLUNAS, named=True)
+
+
+def _data(valor):
+    return valor.isoformat() if valor is not None else None
+
+
+def _linha(linha, hoje, status_display=STATUS_DISPLAY.get, data=_data):
+    (
+        pk, descricao,
+        filial_id, filial_nome,
+        fornecedor_id, fornecedor_nome,
+        categoria_id, categoria_nome,
+        valor_original, valor_final, valor_restante, valor_pago,
+        data_vencimento, data_pagamento, data_emissao,
+        status,
+        e_parcelada, parcela_atual, total_parcelas,
+        e_recorrente, frequencia_recorrencia,
+        _,
+    ) = linha
+    return {
+        'id': str(pk),
+        'descricao': descricao,
+        'filial_id': str(filial_id),
+        'filial_nome': filial_nome,
+        'fornecedor_id': str(fornecedor_id),
+        'fornecedor_nome': fornecedor_nome,
+        'categoria_id': str(categoria_id),
+        'categoria_nome': categoria_nome,
+        'valor_original': f'{valor_original:.2f}',
+        'valor_final': f'{valor_final:.2f}',
+        'valor_restante': f'{valor_restante:.2f}',
+        'valor_pago': f'{valor_pago:.2f}',
+        'data_vencimento': data(data_vencimento),
+        'data_pagamento': data(data_pagamento),
+        'data_emissao': data(data_emissao),
+        'status': status,
+        'status_display': status_display(status, status),
+        'esta_vencida': status == 'pendente' and data_vencimento < hoje,
+        'e_parcelada': e_parcelada,
+        'parcela_atual': parcela_atual,
+        'total_parcelas': total_parcelas,
+        'e_recorrente': e_recorrente,
+        'frequencia_recorrencia': frequencia_recorrencia,
+    }
+
+
+def serializar(linhas):
+    """Dicts da listagem, iguais aos do ContasPagarListSerializer(many=True)"""
+    hoje = date.today()
+    return [_linha(linha, hoje) for linha in linhas]
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from companies.models import Company
+from financeiro.models import ContasPagar
+
+
+class Command(BaseCommand):
+    help = "Marca como 'vencida' as contas pendentes com vencimento anterior a hoje (rodar diariamente)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            action='append',
+            dest='companies',
+            help='ID da empresa (pode ser repetido). Padrão: todas as empresas'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=5000,
+            help='Máximo de contas por UPDATE (padrão: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        companies = Company.objects.all()
+        if options['companies']:
+            companies = companies.filter(id__in=options['companies'])
+
+        total = 0
+        for company in companies:
+            atualizadas = ContasPagar.objects.filter(company=company).marcar_vencidas(tamanho_lote=options['lote'])
+            total += atualizadas
+            if atualizadas:
+                self.stdout.write(f'[{company.name}] {atualizadas} conta(s) marcada(s) como vencida')
+
+        self.stdout.write(self.style.SUCCESS(f'{total} conta(s) marcada(s) como vencida'))
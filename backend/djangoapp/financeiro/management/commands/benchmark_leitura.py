@@ -0,0 +1,91 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+CAMINHOS_PADRAO = ['contas-pagar/', 'contas-pagar/estatisticas/', 'contas-pagar/pendentes/']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a vazão das leituras de contas a pagar pelo handler WSGI (views síncronas, '
+        'threads) e pelo ASGI (views de views_async.py, asyncio) sobre os dados de um usuário'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('usuario', help='Email do usuário (as leituras usam os dados da empresa dele)')
+        parser.add_argument(
+            '--caminho',
+            action='append',
+            dest='caminhos',
+            help=f'Caminho relativo a /api/financeiro/ (pode ser repetido). Padrão: {", ".join(CAMINHOS_PADRAO)}'
+        )
+        parser.add_argument('--requisicoes', type=int, default=200, help='Requisições por caminho e modo (padrão: 200)')
+        parser.add_argument('--concorrencia', type=int, default=20, help='Requisições simultâneas (padrão: 20)')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(email=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário '{options['usuario']}' não encontrado")
+
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        self.requisicoes = options['requisicoes']
+        self.concorrencia = options['concorrencia']
+
+        self.stdout.write(f'{self.requisicoes} requisições por modo, concorrência {self.concorrencia}')
+        # Os clientes de teste do Django usam o host "testserver"
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for caminho in options['caminhos'] or CAMINHOS_PADRAO:
+                self.stdout.write(self.style.MIGRATE_HEADING(caminho))
+                self.relatar('WSGI (sync) ', *self.medir_wsgi(f'/api/financeiro/{caminho}'))
+                self.relatar('ASGI (async)', *asyncio.run(self.medir_asgi(f'/api/financeiro/async/{caminho}')))
+
+    def medir_wsgi(self, url):
+        def executar(_):
+            client = Client()
+            inicio = time.perf_counter()
+            resposta = client.get(url, headers=self.headers)
+            return time.perf_counter() - inicio, resposta.status_code
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concorrencia) as executor:
+            resultados = list(executor.map(executar, range(self.requisicoes)))
+            # Cada thread abriu a própria conexão
+            list(executor.map(lambda _: connections.close_all(), range(self.concorrencia)))
+        return time.perf_counter() - inicio, resultados
+
+    async def medir_asgi(self, url):
+        client = AsyncClient()
+        limite = asyncio.Semaphore(self.concorrencia)
+
+        async def executar():
+            async with limite:
+                inicio = time.perf_counter()
+                resposta = await client.get(url, headers=self.headers)
+                return time.perf_counter() - inicio, resposta.status_code
+
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(*(executar() for _ in range(self.requisicoes)))
+        return time.perf_counter() - inicio, resultados
+
+    def relatar(self, modo, total, resultados):
+        latencias = sorted(latencia for latencia, _ in resultados)
+        erros = sum(1 for _, status_code in resultados if status_code != 200)
+        p95 = latencias[int(len(latencias) * 0.95) - 1] if len(latencias) > 1 else latencias[0]
+        linha = (
+            f'  {modo}: {len(resultados) / total:8.1f} req/s | '
+            f'p50 {statistics.median(latencias) * 1000:7.1f} ms | p95 {p95 * 1000:7.1f} ms'
+        )
+        if erros:
+            linha += self.style.ERROR(f' | {erros} resposta(s) != 200')
+        self.stdout.write(linha)
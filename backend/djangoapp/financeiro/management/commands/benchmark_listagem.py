@@ -0,0 +1,113 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import ORJSONRenderer
+from financeiro import listagem
+from financeiro.models import ORDEM_STATUS, CategoriaFinanceira, ContasPagar, Filial, Fornecedor
+from financeiro.serializers import ContasPagarListSerializer
+from financeiro.views import ContasPagarViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede linhas/s da listagem de contas a pagar: ContasPagarListSerializer + JSONRenderer '
+        '(antes) contra financeiro.listagem + ORJSONRenderer (depois). Se a empresa tiver menos '
+        'contas que o pedido, gera as que faltam numa transação desfeita ao final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('usuario', help='Email do usuário (as leituras usam os dados da empresa dele)')
+        parser.add_argument(
+            '--linhas',
+            type=int,
+            action='append',
+            help='Quantidade de linhas por medição (pode ser repetido). Padrão: 10000 e 100000'
+        )
+        parser.add_argument('--repeticoes', type=int, default=3, help='Medições por caso; vale a melhor (padrão: 3)')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.select_related('company').get(email=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário '{options['usuario']}' não encontrado")
+        if not user.company:
+            raise CommandError('Usuário sem empresa')
+
+        tamanhos = sorted(options['linhas'] or [10000, 100000])
+        self.repeticoes = max(options['repeticoes'], 1)
+        queryset = ContasPagarViewSet.queryset.filter(company=user.company).annotate(
+            status_order=ORDEM_STATUS
+        ).order_by('status_order', 'data_vencimento', 'id')
+
+        with transaction.atomic():
+            geradas = self.completar(user.company, tamanhos[-1] - queryset.count())
+            if geradas:
+                self.stdout.write(f'{geradas} conta(s) de teste geradas (serão descartadas)')
+
+            for tamanho in tamanhos:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{tamanho} linhas'))
+                antes = self.medir(lambda: self.antes(queryset, tamanho))
+                depois = self.medir(lambda: self.depois(queryset, tamanho))
+                self.relatar('antes ', tamanho, antes)
+                self.relatar('depois', tamanho, depois)
+                self.stdout.write(f'  ganho: {sum(antes) / sum(depois):.1f}x')
+
+            transaction.set_rollback(True)
+
+    def completar(self, company, faltantes):
+        """Gera contas até a empresa ter `faltantes` a mais (mesma filial/fornecedor/categoria)"""
+        if faltantes <= 0:
+            return 0
+        filial = Filial.objects.filter(company=company).first()
+        fornecedor = Fornecedor.objects.filter(company=company).first()
+        categoria = CategoriaFinanceira.objects.filter(company=company).first()
+        if not (filial and fornecedor and categoria):
+            raise CommandError('A empresa precisa de ao menos uma filial, um fornecedor e uma categoria')
+
+        hoje = date.today()
+        contas = []
+        for indice in range(faltantes):
+            conta = ContasPagar(
+                company=company, filial=filial, fornecedor=fornecedor, categoria=categoria,
+                descricao=f'Benchmark {indice}', valor_original=Decimal(100 + indice % 900),
+                data_vencimento=hoje + timedelta(days=indice % 365 - 30)
+            )
+            conta.normalizar()
+            contas.append(conta)
+        ContasPagar.objects.bulk_create(contas, batch_size=2000)
+        return faltantes
+
+    def antes(self, queryset, tamanho):
+        inicio = time.perf_counter()
+        contas = list(queryset[:tamanho])
+        consulta = time.perf_counter()
+        dados = ContasPagarListSerializer(contas, many=True).data
+        serializacao = time.perf_counter()
+        JSONRenderer().render(dados)
+        return consulta - inicio, serializacao - consulta, time.perf_counter() - serializacao
+
+    def depois(self, queryset, tamanho):
+        inicio = time.perf_counter()
+        linhas = list(listagem.linhas(queryset)[:tamanho])
+        consulta = time.perf_counter()
+        dados = listagem.serializar(linhas)
+        serializacao = time.perf_counter()
+        ORJSONRenderer().render(dados)
+        return consulta - inicio, serializacao - consulta, time.perf_counter() - serializacao
+
+    def medir(self, funcao):
+        return min((funcao() for _ in range(self.repeticoes)), key=sum)
+
+    def relatar(self, modo, tamanho, tempos):
+        consulta, serializacao, render = tempos
+        self.stdout.write(
+            f'  {modo}: {tamanho / sum(tempos):10.0f} linhas/s | consulta {consulta * 1000:8.1f} ms | '
+            f'serialização {serializacao * 1000:8.1f} ms | JSON {render * 1000:8.1f} ms'
+        )
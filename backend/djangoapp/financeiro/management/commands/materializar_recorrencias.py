@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from financeiro.models import RegraRecorrencia
+from financeiro.recorrencia import horizonte_padrao, materializar
+
+
+class Command(BaseCommand):
+    help = 'Gera as ocorrências das contas recorrentes até o horizonte (hoje + N dias)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            action='append',
+            dest='companies',
+            help='ID da empresa (pode ser repetido). Padrão: todas as empresas'
+        )
+        parser.add_argument(
+            '--dias',
+            type=int,
+            help='Horizonte em dias a partir de hoje. Padrão: FINANCEIRO_HORIZONTE_RECORRENCIA_DIAS'
+        )
+
+    def handle(self, *args, **options):
+        ate = date.today() + timedelta(days=options['dias']) if options['dias'] is not None else horizonte_padrao()
+
+        regras = RegraRecorrencia.objects.all()
+        if options['companies']:
+            regras = regras.filter(company_id__in=options['companies'])
+
+        contas = materializar(regras, ate)
+        self.stdout.write(self.style.SUCCESS(f'{len(contas)} ocorrência(s) gerada(s) até {ate:%d/%m/%Y}'))
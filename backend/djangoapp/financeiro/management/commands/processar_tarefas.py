@@ -0,0 +1,58 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from financeiro.tarefas import executar_proxima, manutencao_diaria
+
+
+class Command(BaseCommand):
+    help = 'Worker que executa as tarefas em segundo plano (importações, exportações, relatórios)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera quando a fila está vazia (padrão: 2)'
+        )
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Processa as tarefas pendentes e encerra quando a fila esvaziar'
+        )
+        parser.add_argument(
+            '--sem-manutencao',
+            action='store_true',
+            help='Não executa a manutenção diária (contas vencidas e recorrências)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🟢 Worker de tarefas iniciado')
+        ultima_manutencao = None
+
+        while True:
+            close_old_connections()
+
+            # Manutenção diária: na partida e a cada virada de dia
+            if not options['sem_manutencao'] and ultima_manutencao != date.today():
+                ultima_manutencao = date.today()
+                try:
+                    geradas, vencidas = manutencao_diaria()
+                    self.stdout.write(
+                        f'Manutenção diária: {geradas} recorrência(s) gerada(s), {vencidas} conta(s) vencida(s)'
+                    )
+                except Exception as e:
+                    # Não derruba o worker: tenta de novo no próximo dia (ou rode os comandos manualmente)
+                    self.stderr.write(f'Falha na manutenção diária: {e}')
+
+            tarefa = executar_proxima()
+
+            if tarefa is not None:
+                self.stdout.write(f'[{tarefa.pk}] {tarefa.get_tipo_display()}: {tarefa.get_status_display()}')
+                continue
+
+            if options['uma_vez']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from companies.models import Company
+from financeiro.resumo import divergencias, reconstruir
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o resumo de contas a pagar (ResumoContasPagar) ou verifica divergências'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            action='append',
+            dest='companies',
+            help='ID da empresa (pode ser repetido). Padrão: todas as empresas'
+        )
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Apenas compara o resumo com as contas, sem alterar nada'
+        )
+
+    def handle(self, *args, **options):
+        companies = Company.objects.all()
+        if options['companies']:
+            companies = companies.filter(id__in=options['companies'])
+
+        total_divergencias = 0
+        for company in companies:
+            if options['verificar']:
+                encontradas = divergencias(company.id)
+                total_divergencias += len(encontradas)
+                for chave, esperado, gravado in encontradas:
+                    _, filial_id, status, data_vencimento = chave
+                    self.stdout.write(
+                        f'[{company.name}] filial={filial_id} status={status} vencimento={data_vencimento}: '
+                        f'esperado={esperado} gravado={gravado}'
+                    )
+                if not encontradas:
+                    self.stdout.write(f'[{company.name}] resumo consistente')
+            else:
+                buckets = reconstruir(company.id)
+                self.stdout.write(self.style.SUCCESS(f'[{company.name}] {buckets} bucket(s) reconstruído(s)'))
+
+        if total_divergencias:
+            raise CommandError(f'{total_divergencias} bucket(s) divergente(s). Rode sem --verificar para corrigir.')
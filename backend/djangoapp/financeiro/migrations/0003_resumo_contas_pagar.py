@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def popular_resumo(apps, schema_editor):
+    """Gera o resumo inicial a partir das contas já existentes"""
+    ContasPagar = apps.get_model('financeiro', 'ContasPagar')
+    ResumoContasPagar = apps.get_model('financeiro', 'ResumoContasPagar')
+
+    valor_final = models.ExpressionWrapper(
+        models.F('valor_original') - models.F('desconto') + models.F('juros') + models.F('multa'),
+        output_field=models.DecimalField(max_digits=15, decimal_places=2)
+    )
+    linhas = ContasPagar.objects.order_by().values(
+        'company_id', 'filial_id', 'status', 'data_vencimento'
+    ).annotate(
+        total=models.Count('id'),
+        soma_final=models.Sum(valor_final),
+        soma_pago=models.Sum('valor_pago'),
+    )
+    ResumoContasPagar.objects.bulk_create(
+        [
+            ResumoContasPagar(
+                company_id=linha['company_id'],
+                filial_id=linha['filial_id'],
+                status=linha['status'],
+                data_vencimento=linha['data_vencimento'],
+                quantidade=linha['total'],
+                valor_final=linha['soma_final'] or 0,
+                valor_pago=linha['soma_pago'] or 0,
+            )
+            for linha in linhas.iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('financeiro', '0002_alter_contaspagar_data_emissao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoContasPagar',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('vencida', 'Vencida'), ('paga', 'Paga'), ('paga_parcial', 'Paga Parcialmente'), ('cancelada', 'Cancelada')], max_length=20, verbose_name='Status')),
+                ('data_vencimento', models.DateField(verbose_name='Data de Vencimento')),
+                ('quantidade', models.IntegerField(default=0, verbose_name='Quantidade')),
+                ('valor_final', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Valor Final')),
+                ('valor_pago', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Valor Pago')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Contas a Pagar',
+                'verbose_name_plural': 'Resumos de Contas a Pagar',
+                'ordering': ['data_vencimento'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='contaspagar',
+            index=models.Index(fields=['company', 'status', 'data_pagamento'], name='financeiro__company_836f55_idx'),
+        ),
+        migrations.AddField(
+            model_name='resumocontaspagar',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='companies.company', verbose_name='Empresa'),
+        ),
+        migrations.AddField(
+            model_name='resumocontaspagar',
+            name='filial',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_contas_pagar', to='financeiro.filial', verbose_name='Filial'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='resumocontaspagar',
+            unique_together={('company', 'filial', 'status', 'data_vencimento')},
+        ),
+        migrations.RunPython(popular_resumo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0003_resumo_contas_pagar'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contaspagar',
+            index=models.Index(models.F('company'), models.Case(models.When(status='vencida', then=models.Value(1)), models.When(status='pendente', then=models.Value(2)), default=models.Value(3), output_field=models.IntegerField()), models.F('data_vencimento'), models.F('id'), name='contaspagar_ordem_lista_idx'),
+        ),
+    ]
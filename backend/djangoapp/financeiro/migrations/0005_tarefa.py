@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('financeiro', '0004_contaspagar_ordem_lista_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarefa',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('tipo', models.CharField(choices=[('importacao_contas', 'Importação de Contas a Pagar'), ('exportacao_contas', 'Exportação de Contas a Pagar')], max_length=30, verbose_name='Tipo')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('executando', 'Executando'), ('concluida', 'Concluída'), ('falhou', 'Falhou')], default='pendente', max_length=20, verbose_name='Status')),
+                ('etapa', models.CharField(blank=True, max_length=100, verbose_name='Etapa')),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parâmetros')),
+                ('arquivo_entrada', models.FileField(blank=True, null=True, upload_to='tarefas/%Y/%m/', verbose_name='Arquivo de Entrada')),
+                ('arquivo_resultado', models.FileField(blank=True, null=True, upload_to='tarefas/%Y/%m/', verbose_name='Arquivo de Resultado')),
+                ('linhas_processadas', models.PositiveIntegerField(default=0, verbose_name='Linhas Processadas')),
+                ('linhas_sucesso', models.PositiveIntegerField(default=0, verbose_name='Linhas com Sucesso')),
+                ('total_erros', models.PositiveIntegerField(default=0, verbose_name='Total de Erros')),
+                ('erros', models.JSONField(blank=True, default=list, verbose_name='Erros')),
+                ('mensagem', models.TextField(blank=True, verbose_name='Mensagem')),
+                ('iniciada_em', models.DateTimeField(blank=True, null=True, verbose_name='Iniciada em')),
+                ('finalizada_em', models.DateTimeField(blank=True, null=True, verbose_name='Finalizada em')),
+                ('company', models.ForeignKey(help_text='Empresa proprietária deste registro', on_delete=django.db.models.deletion.CASCADE, to='companies.company', verbose_name='Empresa')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Criado por')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Atualizado por')),
+            ],
+            options={
+                'verbose_name': 'Tarefa',
+                'verbose_name_plural': 'Tarefas',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='financeiro__status_565543_idx'), models.Index(fields=['company', 'created_at'], name='financeiro__company_a3c783_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:11
+
+from decimal import Decimal
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('companies', '0001_initial'),
+        ('financeiro', '0005_tarefa'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegraRecorrencia',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('descricao', models.CharField(max_length=200, verbose_name='Descrição')),
+                ('valor_original', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Valor Original')),
+                ('desconto', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Desconto')),
+                ('juros', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Juros')),
+                ('multa', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Multa')),
+                ('notas_fiscais', models.CharField(blank=True, max_length=200, verbose_name='Notas Fiscais')),
+                ('numero_boleto', models.CharField(blank=True, max_length=100, verbose_name='Número do Boleto')),
+                ('observacoes', models.TextField(blank=True, verbose_name='Observações')),
+                ('frequencia', models.CharField(choices=[('semanal', 'Semanal'), ('quinzenal', 'Quinzenal'), ('mensal', 'Mensal'), ('bimestral', 'Bimestral'), ('trimestral', 'Trimestral'), ('semestral', 'Semestral'), ('anual', 'Anual')], max_length=20, verbose_name='Frequência')),
+                ('data_inicio', models.DateField(verbose_name='Primeiro Vencimento')),
+                ('quantidade_total', models.PositiveIntegerField(blank=True, help_text='Vazio = recorrência sem data de término', null=True, verbose_name='Quantidade de Ocorrências')),
+                ('ocorrencias_geradas', models.PositiveIntegerField(default=0, verbose_name='Ocorrências Geradas')),
+                ('proximo_vencimento', models.DateField(blank=True, help_text='Vencimento da próxima ocorrência a materializar (vazio = série encerrada)', null=True, verbose_name='Próximo Vencimento')),
+                ('ativa', models.BooleanField(default=True, verbose_name='Ativa')),
+            ],
+            options={
+                'verbose_name': 'Regra de Recorrência',
+                'verbose_name_plural': 'Regras de Recorrência',
+                'ordering': ['descricao'],
+            },
+        ),
+        migrations.AddField(
+            model_name='regrarecorrencia',
+            name='categoria',
+            field=models.ForeignKey(limit_choices_to={'tipo': 'despesa'}, on_delete=django.db.models.deletion.PROTECT, related_name='regras_recorrencia', to='financeiro.categoriafinanceira', verbose_name='Categoria'),
+        ),
+        migrations.AddField(
+            model_name='regrarecorrencia',
+            name='company',
+            field=models.ForeignKey(help_text='Empresa proprietária deste registro', on_delete=django.db.models.deletion.CASCADE, to='companies.company', verbose_name='Empresa'),
+        ),
+        migrations.AddField(
+            model_name='regrarecorrencia',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Criado por'),
+        ),
+        migrations.AddField(
+            model_name='regrarecorrencia',
+            name='filial',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='regras_recorrencia', to='financeiro.filial', verbose_name='Filial'),
+        ),
+        migrations.AddField(
+            model_name='regrarecorrencia',
+            name='forma_pagamento',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='regras_recorrencia', to='financeiro.formapagamento', verbose_name='Forma de Pagamento'),
+        ),
+        migrations.AddField(
+            model_name='regrarecorrencia',
+            name='fornecedor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='regras_recorrencia', to='financeiro.fornecedor', verbose_name='Fornecedor'),
+        ),
+        migrations.AddField(
+            model_name='regrarecorrencia',
+            name='updated_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Atualizado por'),
+        ),
+        migrations.AddField(
+            model_name='contaspagar',
+            name='regra_recorrencia',
+            field=models.ForeignKey(blank=True, help_text='Regra que gerou esta ocorrência', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contas', to='financeiro.regrarecorrencia', verbose_name='Regra de Recorrência'),
+        ),
+        migrations.AddIndex(
+            model_name='regrarecorrencia',
+            index=models.Index(fields=['ativa', 'proximo_vencimento'], name='financeiro__ativa_3cdefb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='regrarecorrencia',
+            index=models.Index(fields=['company', 'ativa', 'proximo_vencimento'], name='financeiro__company_04e7f9_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='contaspagar',
+            constraint=models.UniqueConstraint(condition=models.Q(('regra_recorrencia__isnull', False)), fields=('regra_recorrencia', 'data_vencimento'), name='contaspagar_ocorrencia_unica'),
+        ),
+    ]
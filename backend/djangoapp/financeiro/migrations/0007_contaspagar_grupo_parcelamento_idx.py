@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0006_regra_recorrencia'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contaspagar',
+            index=models.Index(fields=['company', 'grupo_parcelamento'], name='financeiro__company_72d1ff_idx'),
+        ),
+    ]
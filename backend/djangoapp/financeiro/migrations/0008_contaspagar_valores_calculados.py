@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:15
+
+from django.db import migrations, models
+
+
+def calcular_valores(apps, schema_editor):
+    """Preenche valor_final/valor_restante das contas existentes com dois UPDATEs"""
+    ContasPagar = apps.get_model('financeiro', 'ContasPagar')
+    decimal = models.DecimalField(max_digits=12, decimal_places=2)
+
+    ContasPagar.objects.update(valor_final=models.ExpressionWrapper(
+        models.F('valor_original') - models.F('desconto') + models.F('juros') + models.F('multa'),
+        output_field=decimal
+    ))
+    ContasPagar.objects.update(valor_restante=models.Case(
+        models.When(
+            valor_final__gt=models.F('valor_pago'),
+            then=models.ExpressionWrapper(models.F('valor_final') - models.F('valor_pago'), output_field=decimal)
+        ),
+        default=models.Value(0, output_field=decimal)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0007_contaspagar_grupo_parcelamento_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contaspagar',
+            name='valor_final',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Valor Original - Desconto + Juros + Multa', max_digits=12, verbose_name='Valor Final'),
+        ),
+        migrations.AddField(
+            model_name='contaspagar',
+            name='valor_restante',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Valor Final - Valor Pago (mínimo 0)', max_digits=12, verbose_name='Valor Restante'),
+        ),
+        migrations.RunPython(calcular_valores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contaspagar',
+            index=models.Index(fields=['company', 'valor_final'], name='financeiro__company_664dfa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contaspagar',
+            index=models.Index(fields=['company', 'valor_restante'], name='financeiro__company_b9ec8b_idx'),
+        ),
+    ]
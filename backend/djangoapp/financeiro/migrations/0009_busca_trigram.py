@@ -0,0 +1,43 @@
+from django.db import migrations
+
+
+# Índices GIN trigram (pg_trgm) usados por financeiro.busca.BuscaTrigramaFilter
+INDICES = [
+    ('financeiro_contaspagar_descricao_trgm', 'financeiro_contaspagar', 'descricao'),
+    ('financeiro_contaspagar_notas_fiscais_trgm', 'financeiro_contaspagar', 'notas_fiscais'),
+    ('financeiro_contaspagar_numero_boleto_trgm', 'financeiro_contaspagar', 'numero_boleto'),
+    ('financeiro_fornecedor_nome_trgm', 'financeiro_fornecedor', 'nome'),
+    ('financeiro_fornecedor_nome_fantasia_trgm', 'financeiro_fornecedor', 'nome_fantasia'),
+    ('financeiro_fornecedor_cpf_cnpj_trgm', 'financeiro_fornecedor', 'cpf_cnpj'),
+]
+
+
+def criar_indices(apps, schema_editor):
+    # Só existe no Postgres; em outros bancos a busca usa o SearchFilter padrão
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for nome, tabela, coluna in INDICES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nome} ON {tabela} USING gin ({coluna} gin_trgm_ops)'
+        )
+
+
+def remover_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for nome, _, _ in INDICES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nome}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0008_contaspagar_valores_calculados'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+import uuid
+
+
+def numeros_nota_fiscal(texto):
+    """Cópia de financeiro.models.numeros_nota_fiscal na época desta migração"""
+    numeros = []
+    for numero in re.split(r'[^\d]+', texto or ''):
+        numero = numero.lstrip('0')
+        if numero and numero not in numeros:
+            numeros.append(numero)
+    return numeros
+
+
+def popular_notas(apps, schema_editor):
+    """Gera as linhas de NF a partir do campo notas_fiscais das contas existentes"""
+    ContasPagar = apps.get_model('financeiro', 'ContasPagar')
+    NotaFiscalContaPagar = apps.get_model('financeiro', 'NotaFiscalContaPagar')
+
+    lote = []
+    contas = ContasPagar.objects.exclude(notas_fiscais='').values_list('id', 'company_id', 'notas_fiscais')
+    for conta_id, company_id, notas_fiscais in contas.iterator(chunk_size=2000):
+        for numero in numeros_nota_fiscal(notas_fiscais):
+            lote.append(NotaFiscalContaPagar(conta_id=conta_id, company_id=company_id, numero=numero))
+        if len(lote) >= 2000:
+            NotaFiscalContaPagar.objects.bulk_create(lote)
+            lote = []
+    NotaFiscalContaPagar.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('financeiro', '0009_busca_trigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotaFiscalContaPagar',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('numero', models.CharField(max_length=50, verbose_name='Número')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='companies.company', verbose_name='Empresa')),
+                ('conta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notas', to='financeiro.contaspagar', verbose_name='Conta a Pagar')),
+            ],
+            options={
+                'verbose_name': 'Nota Fiscal da Conta',
+                'verbose_name_plural': 'Notas Fiscais das Contas',
+                'ordering': ['numero'],
+                'indexes': [models.Index(fields=['company', 'numero'], name='financeiro__company_5f861c_idx')],
+                'unique_together': {('conta', 'numero')},
+            },
+        ),
+        migrations.RunPython(popular_notas, migrations.RunPython.noop),
+    ]
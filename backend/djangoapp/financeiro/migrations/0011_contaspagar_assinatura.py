@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:22
+
+import hashlib
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def assinatura_conta(fornecedor_id, numero_boleto, valor_original, data_vencimento):
+    """Cópia de financeiro.models.assinatura_conta na época desta migração"""
+    boleto = ''.join(filter(str.isdigit, numero_boleto or ''))
+    valor = Decimal(str(valor_original or 0)).quantize(Decimal('0.01'))
+    conteudo = f'{fornecedor_id}|{boleto}|{valor}|{data_vencimento}'
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+
+def preencher_assinaturas(apps, schema_editor):
+    """Calcula a assinatura das contas existentes em lotes"""
+    ContasPagar = apps.get_model('financeiro', 'ContasPagar')
+    campos = ['id', 'fornecedor_id', 'numero_boleto', 'valor_original', 'data_vencimento']
+
+    lote = []
+    for conta_id, *origem in ContasPagar.objects.order_by().values_list(*campos).iterator(chunk_size=2000):
+        lote.append(ContasPagar(id=conta_id, assinatura=assinatura_conta(*origem)))
+        if len(lote) >= 2000:
+            ContasPagar.objects.bulk_update(lote, ['assinatura'])
+            lote = []
+    if lote:
+        ContasPagar.objects.bulk_update(lote, ['assinatura'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0010_nota_fiscal_conta_pagar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contaspagar',
+            name='assinatura',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Assinatura'),
+        ),
+        migrations.AddIndex(
+            model_name='contaspagar',
+            index=models.Index(fields=['company', 'assinatura'], name='financeiro__company_72d5de_idx'),
+        ),
+        migrations.RunPython(preencher_assinaturas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('financeiro', '0011_contaspagar_assinatura'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExclusaoContaPagar',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('conta_id', models.UUIDField(verbose_name='Conta a Pagar')),
+            ],
+            options={
+                'verbose_name': 'Exclusão de Conta a Pagar',
+                'verbose_name_plural': 'Exclusões de Contas a Pagar',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='contaspagar',
+            index=models.Index(fields=['company', 'updated_at', 'id'], name='contaspagar_alteracoes_idx'),
+        ),
+        migrations.AddField(
+            model_name='exclusaocontapagar',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='companies.company', verbose_name='Empresa'),
+        ),
+        migrations.AddIndex(
+            model_name='exclusaocontapagar',
+            index=models.Index(fields=['company', 'created_at'], name='financeiro__company_a1b39a_idx'),
+        ),
+    ]
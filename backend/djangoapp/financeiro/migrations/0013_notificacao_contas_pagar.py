@@ -0,0 +1,77 @@
+from django.db import migrations
+
+
+# Trigger que publica (NOTIFY) as alterações de contas a pagar no canal lido por financeiro.eventos.
+# O NOTIFY só é entregue no commit; UPDATEs que não mudam status, valores ou vencimento não notificam.
+CRIAR = """
+CREATE OR REPLACE FUNCTION financeiro_contaspagar_notificar() RETURNS trigger AS $$
+DECLARE
+    conta financeiro_contaspagar;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        conta := OLD;
+    ELSE
+        conta := NEW;
+    END IF;
+    PERFORM pg_notify('financeiro_contas_pagar', json_build_object(
+        'company', conta.company_id,
+        'id', conta.id,
+        'operacao', lower(TG_OP),
+        'status', conta.status,
+        'valor_original', conta.valor_original::text,
+        'valor_final', conta.valor_final::text,
+        'valor_restante', conta.valor_restante::text,
+        'valor_pago', conta.valor_pago::text,
+        'data_vencimento', conta.data_vencimento
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER financeiro_contaspagar_notificar
+    AFTER INSERT OR DELETE ON financeiro_contaspagar
+    FOR EACH ROW EXECUTE FUNCTION financeiro_contaspagar_notificar();
+
+CREATE TRIGGER financeiro_contaspagar_notificar_update
+    AFTER UPDATE ON financeiro_contaspagar
+    FOR EACH ROW
+    WHEN (
+        OLD.status IS DISTINCT FROM NEW.status
+        OR OLD.valor_original IS DISTINCT FROM NEW.valor_original
+        OR OLD.valor_final IS DISTINCT FROM NEW.valor_final
+        OR OLD.valor_restante IS DISTINCT FROM NEW.valor_restante
+        OR OLD.valor_pago IS DISTINCT FROM NEW.valor_pago
+        OR OLD.data_vencimento IS DISTINCT FROM NEW.data_vencimento
+    )
+    EXECUTE FUNCTION financeiro_contaspagar_notificar();
+"""
+
+REMOVER = """
+DROP TRIGGER IF EXISTS financeiro_contaspagar_notificar_update ON financeiro_contaspagar;
+DROP TRIGGER IF EXISTS financeiro_contaspagar_notificar ON financeiro_contaspagar;
+DROP FUNCTION IF EXISTS financeiro_contaspagar_notificar();
+"""
+
+
+def criar_trigger(apps, schema_editor):
+    # Só existe no Postgres; em outros bancos o feed de eventos fica indisponível
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CRIAR)
+
+
+def remover_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(REMOVER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0012_sincronizacao_incremental'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_trigger, remover_trigger),
+    ]
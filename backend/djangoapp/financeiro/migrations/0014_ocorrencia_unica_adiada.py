@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:05
+
+from django.db import migrations, models
+import django.db.models.constraints
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0013_notificacao_contas_pagar'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='contaspagar',
+            name='contaspagar_ocorrencia_unica',
+        ),
+        migrations.AddConstraint(
+            model_name='contaspagar',
+            constraint=models.UniqueConstraint(deferrable=django.db.models.constraints.Deferrable['DEFERRED'], fields=('regra_recorrencia', 'data_vencimento'), name='contaspagar_ocorrencia_unica'),
+        ),
+    ]
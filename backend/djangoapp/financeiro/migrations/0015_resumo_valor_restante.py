@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:06
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+
+def preencher_restante(apps, schema_editor):
+    """Soma, em cada bucket, o restante de cada conta limitado a zero (um único UPDATE)"""
+    ContasPagar = apps.get_model('financeiro', 'ContasPagar')
+    ResumoContasPagar = apps.get_model('financeiro', 'ResumoContasPagar')
+
+    decimal = models.DecimalField(max_digits=15, decimal_places=2)
+    zero = models.Value(Decimal('0'), output_field=decimal)
+    restante = Greatest(
+        models.ExpressionWrapper(
+            F('valor_original') - F('desconto') + F('juros') + F('multa') - F('valor_pago'),
+            output_field=decimal
+        ),
+        zero
+    )
+    soma = ContasPagar.objects.filter(
+        company_id=OuterRef('company_id'),
+        filial_id=OuterRef('filial_id'),
+        status=OuterRef('status'),
+        data_vencimento=OuterRef('data_vencimento'),
+    ).order_by().values('company_id').annotate(soma=Sum(restante)).values('soma')
+
+    ResumoContasPagar.objects.update(valor_restante=Coalesce(Subquery(soma, output_field=decimal), zero))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0014_ocorrencia_unica_adiada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumocontaspagar',
+            name='valor_restante',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Valor Restante'),
+        ),
+        migrations.RunPython(preencher_restante, migrations.RunPython.noop),
+    ]
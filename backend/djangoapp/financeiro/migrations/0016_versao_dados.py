@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('financeiro', '0015_resumo_valor_restante'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoDados',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('opcoes', models.BigIntegerField(default=0, verbose_name='Versão das Opções')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='companies.company', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Versão dos Dados',
+                'verbose_name_plural': 'Versões dos Dados',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='versaodados',
+            constraint=models.UniqueConstraint(fields=('company',), name='versaodados_company_unica'),
+        ),
+    ]
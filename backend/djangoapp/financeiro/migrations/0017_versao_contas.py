@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0016_versao_dados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='versaodados',
+            name='contas',
+            field=models.BigIntegerField(default=0, verbose_name='Versão das Contas'),
+        ),
+    ]
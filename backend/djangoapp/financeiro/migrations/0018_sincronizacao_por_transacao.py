@@ -0,0 +1,79 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:14
+
+from django.db import migrations, models
+
+
+# Marca cada gravação em contas a pagar e em exclusões com a transação (txid) que a fez.
+# A sincronização incremental (financeiro.sincronizacao) compara esse txid com o horizonte
+# do snapshot (txid_snapshot_xmin), que só avança quando as transações anteriores terminam.
+CRIAR = """
+CREATE OR REPLACE FUNCTION financeiro_registrar_transacao() RETURNS trigger AS $$
+BEGIN
+    NEW.transacao := txid_current();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER financeiro_contaspagar_transacao
+    BEFORE INSERT OR UPDATE ON financeiro_contaspagar
+    FOR EACH ROW EXECUTE FUNCTION financeiro_registrar_transacao();
+
+CREATE TRIGGER financeiro_exclusaocontapagar_transacao
+    BEFORE INSERT ON financeiro_exclusaocontapagar
+    FOR EACH ROW EXECUTE FUNCTION financeiro_registrar_transacao();
+
+UPDATE financeiro_contaspagar SET transacao = txid_current();
+UPDATE financeiro_exclusaocontapagar SET transacao = txid_current();
+"""
+
+REMOVER = """
+DROP TRIGGER IF EXISTS financeiro_exclusaocontapagar_transacao ON financeiro_exclusaocontapagar;
+DROP TRIGGER IF EXISTS financeiro_contaspagar_transacao ON financeiro_contaspagar;
+DROP FUNCTION IF EXISTS financeiro_registrar_transacao();
+"""
+
+
+def criar_trigger(apps, schema_editor):
+    # Só existe no Postgres; em outros bancos a sincronização incremental fica indisponível
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CRIAR)
+
+
+def remover_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(REMOVER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0017_versao_contas'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contaspagar',
+            name='contaspagar_alteracoes_idx',
+        ),
+        migrations.AddField(
+            model_name='contaspagar',
+            name='transacao',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='Transação'),
+        ),
+        migrations.AddField(
+            model_name='exclusaocontapagar',
+            name='transacao',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='Transação'),
+        ),
+        migrations.RunPython(criar_trigger, remover_trigger),
+        migrations.AddIndex(
+            model_name='contaspagar',
+            index=models.Index(fields=['company', 'transacao', 'id'], name='contaspagar_alteracoes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exclusaocontapagar',
+            index=models.Index(fields=['company', 'transacao'], name='exclusaoconta_transacao_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:53
+
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import migrations, models
+import financeiro.models
+
+
+def mover_arquivos_privados(apps, schema_editor):
+    """
+    Move os arquivos das tarefas existentes do MEDIA_ROOT (servido pelo nginx)
+    para o storage privado, com nome aleatório, e guarda o nome original do
+    resultado para o download. As tarefas em execução ganham o sinal inicial.
+    """
+    Tarefa = apps.get_model('financeiro', 'Tarefa')
+    publico = FileSystemStorage(location=settings.MEDIA_ROOT)
+
+    com_arquivo = Tarefa.objects.filter(models.Q(arquivo_entrada__gt='') | models.Q(arquivo_resultado__gt=''))
+    for tarefa in com_arquivo.iterator():
+        campos = []
+        for campo in ('arquivo_entrada', 'arquivo_resultado'):
+            nome = getattr(tarefa, campo).name
+            if not nome or not publico.exists(nome):
+                continue
+            with publico.open(nome, 'rb') as arquivo:
+                getattr(tarefa, campo).save(os.path.basename(nome), File(arquivo), save=False)
+            publico.delete(nome)
+            campos.append(campo)
+            if campo == 'arquivo_resultado':
+                tarefa.nome_resultado = os.path.basename(nome)
+                campos.append('nome_resultado')
+        if campos:
+            tarefa.save(update_fields=campos)
+
+    Tarefa.objects.filter(status='executando').update(ultimo_sinal_em=models.F('iniciada_em'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0018_sincronizacao_por_transacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarefa',
+            name='nome_resultado',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Nome do Arquivo de Resultado'),
+        ),
+        migrations.AddField(
+            model_name='tarefa',
+            name='tentativas',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas'),
+        ),
+        migrations.AddField(
+            model_name='tarefa',
+            name='ultimo_sinal_em',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Último Sinal em'),
+        ),
+        migrations.AlterField(
+            model_name='tarefa',
+            name='arquivo_entrada',
+            field=models.FileField(blank=True, null=True, storage=financeiro.models.ArmazenamentoPrivado(), upload_to=financeiro.models.caminho_arquivo_tarefa, verbose_name='Arquivo de Entrada'),
+        ),
+        migrations.AlterField(
+            model_name='tarefa',
+            name='arquivo_resultado',
+            field=models.FileField(blank=True, null=True, storage=financeiro.models.ArmazenamentoPrivado(), upload_to=financeiro.models.caminho_arquivo_tarefa, verbose_name='Arquivo de Resultado'),
+        ),
+        migrations.RunPython(mover_arquivos_privados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:04
+
+from django.db import migrations, models
+from django.db.models.functions import Cast, Least
+
+
+def calcular_percentual(apps, schema_editor):
+    """Preenche percentual_pago das contas existentes (pago / final, limitado a 100) com um UPDATE"""
+    ContasPagar = apps.get_model('financeiro', 'ContasPagar')
+    percentual = models.DecimalField(max_digits=5, decimal_places=2)
+
+    ContasPagar.objects.update(percentual_pago=models.Case(
+        models.When(
+            valor_final__gt=0,
+            # Divisão em ponto flutuante: no SQLite valores inteiros (ex.: 50 / 300) dividiriam como inteiros
+            then=Least(
+                models.ExpressionWrapper(
+                    Cast('valor_pago', models.FloatField()) * 100 / Cast('valor_final', models.FloatField()),
+                    output_field=percentual
+                ),
+                models.Value(100, output_field=percentual),
+            )
+        ),
+        default=models.Value(0, output_field=percentual)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0019_tarefa_arquivos_privados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contaspagar',
+            name='percentual_pago',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Valor Pago / Valor Final (0 a 100)', max_digits=5, verbose_name='Percentual Pago'),
+        ),
+        migrations.RunPython(calcular_percentual, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contaspagar',
+            index=models.Index(fields=['company', 'percentual_pago'], name='financeiro__company_56352e_idx'),
+        ),
+    ]
@@ -1,10 +1,17 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.core.files.storage import FileSystemStorage
 from django.core.validators import MinValueValidator, RegexValidator
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 from datetime import date
+import hashlib
+import os
+import re
+import uuid
 from django.utils import timezone
-from core.models import BaseCompanyModel
+from django.utils.functional import cached_property
+from core.models import BaseModel, BaseCompanyModel
 
 
 class Filial(BaseCompanyModel):
@@ -39,6 +46,10 @@ class Filial(BaseCompanyModel):
         return self.nome
     
     def save(self, *args, **kwargs):
+        self.normalizar()
+        super().save(*args, **kwargs)
+
+    def normalizar(self):
         """Converte campos de texto para UPPERCASE"""
         if self.nome:
             self.nome = self.nome.upper()
@@ -50,8 +61,6 @@ class Filial(BaseCompanyModel):
             self.estado = self.estado.upper()
         if self.email:
             self.email = self.email.upper()
-        
-        super().save(*args, **kwargs)
     
     def clean(self):
         """Validação customizada"""
@@ -95,11 +104,13 @@ class CategoriaFinanceira(BaseCompanyModel):
         return f"{self.get_tipo_display()} - {self.nome}"
     
     def save(self, *args, **kwargs):
+        self.normalizar()
+        super().save(*args, **kwargs)
+
+    def normalizar(self):
         """Converte nome para UPPERCASE"""
         if self.nome:
             self.nome = self.nome.upper()
-        
-        super().save(*args, **kwargs)
 
 
 class Fornecedor(BaseCompanyModel):
@@ -149,6 +160,10 @@ class Fornecedor(BaseCompanyModel):
         return self.nome_fantasia or self.nome
     
     def save(self, *args, **kwargs):
+        self.normalizar()
+        super().save(*args, **kwargs)
+
+    def normalizar(self):
         """Converte campos de texto para UPPERCASE"""
         if self.nome:
             self.nome = self.nome.upper()
@@ -164,8 +179,6 @@ class Fornecedor(BaseCompanyModel):
             self.estado = self.estado.upper()
         if self.observacoes:
             self.observacoes = self.observacoes.upper()
-        
-        super().save(*args, **kwargs)
     
     def clean(self):
         """Validação customizada"""
@@ -194,11 +207,139 @@ class FormaPagamento(BaseCompanyModel):
         return self.nome
     
     def save(self, *args, **kwargs):
+        self.normalizar()
+        super().save(*args, **kwargs)
+
+    def normalizar(self):
         """Converte nome para UPPERCASE"""
         if self.nome:
             self.nome = self.nome.upper()
-        
-        super().save(*args, **kwargs)
+
+
+# Prioridade de exibição das contas: vencidas, pendentes e depois as demais.
+# Compartilhada entre a ordenação da listagem e o índice que a atende.
+ORDEM_STATUS = models.Case(
+    models.When(status='vencida', then=models.Value(1)),
+    models.When(status='pendente', then=models.Value(2)),
+    default=models.Value(3),
+    output_field=models.IntegerField(),
+)
+
+
+def numeros_nota_fiscal(texto):
+    """
+    Extrai os números de NF de um texto livre ("123, 456 789").
+    Remove zeros à esquerda (e números zerados) e repetições, mantendo a ordem.
+    """
+    numeros = []
+    for numero in re.split(r'[^\d]+', texto or ''):
+        numero = numero.lstrip('0')
+        if numero and numero not in numeros:
+            numeros.append(numero)
+    return numeros
+
+
+def assinatura_conta(fornecedor_id, numero_boleto, valor_original, data_vencimento):
+    """
+    Impressão digital de uma conta para detectar duplicatas:
+    fornecedor + boleto (só dígitos) + valor original + vencimento.
+    """
+    boleto = ''.join(filter(str.isdigit, numero_boleto or ''))
+    valor = Decimal(str(valor_original or 0)).quantize(Decimal('0.01'))
+    conteudo = f'{fornecedor_id}|{boleto}|{valor}|{data_vencimento}'
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+
+class ContasPagarQuerySet(models.QuerySet):
+
+    def delete(self):
+        """
+        Exclusão em massa mantendo o resumo: recalcula só os buckets afetados,
+        sem sinal por objeto (o DELETE continua set-based).
+        """
+        from . import versao
+        from .resumo import chaves_resumo, recalcular_buckets
+
+        with transaction.atomic(using=self.db):
+            chaves = chaves_resumo(self)
+            excluidas = list(self.order_by().values_list('company_id', 'id'))
+            resultado = super().delete()
+            recalcular_buckets(chaves)
+            ExclusaoContaPagar.registrar(excluidas)
+            versao.incrementar({chave[0] for chave in chaves}, using=self.db)
+        return resultado
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def update(self, **kwargs):
+        """
+        UPDATE em massa (também usado pelo bulk_update) avançando a versão dos dados
+        das companies afetadas. Marca updated_at (o auto_now só vale no save()),
+        do qual depende a sincronização incremental.
+        """
+        from . import versao
+
+        kwargs.setdefault('updated_at', timezone.now())
+        with transaction.atomic(using=self.db):
+            companies = set(self.order_by().values_list('company_id', flat=True).distinct())
+            resultado = super().update(**kwargs)
+            versao.incrementar(companies, using=self.db)
+        return resultado
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import versao
+
+        objs = list(objs)
+        resultado = super().bulk_create(objs, *args, **kwargs)
+        versao.incrementar({obj.company_id for obj in objs}, using=self.db)
+        return resultado
+
+    def marcar_vencidas(self, hoje=None, tamanho_lote=5000):
+        """
+        Passa para 'vencida' as contas pendentes com vencimento anterior a `hoje`,
+        em UPDATEs de até `tamanho_lote` linhas (cada lote na sua transação,
+        para não segurar locks em tabelas grandes). Retorna o total atualizado.
+        """
+        from .resumo import chaves_resumo, recalcular_buckets
+
+        hoje = hoje or date.today()
+        atrasadas = self.filter(status='pendente', data_vencimento__lt=hoje)
+        total = 0
+
+        while True:
+            with transaction.atomic(using=self.db):
+                ids = list(atrasadas.order_by().values_list('id', flat=True)[:tamanho_lote])
+                if not ids:
+                    break
+
+                lote = self.model.objects.filter(id__in=ids, status='pendente')
+                chaves = chaves_resumo(lote)
+                total += lote.update(status='vencida', updated_at=timezone.now())
+                recalcular_buckets(chaves | {(c, f, 'vencida', d) for c, f, _, d in chaves})
+
+        return total
+
+    marcar_vencidas.alters_data = True
+
+    def recalcular_assinaturas(self, tamanho_lote=2000):
+        """
+        Regrava a assinatura (detecção de duplicatas) das contas do queryset.
+        Usado após UPDATEs em massa que mudam fornecedor/boleto/valor/vencimento.
+        """
+        campos = ['id', 'fornecedor_id', 'numero_boleto', 'valor_original', 'data_vencimento']
+        lote = []
+        for conta_id, *origem in self.order_by().values_list(*campos).iterator(chunk_size=tamanho_lote):
+            lote.append(self.model(id=conta_id, assinatura=assinatura_conta(*origem)))
+            if len(lote) >= tamanho_lote:
+                self.model.objects.bulk_update(lote, ['assinatura'])
+                lote = []
+        if lote:
+            self.model.objects.bulk_update(lote, ['assinatura'])
+
+    recalcular_assinaturas.alters_data = True
 
 
 class ContasPagar(BaseCompanyModel):
@@ -217,6 +358,12 @@ class ContasPagar(BaseCompanyModel):
         ('cancelada', 'Cancelada'),
     ]
     
+    # Campos de origem de valor_final/valor_restante/percentual_pago
+    CAMPOS_VALOR = ['valor_original', 'desconto', 'juros', 'multa', 'valor_pago']
+
+    # Campos de origem da assinatura (detecção de duplicatas)
+    CAMPOS_ASSINATURA = ['fornecedor', 'fornecedor_id', 'numero_boleto', 'valor_original', 'data_vencimento']
+
     FREQUENCIA_CHOICES = [
         ('semanal', 'Semanal'),
         ('quinzenal', 'Quinzenal'),
@@ -287,6 +434,39 @@ class ContasPagar(BaseCompanyModel):
         default=0,
         validators=[MinValueValidator(Decimal('0'))]
     )
+
+    # Valores calculados, gravados pelo normalizar() para filtrar/ordenar/somar no banco
+    valor_final = models.DecimalField(
+        'Valor Final',
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text='Valor Original - Desconto + Juros + Multa'
+    )
+    valor_restante = models.DecimalField(
+        'Valor Restante',
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text='Valor Final - Valor Pago (mínimo 0)'
+    )
+    percentual_pago = models.DecimalField(
+        'Percentual Pago',
+        max_digits=5,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text='Valor Pago / Valor Final (0 a 100)'
+    )
+
+    # Detecção de duplicatas (calculada pelo normalizar(), ver assinatura_conta)
+    assinatura = models.CharField('Assinatura', max_length=64, blank=True, editable=False)
+
+    # Transação (txid do Postgres) que gravou a linha por último; preenchida por trigger
+    # (migração 0018) e usada como marca d'água da sincronização incremental
+    transacao = models.BigIntegerField('Transação', null=True, blank=True, editable=False)
     
     # Datas - data_emissao agora tem default
     data_emissao = models.DateField(
@@ -332,6 +512,15 @@ class ContasPagar(BaseCompanyModel):
         null=True,
         blank=True
     )
+    regra_recorrencia = models.ForeignKey(
+        'RegraRecorrencia',
+        on_delete=models.SET_NULL,
+        verbose_name='Regra de Recorrência',
+        related_name='contas',
+        null=True,
+        blank=True,
+        help_text='Regra que gerou esta ocorrência'
+    )
     
     # Documentos
     notas_fiscais = models.CharField(
@@ -368,6 +557,8 @@ class ContasPagar(BaseCompanyModel):
         blank=True
     )
     
+    objects = ContasPagarQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Conta a Pagar'
         verbose_name_plural = 'Contas a Pagar'
@@ -375,6 +566,30 @@ class ContasPagar(BaseCompanyModel):
         indexes = [
             models.Index(fields=['company', 'filial', 'status']),
             models.Index(fields=['company', 'filial', 'data_vencimento']),
+            models.Index(fields=['company', 'status', 'data_pagamento']),
+            models.Index(fields=['company', 'grupo_parcelamento']),
+            models.Index(fields=['company', 'valor_final']),
+            models.Index(fields=['company', 'valor_restante']),
+            models.Index(fields=['company', 'percentual_pago']),
+            models.Index(fields=['company', 'assinatura']),
+            # Sincronização incremental (/contas-pagar/changes/): (company, transacao, id)
+            models.Index(fields=['company', 'transacao', 'id'], name='contaspagar_alteracoes_idx'),
+            # Paginação por cursor: (company, status_order, data_vencimento, id)
+            models.Index(
+                models.F('company'), ORDEM_STATUS, models.F('data_vencimento'), models.F('id'),
+                name='contaspagar_ordem_lista_idx'
+            ),
+        ]
+        constraints = [
+            # Uma ocorrência por vencimento em cada regra (protege contra materialização duplicada).
+            # Sem condição (NULLs não colidem, então contas sem regra continuam livres) para poder
+            # ser adiada ao commit: o reagendamento desloca a série num único UPDATE e, verificada
+            # linha a linha, uma ocorrência colidiria com a seguinte ainda não deslocada.
+            models.UniqueConstraint(
+                fields=['regra_recorrencia', 'data_vencimento'],
+                name='contaspagar_ocorrencia_unica',
+                deferrable=models.Deferrable.DEFERRED,
+            ),
         ]
     
     def __str__(self):
@@ -384,6 +599,46 @@ class ContasPagar(BaseCompanyModel):
         return f"{filial_info} {self.descricao}"
     
     def save(self, *args, **kwargs):
+        self.normalizar()
+
+        # 🔹 Valores calculados acompanham os campos de origem em saves parciais
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.CAMPOS_VALOR):
+            kwargs['update_fields'] = update_fields = {
+                *update_fields, 'valor_final', 'valor_restante', 'percentual_pago', 'status'
+            }
+        if update_fields is not None and set(update_fields) & set(self.CAMPOS_ASSINATURA):
+            kwargs['update_fields'] = {*update_fields, 'assinatura'}
+
+        # 🔹 Mantém o resumo do dashboard na mesma transação da conta
+        from . import versao
+        from .resumo import estado_resumo, estado_resumo_no_banco, registrar_alteracao
+
+        with transaction.atomic():
+            adicionando = self._state.adding
+            # Estado anterior relido com a linha travada (não o carregado na instância): duas
+            # gravações da mesma conta, ou uma gravação e uma operação em lote, não aplicam o
+            # mesmo delta duas vezes; a segunda espera a primeira e parte do que ela gravou
+            anterior = None if adicionando else estado_resumo_no_banco(self.pk, travar=True)
+
+            super().save(*args, **kwargs)
+
+            self._estado_resumo = estado_resumo(self)
+            registrar_alteracao(anterior, self._estado_resumo)
+            versao.incrementar([self.company_id])
+
+            # 🔹 Tabela de NFs acompanha o campo notas_fiscais
+            update_fields = kwargs.get('update_fields')
+            notas_alteradas = self.notas_fiscais != getattr(self, '_notas_fiscais_carregadas', None)
+            if adicionando or (notas_alteradas and (update_fields is None or 'notas_fiscais' in update_fields)):
+                NotaFiscalContaPagar.sincronizar([self], novas=adicionando)
+            self._notas_fiscais_carregadas = self.notas_fiscais
+
+    def normalizar(self):
+        """
+        Converte textos para UPPERCASE e ajusta o status conforme pagamento/vencimento.
+        Chamado pelo save() e pelos caminhos em lote (bulk_create), que não passam pelo save().
+        """
         if self.descricao:
             self.descricao = self.descricao.upper()
 
@@ -393,6 +648,11 @@ class ContasPagar(BaseCompanyModel):
         if self.observacoes:
             self.observacoes = self.observacoes.upper()
 
+        self.calcular_valores()
+        self.assinatura = assinatura_conta(
+            self.fornecedor_id, self.numero_boleto, self.valor_original, self.data_vencimento
+        )
+
         # 🔧 Corrigir comparação com None
         if self.valor_pago is not None and self.valor_pago > 0:
             if self.valor_final is not None and self.valor_pago >= self.valor_final:
@@ -404,29 +664,414 @@ class ContasPagar(BaseCompanyModel):
         elif self.status == 'pendente' and self.data_vencimento and self.data_vencimento < date.today():
             self.status = 'vencida'
 
-        super().save(*args, **kwargs)
+    def delete(self, *args, **kwargs):
+        from . import versao
+        from .resumo import estado_resumo_no_banco, registrar_alteracao
 
-    
-    @property
-    def valor_final(self):
-        """Calcula: Valor Original - Desconto + Juros + Multa"""
-        return self.valor_original - self.desconto + self.juros + self.multa
-    
-    @property
-    def valor_restante(self):
-        valor_final = Decimal(str(self.valor_final)) if self.valor_final else Decimal('0')
-        valor_pago = Decimal(str(self.valor_pago)) if self.valor_pago else Decimal('0')
-        
-        return max(valor_final - valor_pago, Decimal('0'))
+        with transaction.atomic():
+            # Como no save(): estado lido com a linha travada (None se já foi excluída)
+            anterior = estado_resumo_no_banco(self.pk, travar=True)
+            pk = self.pk
+            resultado = super().delete(*args, **kwargs)
+            registrar_alteracao(anterior, None)
+            ExclusaoContaPagar.registrar([(self.company_id, pk)])
+            versao.incrementar([self.company_id])
+        return resultado
+
+    def refresh_from_db(self, *args, **kwargs):
+        """Recarrega também o estado do resumo (usado pelos caminhos em lote, ver from_db)"""
+        from .resumo import CAMPOS_RESUMO, estado_resumo
+
+        super().refresh_from_db(*args, **kwargs)
+        if CAMPOS_RESUMO & self.get_deferred_fields():
+            self._estado_resumo = None
+        else:
+            self._estado_resumo = estado_resumo(self)
+        self._notas_fiscais_carregadas = self.__dict__.get('notas_fiscais')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Guarda o estado carregado do banco para calcular o delta do resumo nos caminhos
+        em lote que carregam as contas travadas (pagar-lote); o save() relê a linha travada.
+        """
+        from .resumo import CAMPOS_RESUMO, estado_resumo
+
+        instance = super().from_db(db, field_names, values)
+        if not CAMPOS_RESUMO & instance.get_deferred_fields():
+            instance._estado_resumo = estado_resumo(instance)
+        instance._notas_fiscais_carregadas = instance.__dict__.get('notas_fiscais')
+        return instance
+
+
+    def calcular_valores(self):
+        """
+        Atualiza valor_final (original - desconto + juros + multa), valor_restante
+        (final - pago, mínimo 0) e percentual_pago (pago / final, limitado a 100:
+        pagamento acima do valor final conta como 100%)
+        """
+        zero = Decimal('0')
+        self.valor_final = (
+            Decimal(str(self.valor_original or zero)) - Decimal(str(self.desconto or zero))
+            + Decimal(str(self.juros or zero)) + Decimal(str(self.multa or zero))
+        )
+        valor_pago = Decimal(str(self.valor_pago or zero))
+        self.valor_restante = max(self.valor_final - valor_pago, zero)
+        if self.valor_final > 0:
+            self.percentual_pago = min(valor_pago / self.valor_final * 100, Decimal('100')).quantize(Decimal('0.01'))
+        else:
+            self.percentual_pago = zero
     
     @property
     def esta_vencida(self):
         """Verifica se a conta está vencida"""
         return self.status == 'pendente' and self.data_vencimento < date.today()
     
+
+class NotaFiscalContaPagar(BaseModel):
+    """
+    Uma linha por número de NF de cada conta (derivada de ContasPagar.notas_fiscais),
+    para busca exata e conciliação de lotes de NFs por índice.
+    """
+
+    conta = models.ForeignKey(
+        ContasPagar,
+        on_delete=models.CASCADE,
+        verbose_name='Conta a Pagar',
+        related_name='notas'
+    )
+    numero = models.CharField('Número', max_length=50)
+
+    class Meta:
+        verbose_name = 'Nota Fiscal da Conta'
+        verbose_name_plural = 'Notas Fiscais das Contas'
+        ordering = ['numero']
+        unique_together = [['conta', 'numero']]
+        indexes = [
+            models.Index(fields=['company', 'numero']),
+        ]
+
+    def __str__(self):
+        return self.numero
+
+    @classmethod
+    def sincronizar(cls, contas, novas=False):
+        """
+        Regrava as NFs das contas a partir de notas_fiscais.
+        `novas=True` (contas recém-criadas) pula o DELETE. Usado pelo save() e pelos caminhos em lote.
+        """
+        with transaction.atomic():
+            if not novas:
+                cls.objects.filter(conta__in=[conta.pk for conta in contas]).delete()
+            cls.objects.bulk_create(
+                [
+                    cls(company_id=conta.company_id, conta_id=conta.pk, numero=numero)
+                    for conta in contas
+                    for numero in numeros_nota_fiscal(conta.notas_fiscais)
+                ],
+                batch_size=1000
+            )
+
+
+class ExclusaoContaPagar(BaseModel):
+    """
+    Registro (tombstone) de uma conta excluída, para que a sincronização
+    incremental (/contas-pagar/changes/) informe as exclusões aos clientes.
+    Mantido por financeiro.sincronizacao.RETENCAO_EXCLUSOES.
+    """
+
+    conta_id = models.UUIDField('Conta a Pagar')
+    # Transação (txid) da exclusão, preenchida por trigger como em ContasPagar.transacao
+    transacao = models.BigIntegerField('Transação', null=True, blank=True, editable=False)
+
+    class Meta:
+        verbose_name = 'Exclusão de Conta a Pagar'
+        verbose_name_plural = 'Exclusões de Contas a Pagar'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['company', 'created_at']),
+            models.Index(fields=['company', 'transacao'], name='exclusaoconta_transacao_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.conta_id)
+
+    @classmethod
+    def registrar(cls, excluidas):
+        """Grava as exclusões; `excluidas` são pares (company_id, conta_id)"""
+        cls.objects.bulk_create(
+            [cls(company_id=company_id, conta_id=conta_id) for company_id, conta_id in excluidas],
+            batch_size=1000
+        )
+
+
+class RegraRecorrencia(BaseCompanyModel):
+    """
+    Modelo (template) de uma conta recorrente.
+    As ocorrências são materializadas em ContasPagar apenas dentro de um
+    horizonte móvel (ver financeiro/recorrencia.py), em vez de gravar a
+    série inteira de uma vez.
+    """
+
+    filial = models.ForeignKey(
+        Filial,
+        on_delete=models.PROTECT,
+        verbose_name='Filial',
+        related_name='regras_recorrencia'
+    )
+    descricao = models.CharField('Descrição', max_length=200)
+    fornecedor = models.ForeignKey(
+        Fornecedor,
+        on_delete=models.PROTECT,
+        verbose_name='Fornecedor',
+        related_name='regras_recorrencia'
+    )
+    categoria = models.ForeignKey(
+        CategoriaFinanceira,
+        on_delete=models.PROTECT,
+        verbose_name='Categoria',
+        related_name='regras_recorrencia',
+        limit_choices_to={'tipo': 'despesa'}
+    )
+    forma_pagamento = models.ForeignKey(
+        FormaPagamento,
+        on_delete=models.PROTECT,
+        verbose_name='Forma de Pagamento',
+        related_name='regras_recorrencia',
+        null=True,
+        blank=True
+    )
+
+    # Valores de cada ocorrência
+    valor_original = models.DecimalField(
+        'Valor Original',
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))]
+    )
+    desconto = models.DecimalField('Desconto', max_digits=10, decimal_places=2, default=0)
+    juros = models.DecimalField('Juros', max_digits=10, decimal_places=2, default=0)
+    multa = models.DecimalField('Multa', max_digits=10, decimal_places=2, default=0)
+
+    notas_fiscais = models.CharField('Notas Fiscais', max_length=200, blank=True)
+    numero_boleto = models.CharField('Número do Boleto', max_length=100, blank=True)
+    observacoes = models.TextField('Observações', blank=True)
+
+    # Regra
+    frequencia = models.CharField('Frequência', max_length=20, choices=ContasPagar.FREQUENCIA_CHOICES)
+    data_inicio = models.DateField('Primeiro Vencimento')
+    quantidade_total = models.PositiveIntegerField(
+        'Quantidade de Ocorrências',
+        null=True,
+        blank=True,
+        help_text='Vazio = recorrência sem data de término'
+    )
+    ocorrencias_geradas = models.PositiveIntegerField('Ocorrências Geradas', default=0)
+    proximo_vencimento = models.DateField(
+        'Próximo Vencimento',
+        null=True,
+        blank=True,
+        help_text='Vencimento da próxima ocorrência a materializar (vazio = série encerrada)'
+    )
+    ativa = models.BooleanField('Ativa', default=True)
+
+    class Meta:
+        verbose_name = 'Regra de Recorrência'
+        verbose_name_plural = 'Regras de Recorrência'
+        ordering = ['descricao']
+        indexes = [
+            models.Index(fields=['ativa', 'proximo_vencimento']),
+            models.Index(fields=['company', 'ativa', 'proximo_vencimento']),
+        ]
+
+    def __str__(self):
+        return f"{self.descricao} ({self.get_frequencia_display()})"
+
+    def save(self, *args, **kwargs):
+        self.normalizar()
+        if self._state.adding and self.proximo_vencimento is None and not self.ocorrencias_geradas:
+            self.proximo_vencimento = self.data_inicio
+        super().save(*args, **kwargs)
+
+    def normalizar(self):
+        """Converte campos de texto para UPPERCASE"""
+        if self.descricao:
+            self.descricao = self.descricao.upper()
+        if self.notas_fiscais:
+            self.notas_fiscais = self.notas_fiscais.upper()
+        if self.observacoes:
+            self.observacoes = self.observacoes.upper()
+
     @property
-    def percentual_pago(self):
-        """Retorna o percentual pago"""
-        if self.valor_final > 0:
-            return (self.valor_pago / self.valor_final) * 100
-        return 0
\ No newline at end of file
+    def encerrada(self):
+        return self.proximo_vencimento is None
+
+
+class ResumoContasPagar(BaseModel):
+    """
+    Resumo pré-calculado de contas a pagar por
+    (company, filial, status, data_vencimento).
+    Mantido incrementalmente a cada alteração em ContasPagar
+    e usado pelo dashboard para evitar varrer a tabela de contas.
+    """
+
+    filial = models.ForeignKey(
+        Filial,
+        on_delete=models.CASCADE,
+        verbose_name='Filial',
+        related_name='resumos_contas_pagar'
+    )
+    status = models.CharField('Status', max_length=20, choices=ContasPagar.STATUS_CHOICES)
+    data_vencimento = models.DateField('Data de Vencimento')
+
+    quantidade = models.IntegerField('Quantidade', default=0)
+    valor_final = models.DecimalField('Valor Final', max_digits=15, decimal_places=2, default=0)
+    valor_pago = models.DecimalField('Valor Pago', max_digits=15, decimal_places=2, default=0)
+    # Soma do restante de cada conta (limitado a zero), igual à soma de ContasPagar.valor_restante
+    valor_restante = models.DecimalField('Valor Restante', max_digits=15, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Resumo de Contas a Pagar'
+        verbose_name_plural = 'Resumos de Contas a Pagar'
+        ordering = ['data_vencimento']
+        unique_together = [['company', 'filial', 'status', 'data_vencimento']]
+
+    def __str__(self):
+        return f"{self.filial_id} {self.status} {self.data_vencimento}: {self.quantidade}"
+
+
+class VersaoDados(BaseModel):
+    """
+    Contadores de versão dos dados da company, usados nos GETs condicionais
+    (financeiro/versao.py e financeiro/opcoes.py). Ficam no banco para valer
+    em todos os processos: web e worker avançam a mesma linha depois do
+    commit de cada escrita.
+    """
+
+    contas = models.BigIntegerField('Versão das Contas', default=0)
+    # Cadastros exibidos nos selects (financeiro/opcoes.py)
+    opcoes = models.BigIntegerField('Versão das Opções', default=0)
+
+    class Meta:
+        verbose_name = 'Versão dos Dados'
+        verbose_name_plural = 'Versões dos Dados'
+        constraints = [
+            models.UniqueConstraint(fields=['company'], name='versaodados_company_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.company_id}: {self.contas}/{self.opcoes}"
+
+    @classmethod
+    def ler(cls, company_id, campo):
+        """Valor atual do contador (0 enquanto a company não tiver escritas)"""
+        return cls.objects.filter(company_id=company_id).values_list(campo, flat=True).first() or 0
+
+    @classmethod
+    def avancar(cls, company_ids, campo):
+        """Incrementa o contador das companies (UPDATE atômico; cria a linha na primeira vez)"""
+        for company_id in company_ids:
+            if cls.objects.filter(company_id=company_id).update(**{campo: models.F(campo) + 1}):
+                continue
+            _, criada = cls.objects.get_or_create(company_id=company_id, defaults={campo: 1})
+            if not criada:
+                # Criada em paralelo por outro processo
+                cls.objects.filter(company_id=company_id).update(**{campo: models.F(campo) + 1})
+
+
+class ArmazenamentoPrivado(FileSystemStorage):
+    """
+    FileSystemStorage em settings.PRIVATE_MEDIA_ROOT, fora do MEDIA_ROOT que o
+    nginx serve: os arquivos só saem pela aplicação. A pasta é lida da
+    configuração no uso (como o MEDIA_ROOT no storage padrão).
+    """
+
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.PRIVATE_MEDIA_ROOT)
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        super()._clear_cached_properties(setting, **kwargs)
+        if setting == 'PRIVATE_MEDIA_ROOT':
+            self.__dict__.pop('base_location', None)
+            self.__dict__.pop('location', None)
+
+
+def caminho_arquivo_tarefa(instance, filename):
+    """Nome aleatório por company: o caminho não revela nem permite adivinhar o arquivo"""
+    extensao = os.path.splitext(filename)[1].lower()
+    return f'tarefas/{instance.company_id}/{uuid.uuid4().hex}{extensao}'
+
+
+class Tarefa(BaseCompanyModel):
+    """
+    Tarefa executada em segundo plano pelo worker (manage.py processar_tarefas):
+    importações, exportações e relatórios grandes que não cabem no tempo de
+    uma requisição. A própria tabela funciona como fila.
+    """
+
+    TIPO_CHOICES = [
+        ('importacao_contas', 'Importação de Contas a Pagar'),
+        ('exportacao_contas', 'Exportação de Contas a Pagar'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('executando', 'Executando'),
+        ('concluida', 'Concluída'),
+        ('falhou', 'Falhou'),
+    ]
+
+    # Limite de mensagens de erro guardadas na tarefa (o total fica em total_erros)
+    MAX_ERROS = 1000
+
+    tipo = models.CharField('Tipo', max_length=30, choices=TIPO_CHOICES)
+    status = models.CharField('Status', max_length=20, choices=STATUS_CHOICES, default='pendente')
+    etapa = models.CharField('Etapa', max_length=100, blank=True)
+    parametros = models.JSONField('Parâmetros', default=dict, blank=True)
+
+    # Servidos só pela action download do TarefaViewSet (autenticada e filtrada pela company)
+    arquivo_entrada = models.FileField(
+        'Arquivo de Entrada', upload_to=caminho_arquivo_tarefa, storage=ArmazenamentoPrivado(),
+        null=True, blank=True
+    )
+    arquivo_resultado = models.FileField(
+        'Arquivo de Resultado', upload_to=caminho_arquivo_tarefa, storage=ArmazenamentoPrivado(),
+        null=True, blank=True
+    )
+    # Nome oferecido no download (o arquivo gravado tem nome aleatório)
+    nome_resultado = models.CharField('Nome do Arquivo de Resultado', max_length=255, blank=True)
+
+    linhas_processadas = models.PositiveIntegerField('Linhas Processadas', default=0)
+    linhas_sucesso = models.PositiveIntegerField('Linhas com Sucesso', default=0)
+    total_erros = models.PositiveIntegerField('Total de Erros', default=0)
+    erros = models.JSONField('Erros', default=list, blank=True)
+    mensagem = models.TextField('Mensagem', blank=True)
+
+    iniciada_em = models.DateTimeField('Iniciada em', null=True, blank=True)
+    finalizada_em = models.DateTimeField('Finalizada em', null=True, blank=True)
+    # Atualizado periodicamente pelo worker que executa a tarefa: sem sinal, ela volta para a fila
+    ultimo_sinal_em = models.DateTimeField('Último Sinal em', null=True, blank=True)
+    tentativas = models.PositiveSmallIntegerField('Tentativas', default=0)
+
+    class Meta:
+        verbose_name = 'Tarefa'
+        verbose_name_plural = 'Tarefas'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['company', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} ({self.get_status_display()})"
+
+    def atualizar_progresso(self, etapa=None, linhas_processadas=None):
+        """Grava o progresso direto no banco (visível para quem consulta a tarefa)"""
+        campos = {}
+        if etapa is not None:
+            self.etapa = campos['etapa'] = etapa
+        if linhas_processadas is not None:
+            self.linhas_processadas = campos['linhas_processadas'] = linhas_processadas
+        if campos:
+            Tarefa.objects.filter(pk=self.pk).update(**campos)
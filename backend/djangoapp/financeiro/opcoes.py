@@ -0,0 +1,59 @@
+"""
+Dados de referência (opções dos selects) por company: filiais, fornecedores,
+categorias e formas de pagamento em listas compactas.
+
+O conteúdo fica no cache do Django sob uma chave com a versão da company.
+Salvar/excluir qualquer um desses cadastros (financeiro/signals.py) ou
+criá-los em lote (importação) avança a versão, após o commit. A versão é o
+contador `opcoes` de VersaoDados, no banco, para que os cadastros criados pelo
+worker também invalidem o cache (de cada processo) e o ETag dos processos web.
+Ela também compõe o ETag de /api/financeiro/opcoes/: uma requisição com
+If-None-Match atualizado responde 304 lendo só a versão.
+"""
+from django.core.cache import cache
+
+from .models import CategoriaFinanceira, Filial, FormaPagamento, Fornecedor, VersaoDados
+
+
+# Model -> (chave na resposta, campos)
+CADASTROS = {
+    Filial: ('filiais', ['id', 'nome', 'ativa']),
+    Fornecedor: ('fornecedores', ['id', 'nome', 'nome_fantasia', 'ativo']),
+    CategoriaFinanceira: ('categorias', ['id', 'nome', 'tipo', 'ativa']),
+    FormaPagamento: ('formas_pagamento', ['id', 'nome', 'ativa']),
+}
+
+# O conteúdo é invalidado pela troca de versão; o prazo só limpa versões antigas
+TEMPO_CACHE = 24 * 60 * 60
+
+
+def versao(company_id):
+    """Versão atual das opções da company"""
+    return VersaoDados.ler(company_id, 'opcoes')
+
+
+def invalidar(company_id):
+    """Avança a versão: a próxima leitura (em qualquer processo) remonta as opções"""
+    VersaoDados.avancar([company_id], 'opcoes')
+
+
+def montar(company_id):
+    """Lê os cadastros da company (uma consulta por model, sem JOIN)"""
+    return {
+        chave: [
+            {**linha, 'id': str(linha['id'])}
+            for linha in model.objects.filter(company_id=company_id).order_by('nome').values(*campos)
+        ]
+        for model, (chave, campos) in CADASTROS.items()
+    }
+
+
+def obter(company_id):
+    """Retorna (versao, opcoes) da company, do cache quando possível"""
+    versao_atual = versao(company_id)
+    chave = f'financeiro:opcoes:{company_id}:{versao_atual}'
+    opcoes = cache.get(chave)
+    if opcoes is None:
+        opcoes = montar(company_id)
+        cache.set(chave, opcoes, TEMPO_CACHE)
+    return versao_atual, opcoes
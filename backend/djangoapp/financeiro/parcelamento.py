@@ -0,0 +1,72 @@
+"""
+Geração de contas parceladas.
+
+Um valor total é dividido em N parcelas (centavos de sobra vão para as
+primeiras parcelas, então a soma bate exatamente com o total). Todas as
+parcelas compartilham o mesmo grupo_parcelamento e são gravadas com um
+único bulk_create.
+"""
+import uuid
+from decimal import Decimal, ROUND_DOWN
+
+from django.db import transaction
+
+from .models import ContasPagar, NotaFiscalContaPagar
+from .recorrencia import adicionar_periodo
+from .resumo import estado_resumo, recalcular_buckets
+
+
+CENTAVO = Decimal('0.01')
+
+# Limite de parcelas por compra
+MAX_PARCELAS = 360
+
+# Campos de valor divididos entre as parcelas
+CAMPOS_VALOR = ['valor_original', 'desconto', 'juros', 'multa']
+
+
+def dividir_valor(total, partes):
+    """
+    Divide `total` em `partes` valores com 2 casas cuja soma é exatamente `total`.
+    Ex.: dividir_valor(Decimal('100'), 3) -> [33.34, 33.33, 33.33]
+    """
+    total = Decimal(total or 0).quantize(CENTAVO)
+    base = (total / partes).quantize(CENTAVO, rounding=ROUND_DOWN)
+    sobra = int((total - base * partes) / CENTAVO)
+    return [base + CENTAVO if i < sobra else base for i in range(partes)]
+
+
+def montar_parcelas(dados, total_parcelas, frequencia='mensal'):
+    """
+    Instancia (sem gravar) as parcelas de uma conta.
+    `dados` são os campos da conta com os valores TOTAIS; data_vencimento é a da 1ª parcela.
+    """
+    dados = dados.copy()
+    valores = {campo: dividir_valor(dados.pop(campo, 0), total_parcelas) for campo in CAMPOS_VALOR}
+    primeiro_vencimento = dados.pop('data_vencimento')
+    grupo = uuid.uuid4()
+
+    parcelas = []
+    for i in range(total_parcelas):
+        conta = ContasPagar(
+            **dados,
+            **{campo: valores[campo][i] for campo in CAMPOS_VALOR},
+            data_vencimento=adicionar_periodo(primeiro_vencimento, frequencia, i),
+            e_parcelada=True,
+            parcela_atual=i + 1,
+            total_parcelas=total_parcelas,
+            grupo_parcelamento=grupo,
+        )
+        conta.normalizar()
+        parcelas.append(conta)
+    return parcelas
+
+
+def criar_parcelas(dados, total_parcelas, frequencia='mensal'):
+    """Grava todas as parcelas (e o resumo) numa única transação. Retorna a lista de parcelas."""
+    parcelas = montar_parcelas(dados, total_parcelas, frequencia)
+    with transaction.atomic():
+        ContasPagar.objects.bulk_create(parcelas)
+        NotaFiscalContaPagar.sincronizar(parcelas, novas=True)
+        recalcular_buckets({estado_resumo(parcela)[0] for parcela in parcelas})
+    return parcelas
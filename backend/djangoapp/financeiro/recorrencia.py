@@ -0,0 +1,148 @@
+"""
+Materialização das contas recorrentes (modelo RegraRecorrencia).
+
+A regra guarda o modelo da conta e a frequência; as ocorrências só viram
+linhas em ContasPagar dentro de um horizonte móvel (hoje + N dias).
+O horizonte avança pelo comando `manage.py materializar_recorrencias`
+e, sob demanda, quando a listagem/relatórios pedem vencimentos futuros.
+"""
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ContasPagar, NotaFiscalContaPagar, RegraRecorrencia
+from .resumo import estado_resumo, recalcular_buckets
+
+
+# Limite para materialização sob demanda (evita gerar décadas de ocorrências por um filtro)
+HORIZONTE_MAXIMO_DIAS = 5 * 365
+
+
+def horizonte_padrao():
+    """Data até a qual as ocorrências devem estar sempre materializadas"""
+    return date.today() + timedelta(days=settings.FINANCEIRO_HORIZONTE_RECORRENCIA_DIAS)
+
+
+def horizonte_maximo():
+    return date.today() + timedelta(days=HORIZONTE_MAXIMO_DIAS)
+
+
+def adicionar_periodo(data_inicial, frequencia, n):
+    """Vencimento da n-ésima ocorrência (n=0 é a própria data inicial)"""
+    if not data_inicial or n == 0:
+        return data_inicial
+
+    if frequencia == 'semanal':
+        return data_inicial + timedelta(weeks=n)
+    elif frequencia == 'quinzenal':
+        return data_inicial + timedelta(days=15 * n)
+    elif frequencia == 'mensal':
+        return data_inicial + relativedelta(months=n)
+    elif frequencia == 'bimestral':
+        return data_inicial + relativedelta(months=2 * n)
+    elif frequencia == 'trimestral':
+        return data_inicial + relativedelta(months=3 * n)
+    elif frequencia == 'semestral':
+        return data_inicial + relativedelta(months=6 * n)
+    elif frequencia == 'anual':
+        return data_inicial + relativedelta(years=n)
+
+    # Caso a frequência não seja reconhecida, retorna a data original
+    return data_inicial
+
+
+def _nova_ocorrencia(regra):
+    """Instancia (sem gravar) a próxima ocorrência da regra"""
+    numero = regra.ocorrencias_geradas + 1
+    if regra.quantidade_total:
+        descricao = f"{regra.descricao} ({numero}/{regra.quantidade_total})"
+    else:
+        descricao = f"{regra.descricao} ({numero})"
+
+    conta = ContasPagar(
+        company_id=regra.company_id,
+        filial_id=regra.filial_id,
+        fornecedor_id=regra.fornecedor_id,
+        categoria_id=regra.categoria_id,
+        forma_pagamento_id=regra.forma_pagamento_id,
+        descricao=descricao,
+        valor_original=regra.valor_original,
+        desconto=regra.desconto,
+        juros=regra.juros,
+        multa=regra.multa,
+        data_vencimento=regra.proximo_vencimento,
+        notas_fiscais=regra.notas_fiscais,
+        numero_boleto=regra.numero_boleto,
+        observacoes=regra.observacoes,
+        e_recorrente=True,
+        frequencia_recorrencia=regra.frequencia,
+        grupo_parcelamento=regra.id,
+        regra_recorrencia=regra,
+        created_by_id=regra.created_by_id,
+        updated_by_id=regra.created_by_id,
+    )
+    conta.normalizar()
+    return conta
+
+
+def _avancar(regra):
+    """Passa a regra para a ocorrência seguinte (ou a encerra)"""
+    anterior = regra.proximo_vencimento
+    regra.ocorrencias_geradas += 1
+
+    if regra.quantidade_total and regra.ocorrencias_geradas >= regra.quantidade_total:
+        regra.proximo_vencimento = None
+        return
+
+    regra.proximo_vencimento = adicionar_periodo(regra.data_inicio, regra.frequencia, regra.ocorrencias_geradas)
+    if regra.proximo_vencimento <= anterior:
+        raise ValueError(f'Frequência inválida na regra {regra.pk}: {regra.frequencia}')
+
+
+def materializar(regras, ate):
+    """
+    Gera, numa única transação, as ocorrências com vencimento até `ate`
+    de todas as regras do queryset. Retorna a lista de contas criadas.
+    """
+    with transaction.atomic():
+        # Trava as regras: duas materializações concorrentes não geram a mesma ocorrência
+        regras = list(
+            regras.select_for_update(of=('self',))
+            .filter(ativa=True, proximo_vencimento__lte=ate)
+            .order_by('id')
+        )
+
+        contas = []
+        for regra in regras:
+            while regra.proximo_vencimento and regra.proximo_vencimento <= ate:
+                contas.append(_nova_ocorrencia(regra))
+                _avancar(regra)
+
+        if contas:
+            ContasPagar.objects.bulk_create(contas)
+            NotaFiscalContaPagar.sincronizar(contas, novas=True)
+            recalcular_buckets({estado_resumo(conta)[0] for conta in contas})
+
+            agora = timezone.now()
+            for regra in regras:
+                regra.updated_at = agora
+            RegraRecorrencia.objects.bulk_update(
+                regras, ['ocorrencias_geradas', 'proximo_vencimento', 'updated_at']
+            )
+
+    return contas
+
+
+def materializar_company(company_id, ate=None):
+    """
+    Garante as ocorrências da company materializadas até `ate` (padrão: horizonte).
+    Barato quando não há nada a gerar: uma consulta pelo índice (company, ativa, proximo_vencimento).
+    """
+    ate = min(ate or horizonte_padrao(), horizonte_maximo())
+    regras = RegraRecorrencia.objects.filter(company_id=company_id)
+    if not regras.filter(ativa=True, proximo_vencimento__lte=ate).exists():
+        return []
+    return materializar(regras, ate)
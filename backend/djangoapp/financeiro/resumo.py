@@ -0,0 +1,252 @@
+"""
+Manutenção incremental do resumo de contas a pagar (ResumoContasPagar).
+
+Cada conta contribui com (1, valor_final, valor_pago, valor_restante) para o
+bucket (company, filial, status, data_vencimento). valor_restante é o restante
+limitado a zero por conta, como ContasPagar.valor_restante (valor_final - valor_pago
+do bucket não serve: um pagamento acima do final abateria o restante de outras contas). Toda escrita em ContasPagar
+aplica aqui o delta entre o estado anterior e o novo, na mesma transação.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import ContasPagar, ResumoContasPagar
+
+
+# Campos de ContasPagar que influenciam o resumo
+CAMPOS_RESUMO = {
+    'company_id', 'filial_id', 'status', 'data_vencimento',
+    'valor_original', 'desconto', 'juros', 'multa', 'valor_pago',
+}
+
+ZERO = Decimal('0')
+
+VALOR_FINAL = models.ExpressionWrapper(
+    F('valor_original') - F('desconto') + F('juros') + F('multa'),
+    output_field=models.DecimalField(max_digits=15, decimal_places=2)
+)
+
+
+def estado_resumo(conta):
+    """Retorna (chave, valor_final, valor_pago, valor_restante) da conta para o resumo"""
+    chave = (conta.company_id, conta.filial_id, conta.status, conta.data_vencimento)
+    valor_final = (
+        (conta.valor_original or ZERO) - (conta.desconto or ZERO)
+        + (conta.juros or ZERO) + (conta.multa or ZERO)
+    )
+    valor_pago = conta.valor_pago or ZERO
+    return chave, valor_final, valor_pago, max(valor_final - valor_pago, ZERO)
+
+
+def estado_resumo_no_banco(pk, travar=False):
+    """
+    Lê o estado atual de uma conta direto do banco (ou None se não existir).
+    Com `travar`, a linha fica travada (SELECT ... FOR UPDATE) até o fim da transação.
+    """
+    queryset = ContasPagar.objects.filter(pk=pk)
+    if travar:
+        queryset = queryset.select_for_update()
+    conta = queryset.only(
+        'company_id', 'filial_id', 'status', 'data_vencimento',
+        'valor_original', 'desconto', 'juros', 'multa', 'valor_pago'
+    ).first()
+    return estado_resumo(conta) if conta else None
+
+
+def chaves_resumo(queryset):
+    """Buckets (company, filial, status, data_vencimento) tocados pelas contas do queryset"""
+    return set(
+        queryset.order_by().values_list('company_id', 'filial_id', 'status', 'data_vencimento').distinct()
+    )
+
+
+def aplicar_delta(chave, quantidade, valor_final, valor_pago, valor_restante):
+    """Soma o delta ao bucket, criando-o se ainda não existir"""
+    if not quantidade and not valor_final and not valor_pago and not valor_restante:
+        return
+
+    company_id, filial_id, status, data_vencimento = chave
+    filtro = {
+        'company_id': company_id,
+        'filial_id': filial_id,
+        'status': status,
+        'data_vencimento': data_vencimento,
+    }
+    incremento = {
+        'quantidade': F('quantidade') + quantidade,
+        'valor_final': F('valor_final') + valor_final,
+        'valor_pago': F('valor_pago') + valor_pago,
+        'valor_restante': F('valor_restante') + valor_restante,
+    }
+
+    with transaction.atomic():
+        atualizados = ResumoContasPagar.objects.filter(**filtro).update(**incremento)
+        if not atualizados:
+            try:
+                with transaction.atomic():
+                    ResumoContasPagar.objects.create(
+                        quantidade=quantidade,
+                        valor_final=valor_final,
+                        valor_pago=valor_pago,
+                        valor_restante=valor_restante,
+                        **filtro
+                    )
+            except IntegrityError:
+                # Outro processo criou o bucket ao mesmo tempo
+                ResumoContasPagar.objects.filter(**filtro).update(**incremento)
+
+        if quantidade < 0:
+            ResumoContasPagar.objects.filter(quantidade__lte=0, **filtro).delete()
+
+
+def registrar_alteracao(anterior, atual):
+    """
+    Aplica ao resumo a mudança de uma conta.
+    `anterior`/`atual` são tuplas de estado_resumo() ou None (criação/remoção).
+    """
+    if anterior and atual and anterior[0] == atual[0]:
+        aplicar_delta(atual[0], 0, *(novo - antigo for novo, antigo in zip(atual[1:], anterior[1:])))
+        return
+
+    if anterior:
+        aplicar_delta(anterior[0], -1, *(-valor for valor in anterior[1:]))
+    if atual:
+        aplicar_delta(atual[0], 1, *atual[1:])
+
+
+def registrar_alteracoes_em_lote(alteracoes):
+    """
+    Aplica ao resumo várias alterações de uma vez (bulk_create/bulk_update).
+    `alteracoes` é um iterável de pares (anterior, atual) como em registrar_alteracao();
+    os deltas são somados por bucket antes de gravar.
+    """
+    deltas = defaultdict(lambda: [0, ZERO, ZERO, ZERO])
+    for anterior, atual in alteracoes:
+        for estado, sinal in ((anterior, -1), (atual, 1)):
+            if estado:
+                chave, *valores = estado
+                delta = deltas[chave]
+                delta[0] += sinal
+                for indice, valor in enumerate(valores, start=1):
+                    delta[indice] += sinal * valor
+
+    with transaction.atomic():
+        for chave, delta in deltas.items():
+            aplicar_delta(chave, *delta)
+
+
+def registrar_criacao_em_lote(contas):
+    """Aplica ao resumo um lote de contas recém-criadas (bulk_create)"""
+    registrar_alteracoes_em_lote((None, estado_resumo(conta)) for conta in contas)
+
+
+def calcular_buckets(queryset):
+    """Agrupa as contas do queryset nos buckets do resumo"""
+    linhas = queryset.order_by().values(
+        'company_id', 'filial_id', 'status', 'data_vencimento'
+    ).annotate(
+        total=Count('id'),
+        soma_final=Coalesce(Sum(VALOR_FINAL), models.Value(ZERO, output_field=VALOR_FINAL.output_field)),
+        soma_pago=Coalesce(Sum('valor_pago'), models.Value(ZERO, output_field=VALOR_FINAL.output_field)),
+        soma_restante=Coalesce(
+            Sum(Greatest(VALOR_FINAL - F('valor_pago'), models.Value(ZERO, output_field=VALOR_FINAL.output_field))),
+            models.Value(ZERO, output_field=VALOR_FINAL.output_field)
+        ),
+    )
+    return {
+        (linha['company_id'], linha['filial_id'], linha['status'], linha['data_vencimento']):
+            (linha['total'], linha['soma_final'], linha['soma_pago'], linha['soma_restante'])
+        for linha in linhas
+    }
+
+
+def buckets_atuais(company_id):
+    """Lê os buckets gravados para a company"""
+    return {
+        (r.company_id, r.filial_id, r.status, r.data_vencimento):
+            (r.quantidade, r.valor_final, r.valor_pago, r.valor_restante)
+        for r in ResumoContasPagar.objects.filter(company_id=company_id)
+    }
+
+
+def divergencias(company_id):
+    """
+    Compara o resumo gravado com o recalculado a partir das contas.
+    Retorna lista de (chave, esperado, gravado) para os buckets divergentes.
+    """
+    esperado = calcular_buckets(ContasPagar.objects.filter(company_id=company_id))
+    gravado = buckets_atuais(company_id)
+    vazio = (0, ZERO, ZERO, ZERO)
+
+    return [
+        (chave, esperado.get(chave, vazio), gravado.get(chave, vazio))
+        for chave in sorted(set(esperado) | set(gravado), key=str)
+        if esperado.get(chave, vazio) != gravado.get(chave, vazio)
+    ]
+
+
+@transaction.atomic
+def reconstruir(company_id):
+    """Recria do zero todos os buckets da company. Retorna a quantidade de buckets."""
+    # Trava as linhas atuais para não competir com escritas concorrentes
+    list(ResumoContasPagar.objects.select_for_update().filter(company_id=company_id).values_list('id', flat=True))
+    ResumoContasPagar.objects.filter(company_id=company_id).delete()
+
+    buckets = calcular_buckets(ContasPagar.objects.filter(company_id=company_id))
+    ResumoContasPagar.objects.bulk_create(
+        [
+            ResumoContasPagar(
+                company_id=company, filial_id=filial, status=status, data_vencimento=data_vencimento,
+                quantidade=quantidade, valor_final=valor_final, valor_pago=valor_pago, valor_restante=valor_restante
+            )
+            for (company, filial, status, data_vencimento), (quantidade, valor_final, valor_pago, valor_restante)
+            in buckets.items()
+        ],
+        batch_size=1000
+    )
+    return len(buckets)
+
+
+def recalcular_buckets(chaves):
+    """
+    Recalcula apenas os buckets informados a partir das contas.
+    Usado por operações em massa (UPDATE/DELETE por queryset) que
+    não passam por ContasPagar.save().
+    """
+    por_company = defaultdict(set)
+    for chave in chaves:
+        por_company[chave[0]].add(chave)
+
+    with transaction.atomic():
+        for company_id, chaves_company in por_company.items():
+            # Filtro "envelope" que cobre todas as chaves; o recorte exato é feito em Python
+            envelope = {
+                'company_id': company_id,
+                'filial_id__in': {chave[1] for chave in chaves_company},
+                'status__in': {chave[2] for chave in chaves_company},
+                'data_vencimento__in': {chave[3] for chave in chaves_company},
+            }
+            # Trava os buckets antes de somar as contas: um save() concorrente que já aplicou
+            # seu delta termina antes (e entra na soma); um que ainda não aplicou espera e
+            # soma o delta sobre o bucket recalculado
+            ids_antigos = [
+                r.id for r in ResumoContasPagar.objects.select_for_update().filter(**envelope)
+                if (r.company_id, r.filial_id, r.status, r.data_vencimento) in chaves_company
+            ]
+            buckets = calcular_buckets(ContasPagar.objects.filter(**envelope))
+
+            ResumoContasPagar.objects.filter(id__in=ids_antigos).delete()
+            ResumoContasPagar.objects.bulk_create([
+                ResumoContasPagar(
+                    company_id=company_id, filial_id=filial_id, status=status, data_vencimento=data_vencimento,
+                    quantidade=quantidade, valor_final=valor_final, valor_pago=valor_pago,
+                    valor_restante=valor_restante
+                )
+                for (_, filial_id, status, data_vencimento), (quantidade, valor_final, valor_pago, valor_restante)
+                in buckets.items()
+                if (company_id, filial_id, status, data_vencimento) in chaves_company
+            ])
@@ -1,5 +1,7 @@
+from decimal import Decimal
+
 from rest_framework import serializers
-from .models import Filial, CategoriaFinanceira, Fornecedor, FormaPagamento, ContasPagar
+from .models import Filial, CategoriaFinanceira, Fornecedor, FormaPagamento, ContasPagar, RegraRecorrencia, Tarefa
 from core.middleware import get_current_company
 
 
@@ -105,6 +107,13 @@ class ContasPagarSerializer(serializers.ModelSerializer):
     company = serializers.StringRelatedField(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     quantidade_recorrencias = serializers.IntegerField(write_only=True, required=False, default=1)
+    frequencia_parcelas = serializers.ChoiceField(
+        choices=ContasPagar.FREQUENCIA_CHOICES,
+        write_only=True,
+        required=False,
+        default='mensal',
+        help_text='Intervalo entre os vencimentos das parcelas (ação parcelar)'
+    )
     frequencia_recorrencia_display = serializers.CharField(
         source='get_frequencia_recorrencia_display', 
         read_only=True
@@ -145,7 +154,7 @@ class ContasPagarSerializer(serializers.ModelSerializer):
             'data_vencimento', 'data_pagamento',
             'forma_pagamento', 'forma_pagamento_detalhes',
             'status', 'status_display', 'esta_vencida',
-            'e_parcelada', 'parcela_atual', 'total_parcelas', 'grupo_parcelamento',
+            'e_parcelada', 'parcela_atual', 'total_parcelas', 'grupo_parcelamento', 'frequencia_parcelas',
             'e_recorrente', 'frequencia_recorrencia', 'quantidade_recorrencias', 'frequencia_recorrencia_display',
             'notas_fiscais', 'numero_boleto', 'observacoes', 'anexo',
             'company', 'created_at', 'updated_at', 'created_by', 'updated_by'
@@ -161,6 +170,7 @@ class ContasPagarSerializer(serializers.ModelSerializer):
 
         # Remove campos que não pertencem ao model (usados apenas para lógica de criação)
         validated_data.pop('quantidade_recorrencias', None)
+        validated_data.pop('frequencia_parcelas', None)
 
         if company:
             validated_data['company'] = company
@@ -204,4 +214,208 @@ class ContasPagarListSerializer(serializers.ModelSerializer):
             'status', 'status_display',
             'esta_vencida', 'e_parcelada', 'parcela_atual', 'total_parcelas',
             'e_recorrente', 'frequencia_recorrencia'
-        ]
\ No newline at end of file
+        ]
+
+class TarefaSerializer(serializers.ModelSerializer):
+    tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    tem_resultado = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Tarefa
+        fields = [
+            'id', 'tipo', 'tipo_display', 'status', 'status_display', 'etapa',
+            'parametros', 'arquivo_entrada', 'tem_resultado',
+            'linhas_processadas', 'linhas_sucesso', 'total_erros', 'erros', 'mensagem',
+            'iniciada_em', 'finalizada_em', 'created_at', 'updated_at', 'created_by'
+        ]
+        read_only_fields = [
+            'id', 'status', 'etapa', 'linhas_processadas', 'linhas_sucesso',
+            'total_erros', 'erros', 'mensagem', 'iniciada_em', 'finalizada_em',
+            'created_at', 'updated_at', 'created_by'
+        ]
+        extra_kwargs = {'arquivo_entrada': {'write_only': True}}
+
+    def get_tem_resultado(self, obj):
+        return bool(obj.arquivo_resultado)
+
+    def validate(self, attrs):
+        if attrs.get('tipo') == 'importacao_contas' and not attrs.get('arquivo_entrada'):
+            raise serializers.ValidationError({'arquivo_entrada': 'Envie o arquivo CSV a importar.'})
+        return attrs
+
+    def create(self, validated_data):
+        company = get_current_company()
+        user = self.context['request'].user
+
+        if company:
+            validated_data['company'] = company
+        if user:
+            validated_data['created_by'] = user
+            validated_data['updated_by'] = user
+
+        return super().create(validated_data)
+
+
+class RegraRecorrenciaSerializer(serializers.ModelSerializer):
+    company = serializers.StringRelatedField(read_only=True)
+    frequencia_display = serializers.CharField(source='get_frequencia_display', read_only=True)
+    filial_nome = serializers.CharField(source='filial.nome', read_only=True)
+    fornecedor_nome = serializers.CharField(source='fornecedor.nome', read_only=True)
+    categoria_nome = serializers.CharField(source='categoria.nome', read_only=True)
+
+    class Meta:
+        model = RegraRecorrencia
+        fields = [
+            'id', 'descricao',
+            'filial', 'filial_nome', 'fornecedor', 'fornecedor_nome',
+            'categoria', 'categoria_nome', 'forma_pagamento',
+            'valor_original', 'desconto', 'juros', 'multa',
+            'notas_fiscais', 'numero_boleto', 'observacoes',
+            'frequencia', 'frequencia_display', 'data_inicio', 'quantidade_total',
+            'ocorrencias_geradas', 'proximo_vencimento', 'ativa',
+            'company', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'company', 'ocorrencias_geradas', 'proximo_vencimento', 'created_at', 'updated_at'
+        ]
+
+    def validate(self, attrs):
+        # A série já materializada não é recalculada: início e frequência ficam fixos
+        if self.instance and self.instance.ocorrencias_geradas:
+            for campo in ['data_inicio', 'frequencia']:
+                if campo in attrs and attrs[campo] != getattr(self.instance, campo):
+                    raise serializers.ValidationError(
+                        {campo: 'Não pode ser alterado depois que a regra já gerou ocorrências.'}
+                    )
+        return attrs
+
+    def create(self, validated_data):
+        company = get_current_company()
+        user = self.context['request'].user
+
+        if company:
+            validated_data['company'] = company
+        if user:
+            validated_data['created_by'] = user
+            validated_data['updated_by'] = user
+
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        user = self.context['request'].user
+        if user:
+            validated_data['updated_by'] = user
+
+        return super().update(instance, validated_data)
+
+
+class PagamentoContaPagarSerializer(serializers.Serializer):
+    """Entrada de um pagamento (ação pagar e cada item do pagar-lote)"""
+
+    valor_pago = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal('0'), required=False,
+        help_text='Padrão: valor final da conta'
+    )
+    data_pagamento = serializers.DateField(required=False, allow_null=True)
+
+
+class OperacaoLoteContasPagarSerializer(serializers.Serializer):
+    """Entrada das operações em massa (atualizar/cancelar/excluir) de contas a pagar"""
+
+    OPERACAO_CHOICES = [
+        ('atualizar', 'Atualizar'),
+        ('cancelar', 'Cancelar'),
+        ('excluir', 'Excluir'),
+    ]
+
+    operacao = serializers.ChoiceField(choices=OPERACAO_CHOICES)
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    filtros = serializers.DictField(required=False, allow_empty=False)
+
+    # Campos alteráveis em massa (apenas operacao=atualizar)
+    filial = serializers.PrimaryKeyRelatedField(queryset=Filial.objects.all(), required=False)
+    fornecedor = serializers.PrimaryKeyRelatedField(queryset=Fornecedor.objects.all(), required=False)
+    # Mesmo limit_choices_to de ContasPagar.categoria
+    categoria = serializers.PrimaryKeyRelatedField(
+        queryset=CategoriaFinanceira.objects.filter(tipo='despesa'), required=False
+    )
+    forma_pagamento = serializers.PrimaryKeyRelatedField(
+        queryset=FormaPagamento.objects.all(), required=False, allow_null=True
+    )
+    data_vencimento = serializers.DateField(required=False)
+
+    CAMPOS_ATUALIZAVEIS = ['filial', 'fornecedor', 'categoria', 'forma_pagamento', 'data_vencimento']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Só aceita cadastros da company do usuário
+        company = self.context['request'].user.company
+        for campo in ['filial', 'fornecedor', 'categoria', 'forma_pagamento']:
+            self.fields[campo].queryset = self.fields[campo].queryset.filter(company=company)
+
+    def validate(self, attrs):
+        if bool(attrs.get('ids')) == bool(attrs.get('filtros')):
+            raise serializers.ValidationError('Informe "ids" ou "filtros" (apenas um dos dois).')
+
+        valores = {campo: attrs[campo] for campo in self.CAMPOS_ATUALIZAVEIS if campo in attrs}
+        if attrs['operacao'] == 'atualizar' and not valores:
+            raise serializers.ValidationError(
+                f'Informe ao menos um campo para atualizar: {", ".join(self.CAMPOS_ATUALIZAVEIS)}.'
+            )
+        attrs['valores'] = valores
+        return attrs
+
+
+class ReagendamentoGrupoSerializer(serializers.Serializer):
+    """Entrada do reagendamento de um grupo (parcelas/recorrência)"""
+
+    dias = serializers.IntegerField(help_text='Dias a somar (ou subtrair, se negativo) aos vencimentos')
+
+    def validate_dias(self, value):
+        if not value:
+            raise serializers.ValidationError('Informe um número de dias diferente de zero.')
+        return value
+
+
+class AlteracaoGrupoSerializer(serializers.Serializer):
+    """Entrada da alteração de fornecedor/categoria/forma de pagamento de um grupo"""
+
+    fornecedor = serializers.PrimaryKeyRelatedField(queryset=Fornecedor.objects.all(), required=False)
+    # Mesmo limit_choices_to de ContasPagar.categoria
+    categoria = serializers.PrimaryKeyRelatedField(
+        queryset=CategoriaFinanceira.objects.filter(tipo='despesa'), required=False
+    )
+    forma_pagamento = serializers.PrimaryKeyRelatedField(
+        queryset=FormaPagamento.objects.all(), required=False, allow_null=True
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Só aceita cadastros da company do usuário
+        company = self.context['request'].user.company
+        for campo in ['fornecedor', 'categoria', 'forma_pagamento']:
+            self.fields[campo].queryset = self.fields[campo].queryset.filter(company=company)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('Informe fornecedor, categoria e/ou forma_pagamento.')
+        return attrs
+
+
+class CandidataDuplicataSerializer(serializers.Serializer):
+    """Dados mínimos de uma conta para a verificação de duplicatas"""
+
+    fornecedor = serializers.UUIDField()
+    numero_boleto = serializers.CharField(required=False, allow_blank=True, default='')
+    valor_original = serializers.DecimalField(max_digits=12, decimal_places=2)
+    data_vencimento = serializers.DateField()
+
+
+class VerificacaoDuplicatasSerializer(serializers.Serializer):
+    """Entrada da verificação de duplicatas (lote de contas candidatas)"""
+
+    # Limite por requisição (a consulta usa um único IN com as assinaturas)
+    MAX_CONTAS = 5000
+
+    contas = serializers.ListField(child=CandidataDuplicataSerializer(), allow_empty=False, max_length=MAX_CONTAS)
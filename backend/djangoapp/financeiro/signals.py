@@ -0,0 +1,20 @@
+"""
+Invalidação, quando os cadastros mudam, do cache das opções (financeiro/opcoes.py)
+e da versão dos dados da listagem de contas (financeiro/versao.py), que exibe os nomes
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import opcoes, versao
+
+
+def cadastro_alterado(sender, instance, **kwargs):
+    # Depois do commit: antes dele, uma leitura concorrente remontaria o cache com os dados antigos
+    company_id = instance.company_id
+    transaction.on_commit(lambda: opcoes.invalidar(company_id))
+    versao.incrementar([company_id])
+
+
+for model in opcoes.CADASTROS:
+    post_save.connect(cadastro_alterado, sender=model, dispatch_uid=f'opcoes_save_{model.__name__}')
+    post_delete.connect(cadastro_alterado, sender=model, dispatch_uid=f'opcoes_delete_{model.__name__}')
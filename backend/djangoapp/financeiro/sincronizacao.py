@@ -0,0 +1,124 @@
+"""
+Sincronização incremental de contas a pagar (/contas-pagar/changes/).
+
+O cliente guarda uma cópia local e pede só o que mudou desde a última versão:
+contas criadas/alteradas e ids das excluídas (ExclusaoContaPagar). Cada
+gravação é marcada por trigger (migração 0018) com o txid da transação que a
+fez, e a versão guarda um horizonte de transações em vez de um horário: o
+txid_snapshot_xmin do Postgres lido antes das contas. Toda transação abaixo
+dele já terminou, então o que ela gravou foi lido; as que estavam abertas,
+por mais longas que sejam (uma importação grande), ficam no horizonte ou
+acima dele e entram na sincronização seguinte. Contas gravadas entre o
+horizonte e a leitura podem chegar de novo (o cliente aplica as alterações
+por id, então repetir é inócuo).
+
+Uma sincronização em várias páginas percorre (transacao, id) e só ao terminar
+devolve o horizonte lido na primeira página.
+"""
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import ExclusaoContaPagar
+
+
+# Exclusões mais antigas são removidas; versões anteriores a isso exigem sincronização completa
+RETENCAO_EXCLUSOES = timedelta(days=90)
+
+# Uma transação aberta no horizonte pode ter gravado exclusões (created_at) antes dele
+FOLGA_EXPIRACAO = timedelta(days=1)
+
+LIMITE_PADRAO = 500
+LIMITE_MAXIMO = 5000
+
+# desde: txid a partir do qual ler (None = cópia completa); momento: quando o horizonte foi lido.
+# No meio de uma sincronização: horizonte da primeira página e (transacao, conta_id) da última conta entregue.
+Posicao = namedtuple('Posicao', ['desde', 'momento', 'horizonte', 'transacao', 'conta_id'], defaults=[None] * 3)
+
+
+def disponivel(using='default'):
+    """Os txids (txid_current/txid_current_snapshot) só existem no Postgres"""
+    return connections[using].vendor == 'postgresql'
+
+
+def codificar_versao(posicao):
+    conteudo = [
+        posicao.desde, int(posicao.momento.timestamp() * 1_000_000),
+        posicao.horizonte, posicao.transacao, str(posicao.conta_id) if posicao.conta_id else None,
+    ]
+    return base64.urlsafe_b64encode(json.dumps(conteudo, separators=(',', ':')).encode()).decode()
+
+
+def decodificar_versao(versao):
+    """Retorna a Posicao da versão"""
+    try:
+        desde, microssegundos, horizonte, transacao, conta_id = json.loads(base64.urlsafe_b64decode(versao.encode()))
+        momento = datetime.fromtimestamp(int(microssegundos) / 1_000_000, tz=dt_timezone.utc)
+        inteiros = [int(valor) if valor is not None else None for valor in (desde, horizonte, transacao)]
+    except (TypeError, ValueError):
+        raise ValidationError({'since': 'Versão inválida.'})
+    return Posicao(inteiros[0], momento, inteiros[1], inteiros[2], conta_id)
+
+
+def versao_expirada(posicao):
+    """As exclusões a partir da posição já podem ter sido removidas"""
+    return posicao.momento < timezone.now() - RETENCAO_EXCLUSOES + FOLGA_EXPIRACAO
+
+
+def _horizonte(using):
+    """Menor txid ainda em andamento: todas as transações anteriores já terminaram"""
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+        return cursor.fetchone()[0]
+
+
+def alteracoes(queryset, company_id, posicao, limite):
+    """
+    Lê as alterações da company a partir de `posicao` (decodificada da versão; None = cópia completa).
+    Retorna (contas alteradas, ids excluídos, próxima versão, tem_mais).
+    """
+    excluidas = []
+    if posicao is None or posicao.conta_id is None:
+        # Início de uma sincronização: o horizonte é lido antes das contas e das exclusões
+        horizonte, momento = _horizonte(queryset.db), timezone.now()
+        if posicao:
+            excluidas = list(
+                ExclusaoContaPagar.objects.filter(company_id=company_id, transacao__gte=posicao.desde)
+                .order_by('transacao').values_list('conta_id', flat=True)
+            )
+    else:
+        horizonte, momento = posicao.horizonte, posicao.momento
+
+    desde = posicao.desde if posicao else None
+    queryset = queryset.order_by('transacao', 'id')
+    if desde is not None:
+        queryset = queryset.filter(transacao__gte=desde)
+    if posicao and posicao.conta_id:
+        # Continuação de uma página: depois da posição (transacao, id) da última conta entregue
+        queryset = queryset.filter(
+            Q(transacao__gt=posicao.transacao) | Q(transacao=posicao.transacao, id__gt=posicao.conta_id)
+        )
+
+    contas = list(queryset[:limite + 1])
+    tem_mais = len(contas) > limite
+    contas = contas[:limite]
+
+    if tem_mais:
+        proxima = Posicao(desde, momento, horizonte, contas[-1].transacao, contas[-1].id)
+    else:
+        proxima = Posicao(horizonte, momento)
+    return contas, excluidas, codificar_versao(proxima), tem_mais
+
+
+def limpar_exclusoes():
+    """Remove as exclusões fora da retenção. Retorna a quantidade removida."""
+    removidas, _ = ExclusaoContaPagar.objects.filter(
+        created_at__lt=timezone.now() - RETENCAO_EXCLUSOES
+    ).delete()
+    return removidas
@@ -0,0 +1,263 @@
+"""
+Execução das tarefas em segundo plano (modelo Tarefa).
+
+A fila é a própria tabela financeiro_tarefa: o worker
+(manage.py processar_tarefas) reserva a próxima tarefa pendente com
+SELECT ... FOR UPDATE SKIP LOCKED, então vários workers podem rodar em
+paralelo sem broker externo. Enquanto executa, o worker renova
+ultimo_sinal_em; a tarefa de um worker que morreu fica sem sinal e volta
+para a fila (até MAX_TENTATIVAS).
+"""
+import codecs
+import csv
+import logging
+import tempfile
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.core.files import File
+from django.db import connection, transaction
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from rest_framework.request import Request
+
+from . import exportacao
+from .importacao import ImportadorContasPagar
+from .models import ContasPagar, RegraRecorrencia, Tarefa
+from .recorrencia import horizonte_padrao, materializar
+from .sincronizacao import limpar_exclusoes
+
+
+logger = logging.getLogger(__name__)
+
+# Frequência (em linhas) com que a exportação grava o progresso
+INTERVALO_PROGRESSO = 1000
+
+# O worker renova o sinal da tarefa em execução a cada INTERVALO_SINAL; uma tarefa
+# 'executando' sem sinal há TEMPO_SEM_SINAL é de um worker que morreu
+INTERVALO_SINAL = timedelta(seconds=30)
+TEMPO_SEM_SINAL = timedelta(minutes=5)
+
+# Execuções interrompidas aceitas antes de desistir (ex.: tarefa que derruba o worker por memória)
+MAX_TENTATIVAS = 3
+
+
+def recuperar_abandonadas():
+    """
+    Devolve à fila as tarefas 'executando' sem sinal do worker. Seguro reexecutar:
+    a importação grava tudo numa transação (desfeita com o worker) e a exportação
+    gera o arquivo de novo. Retorna a quantidade de tarefas devolvidas.
+    """
+    with transaction.atomic():
+        abandonadas = list(
+            Tarefa.objects.select_for_update(skip_locked=True)
+            .filter(status='executando', ultimo_sinal_em__lt=timezone.now() - TEMPO_SEM_SINAL)
+        )
+        for tarefa in abandonadas:
+            if tarefa.tentativas >= MAX_TENTATIVAS:
+                tarefa.status = 'falhou'
+                tarefa.finalizada_em = timezone.now()
+                tarefa.mensagem = f'O worker parou de responder em {tarefa.tentativas} tentativa(s) de execução.'
+            else:
+                tarefa.status = 'pendente'
+                tarefa.etapa = 'Aguardando nova tentativa'
+            tarefa.save(update_fields=['status', 'etapa', 'finalizada_em', 'mensagem', 'updated_at'])
+
+    devolvidas = sum(tarefa.status == 'pendente' for tarefa in abandonadas)
+    if abandonadas:
+        logger.warning(
+            '%s tarefa(s) sem sinal do worker: %s devolvida(s) à fila', len(abandonadas), devolvidas
+        )
+    return devolvidas
+
+
+def reservar_proxima():
+    """Marca a próxima tarefa pendente como 'executando' e a retorna (ou None)"""
+    recuperar_abandonadas()
+    with transaction.atomic():
+        tarefa = (
+            Tarefa.objects.select_for_update(skip_locked=True)
+            .filter(status='pendente')
+            .order_by('created_at')
+            .first()
+        )
+        if tarefa is None:
+            return None
+
+        tarefa.status = 'executando'
+        tarefa.etapa = 'Iniciando'
+        tarefa.iniciada_em = tarefa.ultimo_sinal_em = timezone.now()
+        tarefa.tentativas += 1
+        tarefa.save(update_fields=['status', 'etapa', 'iniciada_em', 'ultimo_sinal_em', 'tentativas', 'updated_at'])
+    return tarefa
+
+
+@contextmanager
+def sinal_de_vida(tarefa):
+    """
+    Renova ultimo_sinal_em numa thread (com conexão própria) enquanto a tarefa
+    executa, inclusive durante etapas longas sem progresso (ex.: o bulk_create
+    da importação, dentro de uma transação).
+    """
+    parar = threading.Event()
+
+    def renovar():
+        try:
+            while not parar.wait(INTERVALO_SINAL.total_seconds()):
+                Tarefa.objects.filter(pk=tarefa.pk, status='executando').update(ultimo_sinal_em=timezone.now())
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=renovar, name=f'sinal-tarefa-{tarefa.pk}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        parar.set()
+        thread.join()
+
+
+def executar(tarefa):
+    """Executa a tarefa e grava o resultado (concluída ou falhou)"""
+    executor = EXECUTORES[tarefa.tipo]
+    try:
+        with sinal_de_vida(tarefa):
+            executor(tarefa)
+    except Exception as e:
+        logger.exception('Tarefa %s falhou', tarefa.pk)
+        tarefa.status = 'falhou'
+        tarefa.mensagem = f'{e}\n\n{traceback.format_exc()}'
+    else:
+        tarefa.status = 'concluida'
+    tarefa.finalizada_em = timezone.now()
+    tarefa.save()
+
+
+def executar_proxima():
+    """Reserva e executa uma tarefa. Retorna a tarefa executada ou None se a fila estiver vazia."""
+    tarefa = reservar_proxima()
+    if tarefa is not None:
+        executar(tarefa)
+    return tarefa
+
+
+def manutencao_diaria():
+    """
+    Rotina diária do worker: avança o horizonte das recorrências, marca as
+    contas pendentes que venceram e remove as exclusões fora da retenção da
+    sincronização. Todas são idempotentes (vários workers podem rodar).
+    """
+    geradas = len(materializar(RegraRecorrencia.objects.all(), horizonte_padrao()))
+    vencidas = ContasPagar.objects.marcar_vencidas()
+    exclusoes = limpar_exclusoes()
+    logger.info(
+        'Manutenção diária: %s ocorrência(s) gerada(s), %s conta(s) vencida(s), %s exclusão(ões) expurgada(s)',
+        geradas, vencidas, exclusoes
+    )
+    return geradas, vencidas
+
+
+def _registrar_erros(tarefa, erros):
+    tarefa.total_erros = len(erros)
+    tarefa.erros = erros[:Tarefa.MAX_ERROS]
+
+
+def _salvar_resultado(tarefa, arquivo, nome):
+    """Grava o arquivo com nome aleatório (caminho_arquivo_tarefa); `nome` é o oferecido no download"""
+    arquivo.seek(0)
+    tarefa.nome_resultado = nome
+    tarefa.arquivo_resultado.save(nome, File(arquivo), save=False)
+
+
+def importar_contas(tarefa):
+    """Importa o CSV enviado (arquivo_entrada) com o ImportadorContasPagar"""
+    importador = ImportadorContasPagar(
+        tarefa.company,
+        tarefa.created_by,
+        ao_progredir=lambda etapa, linhas: tarefa.atualizar_progresso(etapa, linhas),
+        rejeitar_duplicadas=bool(tarefa.parametros.get('rejeitar_duplicadas', False))
+    )
+
+    with tarefa.arquivo_entrada.open('rb') as arquivo:
+        resultado = importador.importar(codecs.iterdecode(arquivo, 'utf-8-sig'))
+
+    tarefa.linhas_processadas = resultado.sucesso + len(resultado.erros)
+    tarefa.linhas_sucesso = resultado.sucesso
+    _registrar_erros(tarefa, resultado.erros)
+    tarefa.etapa = 'Concluída'
+    tarefa.mensagem = (
+        f'{resultado.sucesso} conta(s) importada(s), '
+        f'{resultado.cadastros_criados} cadastro(s) criado(s), '
+        f'{len(resultado.erros)} erro(s), '
+        f'{len(resultado.avisos)} possível(is) duplicata(s) importada(s).'
+    )
+
+    # Relatório de erros e avisos para download
+    if resultado.erros or resultado.avisos:
+        with tempfile.TemporaryFile('w+b') as arquivo:
+            texto = codecs.getwriter('utf-8')(arquivo)
+            writer = csv.writer(texto)
+            writer.writerow(['tipo', 'mensagem'])
+            writer.writerows(['erro', erro] for erro in resultado.erros)
+            writer.writerows(['aviso', aviso] for aviso in resultado.avisos)
+            texto.flush()
+            _salvar_resultado(tarefa, arquivo, f'erros_importacao_{tarefa.pk}.csv')
+
+
+def _queryset_exportacao(tarefa):
+    """
+    Monta o queryset da exportação reaproveitando o ContasPagarViewSet,
+    para aplicar exatamente os mesmos filtros e busca da listagem, com o
+    usuário que pediu a exportação (e só se ele ainda for da company da tarefa).
+    """
+    from .views import ContasPagarViewSet
+
+    if tarefa.created_by is None or tarefa.created_by.company_id != tarefa.company_id:
+        raise ValueError('O usuário que solicitou a exportação foi removido ou não pertence mais à empresa.')
+
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    http_request.GET = QueryDict(urlencode(tarefa.parametros.get('filtros', {}), doseq=True))
+    request = Request(http_request)
+    request.user = tarefa.created_by
+
+    view = ContasPagarViewSet(request=request, action='export', format_kwarg=None, args=(), kwargs={})
+    return view.get_export_queryset()
+
+
+def exportar_contas(tarefa):
+    """Gera o arquivo de exportação (CSV ou NDJSON) com os filtros da tarefa"""
+    formato = tarefa.parametros.get('formato', 'csv')
+    if formato not in exportacao.FORMATOS:
+        raise ValueError(f'Formato inválido: {formato}')
+
+    tarefa.atualizar_progresso('Exportando', 0)
+    processadas = 0
+
+    def contar(linhas):
+        nonlocal processadas
+        for linha in linhas:
+            processadas += 1
+            if processadas % INTERVALO_PROGRESSO == 0:
+                tarefa.atualizar_progresso(linhas_processadas=processadas)
+            yield linha
+
+    with tempfile.TemporaryFile('w+b') as arquivo:
+        linhas = contar(exportacao.linhas(_queryset_exportacao(tarefa)))
+        for trecho in exportacao.gerar(formato, linhas):
+            arquivo.write(trecho.encode('utf-8'))
+        _salvar_resultado(tarefa, arquivo, f'contas_pagar_{timezone.localdate():%Y%m%d}.{formato}')
+
+    tarefa.linhas_processadas = tarefa.linhas_sucesso = processadas
+    tarefa.etapa = 'Concluída'
+    tarefa.mensagem = f'{processadas} conta(s) exportada(s).'
+
+
+# Executor de cada tipo de tarefa
+EXECUTORES = {
+    'importacao_contas': importar_contas,
+    'exportacao_contas': exportar_contas,
+}
@@ -1,3 +1,429 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import CustomUser
+from companies.models import Company
+from . import tarefas
+from .importacao import ImportadorContasPagar
+from .models import CategoriaFinanceira, ContasPagar, Filial, Fornecedor, Tarefa
+from .resumo import divergencias
+
+
+URL_CONTAS = '/api/financeiro/contas-pagar/'
+URL_TAREFAS = '/api/financeiro/jobs/'
+
+
+class CadastrosMixin:
+    """Company com filial, fornecedor e categoria, e um APIClient autenticado por JWT"""
+
+    @classmethod
+    def criar_cadastros(cls):
+        cls.company = Company.objects.create(name='Empresa', slug='empresa')
+        cls.user = CustomUser.objects.create_user(
+            email='usuario@empresa.com', password='senha', first_name='Usuário', company=cls.company
+        )
+        cls.filial = Filial.objects.create(company=cls.company, nome='Matriz', cnpj='12345678000190')
+        cls.fornecedor = Fornecedor.objects.create(company=cls.company, nome='Fornecedor', tipo_pessoa='juridica')
+        cls.categoria = CategoriaFinanceira.objects.create(company=cls.company, nome='Aluguel', tipo='despesa')
+
+    def autenticar(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def criar_conta(self, **campos):
+        dados = {
+            'company': self.company, 'filial': self.filial, 'fornecedor': self.fornecedor,
+            'categoria': self.categoria, 'descricao': 'Conta', 'valor_original': Decimal('100.00'),
+            'data_vencimento': date.today() + timedelta(days=10),
+        }
+        dados.update(campos)
+        return ContasPagar.objects.create(**dados)
+
+    def dados_api(self, **campos):
+        dados = {
+            'filial': str(self.filial.id), 'fornecedor': str(self.fornecedor.id),
+            'categoria': str(self.categoria.id), 'descricao': 'Conta', 'valor_original': '100.00',
+            'data_vencimento': str(date.today() + timedelta(days=10)),
+        }
+        dados.update(campos)
+        return dados
+
+    def assertResumoConfere(self):
+        """O resumo gravado é igual ao recalculado a partir das contas"""
+        self.assertEqual(divergencias(self.company.id), [])
+
+
+class FinanceiroTestCase(CadastrosMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.criar_cadastros()
+
+    def setUp(self):
+        self.autenticar()
+
+
+class ResumoContasPagarTests(FinanceiroTestCase):
+
+    def test_criar_alterar_excluir(self):
+        resposta = self.client.post(URL_CONTAS, self.dados_api(), format='json')
+        self.assertEqual(resposta.status_code, 201)
+        self.assertResumoConfere()
+
+        url = f"{URL_CONTAS}{resposta.data['id']}/"
+        resposta = self.client.patch(url, {'juros': '5.00', 'data_vencimento': str(date.today())}, format='json')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertResumoConfere()
+
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertResumoConfere()
+
+    def test_pagar(self):
+        conta = self.criar_conta()
+        resposta = self.client.post(f'{URL_CONTAS}{conta.id}/pagar/', {'valor_pago': '40.00'}, format='json')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertResumoConfere()
+
+        resposta = self.client.post(f'{URL_CONTAS}{conta.id}/pagar/', {}, format='json')
+        self.assertEqual(resposta.data['status'], 'paga')
+        self.assertResumoConfere()
+
+    def test_pagar_lote(self):
+        contas = [self.criar_conta(descricao=f'Conta {indice}') for indice in range(3)]
+        resposta = self.client.post(f'{URL_CONTAS}pagar-lote/', {'pagamentos': [
+            {'id': str(contas[0].id)},
+            {'id': str(contas[1].id), 'valor_pago': '30.00'},
+        ]}, format='json')
+        self.assertEqual(resposta.data['pagas'], 2)
+        self.assertResumoConfere()
+
+    def test_pagar_lote_itens_invalidos(self):
+        contas = [self.criar_conta(descricao=f'Conta {indice}') for indice in range(4)]
+        resposta = self.client.post(f'{URL_CONTAS}pagar-lote/', {'pagamentos': [
+            {'id': str(contas[0].id), 'valor_pago': None},
+            {'id': str(contas[1].id), 'valor_pago': {'valor': 10}},
+            {'id': str(contas[2].id), 'valor_pago': '-50.00'},
+            {'id': str(contas[3].id), 'valor_pago': '60.00', 'data_pagamento': '2025-02-30'},
+        ]}, format='json')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual((resposta.data['pagas'], resposta.data['erros']), (0, 4))
+        self.assertTrue(all('valor_pago' in r['erro'] for r in resposta.data['resultados'][:3]))
+        self.assertIn('data_pagamento', resposta.data['resultados'][3]['erro'])
+        self.assertFalse(ContasPagar.objects.exclude(valor_pago=0).exists())
+        self.assertResumoConfere()
+
+    def test_pagar_valor_negativo(self):
+        conta = self.criar_conta()
+        resposta = self.client.post(f'{URL_CONTAS}{conta.id}/pagar/', {'valor_pago': '-1'}, format='json')
+        self.assertEqual(resposta.status_code, 400)
+        conta.refresh_from_db()
+        self.assertEqual(conta.status, 'pendente')
+
+    def test_gravacoes_com_instancias_desatualizadas(self):
+        """Duas cópias da mesma conta gravadas em sequência (como em requisições concorrentes)"""
+        conta = self.criar_conta()
+        primeira = ContasPagar.objects.get(pk=conta.pk)
+        segunda = ContasPagar.objects.get(pk=conta.pk)
+
+        primeira.valor_original = Decimal('250.00')
+        primeira.save()
+        segunda.juros = Decimal('10.00')
+        segunda.save()
+        self.assertResumoConfere()
+
+        primeira.delete()
+        self.assertResumoConfere()
+
+
+class ValoresCalculadosTests(FinanceiroTestCase):
+
+    def test_percentual_pago_gravado(self):
+        parcial = self.criar_conta(valor_original=Decimal('300.00'))
+        paga = self.criar_conta(valor_original=Decimal('100.00'))
+        self.client.post(f'{URL_CONTAS}pagar-lote/', {'pagamentos': [
+            {'id': str(parcial.id), 'valor_pago': '50.00'},
+            {'id': str(paga.id), 'valor_pago': '150.00'},
+        ]}, format='json')
+
+        self.assertEqual(
+            dict(ContasPagar.objects.values_list('id', 'percentual_pago')),
+            {parcial.id: Decimal('16.67'), paga.id: Decimal('100.00')}
+        )
+        resposta = self.client.get(f'{URL_CONTAS}?percentual_pago_min=50')
+        self.assertEqual([conta['id'] for conta in resposta.data['results']], [str(paga.id)])
+
+
+class CursorContasPagarTests(FinanceiroTestCase):
+
+    def ids_paginas(self, url):
+        """Segue os links `next` a partir de `url` e retorna os ids de cada página"""
+        paginas = []
+        while url:
+            resposta = self.client.get(url)
+            self.assertEqual(resposta.status_code, 200)
+            paginas.append([conta['id'] for conta in resposta.data['results']])
+            url = resposta.data['next']
+        return paginas
+
+    def test_percorre_todas_as_contas_uma_vez(self):
+        # Vencimentos repetidos: o desempate é pelo id
+        vencimento = date.today() + timedelta(days=5)
+        for indice in range(7):
+            self.criar_conta(descricao=f'Conta {indice}', data_vencimento=vencimento + timedelta(days=indice % 2))
+
+        paginas = self.ids_paginas(f'{URL_CONTAS}?cursor=&page_size=3')
+        esperado = [
+            # Todas pendentes (mesmo status_order): a ordem é (data_vencimento, id)
+            str(pk) for pk in ContasPagar.objects.order_by('data_vencimento', 'id').values_list('id', flat=True)
+        ]
+        self.assertEqual([len(pagina) for pagina in paginas], [3, 3, 1])
+        self.assertEqual(sum(paginas, []), esperado)
+
+    def test_inclusao_entre_paginas_nao_repete_nem_pula(self):
+        vencimento = date.today() + timedelta(days=5)
+        for indice in range(6):
+            self.criar_conta(descricao=f'Conta {indice}', data_vencimento=vencimento + timedelta(days=indice))
+
+        primeira = self.client.get(f'{URL_CONTAS}?cursor=&page_size=3').data
+        # Conta nova antes da posição do cursor: numa paginação por offset deslocaria a segunda página
+        self.criar_conta(descricao='Nova', data_vencimento=vencimento - timedelta(days=1))
+        segunda = self.client.get(primeira['next']).data
+
+        ids_primeira = [conta['id'] for conta in primeira['results']]
+        ids_segunda = [conta['id'] for conta in segunda['results']]
+        self.assertEqual(
+            [conta['descricao'] for conta in segunda['results']], ['CONTA 3', 'CONTA 4', 'CONTA 5']
+        )
+        self.assertIsNone(segunda['next'])
+
+        # Voltando da segunda página, a anterior é a mesma primeira página
+        anterior = self.client.get(segunda['previous']).data
+        self.assertEqual([conta['id'] for conta in anterior['results']], ids_primeira)
+        self.assertFalse(set(ids_primeira) & set(ids_segunda))
+
+    def test_cursor_invalido(self):
+        resposta = self.client.get(f'{URL_CONTAS}?cursor=invalido')
+        self.assertEqual(resposta.status_code, 400)
+
+
+class ImportacaoContasPagarTests(FinanceiroTestCase):
+
+    CABECALHO = 'descricao,filial_nome,fornecedor_nome,categoria_nome,valor_original,desconto,juros,multa,data_vencimento'
+
+    def importar(self, *linhas):
+        csv = [self.CABECALHO] + [f'Conta,Matriz,Fornecedor,Aluguel,{linha},2030-01-10' for linha in linhas]
+        return ImportadorContasPagar(self.company, self.user).importar(csv)
+
+    def test_valores_invalidos_viram_erro_da_linha(self):
+        resultado = self.importar(
+            ',0,0,0',          # valor_original vazio
+            '0,0,0,0',         # valor_original zero
+            '-10,0,0,0',       # valor_original negativo
+            '100,-5,0,0',      # desconto negativo
+            '100,0,-5,0',      # juros negativos
+            '100,0,0,-5',      # multa negativa
+            '100,150,10,0',    # desconto maior que a conta
+            '100,10,0,0',      # válida
+        )
+        self.assertEqual(resultado.sucesso, 1)
+        self.assertEqual([erro.split(':')[0] for erro in resultado.erros], [f'Linha {linha}' for linha in range(2, 9)])
+        self.assertIn("Campo 'valor_original' é obrigatório", resultado.erros[0])
+        self.assertEqual(ContasPagar.objects.get().valor_original, Decimal('100.00'))
+        self.assertResumoConfere()
+
+
+class TarefasTests(FinanceiroTestCase):
+
+    def setUp(self):
+        super().setUp()
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        configuracao = override_settings(PRIVATE_MEDIA_ROOT=pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.pasta = pasta
+
+    def criar_tarefa(self, **campos):
+        dados = {'company': self.company, 'created_by': self.user, 'tipo': 'exportacao_contas'}
+        dados.update(campos)
+        return Tarefa.objects.create(**dados)
+
+    def test_exportacao_fica_fora_do_media_root(self):
+        self.criar_conta()
+        tarefa = self.criar_tarefa()
+        tarefas.executar_proxima()
+        tarefa.refresh_from_db()
+
+        self.assertEqual(tarefa.status, 'concluida')
+        caminho = tarefa.arquivo_resultado.path
+        self.assertTrue(caminho.startswith(self.pasta))
+        self.assertFalse(caminho.startswith(str(settings.MEDIA_ROOT)))
+        self.assertNotIn('contas_pagar', tarefa.arquivo_resultado.name)
+
+        resposta = self.client.get(f'{URL_TAREFAS}{tarefa.id}/download/')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn(tarefa.nome_resultado, resposta['Content-Disposition'])
+        self.assertTrue(tarefa.nome_resultado.startswith('contas_pagar_'))
+
+    def test_download_de_outra_company(self):
+        outra = Company.objects.create(name='Outra', slug='outra')
+        tarefa = self.criar_tarefa(company=outra)
+        self.assertEqual(self.client.get(f'{URL_TAREFAS}{tarefa.id}/download/').status_code, 404)
+
+    def test_exportacao_sem_usuario_falha(self):
+        tarefa = self.criar_tarefa(created_by=None)
+        tarefas.executar_proxima()
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, 'falhou')
+        self.assertFalse(tarefa.arquivo_resultado)
+
+    def test_tarefa_sem_sinal_volta_para_a_fila(self):
+        sem_sinal = timezone.now() - tarefas.TEMPO_SEM_SINAL - timedelta(minutes=1)
+        abandonada = self.criar_tarefa(status='executando', ultimo_sinal_em=sem_sinal, tentativas=1)
+        esgotada = self.criar_tarefa(
+            status='executando', ultimo_sinal_em=sem_sinal, tentativas=tarefas.MAX_TENTATIVAS
+        )
+        em_andamento = self.criar_tarefa(status='executando', ultimo_sinal_em=timezone.now(), tentativas=1)
+
+        self.assertEqual(tarefas.reservar_proxima(), abandonada)
+        abandonada.refresh_from_db()
+        esgotada.refresh_from_db()
+        em_andamento.refresh_from_db()
+        self.assertEqual((abandonada.status, abandonada.tentativas), ('executando', 2))
+        self.assertEqual(esgotada.status, 'falhou')
+        self.assertEqual(em_andamento.status, 'executando')
+
+
+class OperacoesEmMassaTests(FinanceiroTestCase):
+
+    def test_categoria_de_receita_recusada(self):
+        conta = self.criar_conta()
+        receita = CategoriaFinanceira.objects.create(company=self.company, nome='Vendas', tipo='receita')
+
+        resposta = self.client.post(f'{URL_CONTAS}lote/', {
+            'operacao': 'atualizar', 'ids': [str(conta.id)], 'categoria': str(receita.id),
+        }, format='json')
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('categoria', resposta.data)
+
+        conta.refresh_from_db()
+        self.assertEqual(conta.categoria, self.categoria)
+
+
+class ParcelamentoTests(FinanceiroTestCase):
+
+    def test_post_comum_grava_so_a_parcela_enviada(self):
+        """Clientes que já dividem a compra enviam cada parcela com e_parcelada/parcela_atual/total_parcelas"""
+        resposta = self.client.post(URL_CONTAS, self.dados_api(
+            valor_original='33.33', e_parcelada=True, parcela_atual=2, total_parcelas=3
+        ), format='json')
+        self.assertEqual(resposta.status_code, 201)
+
+        conta = ContasPagar.objects.get()
+        self.assertEqual((conta.valor_original, conta.parcela_atual, conta.total_parcelas), (Decimal('33.33'), 2, 3))
+        self.assertResumoConfere()
+
+    def test_parcelar_divide_o_total(self):
+        vencimento = date.today() + timedelta(days=10)
+        resposta = self.client.post(f'{URL_CONTAS}parcelar/', self.dados_api(
+            valor_original='100.00', total_parcelas=3, data_vencimento=str(vencimento)
+        ), format='json')
+        self.assertEqual(resposta.status_code, 201)
+        self.assertEqual(len(resposta.data), 3)
+
+        parcelas = list(ContasPagar.objects.order_by('parcela_atual'))
+        self.assertEqual([p.valor_original for p in parcelas], [Decimal('33.34'), Decimal('33.33'), Decimal('33.33')])
+        self.assertEqual(len({p.grupo_parcelamento for p in parcelas}), 1)
+        self.assertEqual(parcelas[0].data_vencimento, vencimento)
+        self.assertResumoConfere()
+
+    def test_parcelar_exige_duas_parcelas(self):
+        resposta = self.client.post(f'{URL_CONTAS}parcelar/', self.dados_api(total_parcelas=1), format='json')
+        self.assertEqual(resposta.status_code, 400)
+        self.assertFalse(ContasPagar.objects.exists())
+
+
+class SincronizacaoTests(FinanceiroTestCase):
+
+    @unittest.skipIf(connection.vendor == 'postgresql', 'Com Postgres a sincronização está disponível')
+    def test_indisponivel_sem_postgres(self):
+        self.assertEqual(self.client.get(f'{URL_CONTAS}changes/').status_code, 503)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'A marca d\'água usa os txids do Postgres')
+class MarcaDaguaSincronizacaoTests(CadastrosMixin, TransactionTestCase):
+    """Cada gravação confirma de fato (TransactionTestCase): o horizonte depende das transações abertas"""
+
+    def setUp(self):
+        self.criar_cadastros()
+        self.autenticar()
+
+    def sincronizar(self, versao=None, **params):
+        if versao:
+            params['since'] = versao
+        resposta = self.client.get(f'{URL_CONTAS}changes/', params)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.data
+
+    def test_transacao_longa_entra_na_sincronizacao_seguinte(self):
+        antiga = self.criar_conta(descricao='Antiga')
+        versao = self.sincronizar()['versao']
+
+        # Transação aberta (numa thread, com conexão própria) durante a sincronização seguinte
+        gravou, pode_confirmar = threading.Event(), threading.Event()
+
+        def transacao_longa():
+            try:
+                with transaction.atomic():
+                    self.criar_conta(descricao='Longa', data_vencimento=date.today() + timedelta(days=20))
+                    ContasPagar.objects.get(pk=antiga.pk).delete()
+                    gravou.set()
+                    pode_confirmar.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=transacao_longa)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(pode_confirmar.set)
+        self.assertTrue(gravou.wait(10))
+
+        # Vencimento próprio: os buckets do resumo das contas acima ficam travados pela transação longa
+        self.criar_conta(descricao='Rapida', data_vencimento=date.today() + timedelta(days=30))
+        durante = self.sincronizar(versao)
+        self.assertEqual([conta['descricao'] for conta in durante['alteradas']], ['RAPIDA'])
+        self.assertEqual(durante['excluidas'], [])
+
+        pode_confirmar.set()
+        thread.join()
+        depois = self.sincronizar(durante['versao'])
+        # A conta rápida pode voltar (gravada entre o horizonte e a leitura); a longa não pode faltar
+        self.assertIn('LONGA', [conta['descricao'] for conta in depois['alteradas']])
+        self.assertEqual(depois['excluidas'], [antiga.id])
+
+        seguinte = self.sincronizar(depois['versao'])
+        self.assertEqual((seguinte['alteradas'], seguinte['excluidas']), ([], []))
+
+    def test_paginas_da_mesma_sincronizacao(self):
+        for indice in range(5):
+            self.criar_conta(descricao=f'Conta {indice}')
+
+        ids, versao, tem_mais = [], None, True
+        while tem_mais:
+            pagina = self.sincronizar(versao, limite=2)
+            ids += [conta['id'] for conta in pagina['alteradas']]
+            versao, tem_mais = pagina['versao'], pagina['tem_mais']
+
+        self.assertEqual(sorted(ids), sorted(str(pk) for pk in ContasPagar.objects.values_list('id', flat=True)))
+        self.assertEqual(self.sincronizar(versao)['alteradas'], [])
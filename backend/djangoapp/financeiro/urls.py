@@ -1,11 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import views_async
 from .views import (
     FilialViewSet,
     CategoriaFinanceiraViewSet,
     FornecedorViewSet,
     FormaPagamentoViewSet,
-    ContasPagarViewSet
+    ContasPagarViewSet,
+    OpcoesView,
+    RegraRecorrenciaViewSet,
+    TarefaViewSet
 )
 
 router = DefaultRouter()
@@ -14,9 +18,24 @@ router.register(r'categorias', CategoriaFinanceiraViewSet, basename='categoria')
 router.register(r'fornecedores', FornecedorViewSet, basename='fornecedor')
 router.register(r'formas-pagamento', FormaPagamentoViewSet, basename='formapagamento')
 router.register(r'contas-pagar', ContasPagarViewSet, basename='contapagar')
+router.register(r'regras-recorrencia', RegraRecorrenciaViewSet, basename='regrarecorrencia')
+router.register(r'jobs', TarefaViewSet, basename='tarefa')
 
 app_name = 'financeiro'
 
+# Leituras com ORM assíncrono (servir via ASGI: project/asgi.py)
+urlpatterns_async = [
+    path('contas-pagar/', views_async.listar, name='contapagar-async-list'),
+    path('contas-pagar/estatisticas/', views_async.estatisticas, name='contapagar-async-estatisticas'),
+    path('contas-pagar/pendentes/', views_async.pendentes, name='contapagar-async-pendentes'),
+    path('contas-pagar/vencidas/', views_async.vencidas, name='contapagar-async-vencidas'),
+    path('contas-pagar/pagas/', views_async.pagas, name='contapagar-async-pagas'),
+    path('contas-pagar/<uuid:pk>/', views_async.detalhar, name='contapagar-async-detail'),
+    path('contas-pagar/eventos/', views_async.eventos, name='contapagar-async-eventos'),
+]
+
 urlpatterns = [
+    path('opcoes/', OpcoesView.as_view(), name='opcoes'),
+    path('async/', include(urlpatterns_async)),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""
+Versão dos dados de contas a pagar por company, para GET condicional.
+
+Toda escrita em ContasPagar (save/delete, UPDATE/DELETE por queryset,
+bulk_create/bulk_update) e nos cadastros exibidos na listagem (filial,
+fornecedor, categoria, forma de pagamento) avança a versão da company
+depois do commit. A listagem e as estatísticas derivam o ETag da versão +
+dia + caminho + query string normalizada e respondem 304 ao If-None-Match
+atual com uma única consulta (a linha da company em VersaoDados). A versão
+fica no banco para que as escritas do worker (importações, manutenção)
+também invalidem os ETags servidos pelos processos web.
+"""
+import hashlib
+from datetime import date
+from urllib.parse import urlencode
+
+from django.db import transaction
+
+
+def atual(company_id):
+    """Versão atual dos dados da company"""
+    from .models import VersaoDados
+
+    return VersaoDados.ler(company_id, 'contas')
+
+
+def incrementar(company_ids, using=None):
+    """Avança a versão das companies quando a transação corrente for confirmada"""
+    company_ids = {company_id for company_id in company_ids if company_id is not None}
+    if company_ids:
+        transaction.on_commit(lambda: _incrementar(company_ids), using=using)
+
+
+def _incrementar(company_ids):
+    from .models import VersaoDados
+
+    VersaoDados.avancar(company_ids, 'contas')
+
+
+def etag(company_id, request):
+    """
+    ETag de uma leitura da company. Inclui o dia porque status/estatísticas
+    dependem de hoje (vencidas, próximos 7 dias, pagas hoje).
+    """
+    parametros = sorted((chave, valor) for chave, valores in request.GET.lists() for valor in valores)
+    conteudo = f'{company_id}|{atual(company_id)}|{date.today()}|{request.path}|{urlencode(parametros)}'
+    return f'"{hashlib.sha1(conteudo.encode()).hexdigest()}"'
@@ -4,22 +4,65 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
-from django.db import models
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+from django.db import IntegrityError, connections, models, transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.core.paginator import InvalidPage, Page
+from django.utils import timezone
+from django.utils.http import parse_etags
+import base64
+from collections import Counter
+from functools import wraps
+import json
+import os
 import uuid
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet, DateFilter, CharFilter, BaseInFilter, NumberFilter
-from .models import Filial, CategoriaFinanceira, Fornecedor, FormaPagamento, ContasPagar
-from datetime import timedelta
-from dateutil.relativedelta import relativedelta
+from django_filters.constants import EMPTY_VALUES
+from django_filters.utils import translate_validation
+from core.renderers import ORJSONRenderer
+from .models import (
+    Filial, CategoriaFinanceira, Fornecedor, FormaPagamento, ContasPagar,
+    NotaFiscalContaPagar, RegraRecorrencia, ResumoContasPagar, Tarefa, ORDEM_STATUS,
+    assinatura_conta, numeros_nota_fiscal
+)
+from datetime import date, datetime, timedelta
+from . import exportacao, listagem, opcoes, parcelamento, recorrencia, sincronizacao, versao
+from .busca import BuscaTrigramaFilter
+from .resumo import chaves_resumo, estado_resumo, recalcular_buckets, registrar_alteracoes_em_lote
 from .serializers import (
     FilialSerializer,
     CategoriaFinanceiraSerializer,
     FornecedorSerializer,
     FormaPagamentoSerializer,
     ContasPagarSerializer,
-    ContasPagarListSerializer
+    ContasPagarListSerializer,
+    OperacaoLoteContasPagarSerializer,
+    PagamentoContaPagarSerializer,
+    ReagendamentoGrupoSerializer,
+    AlteracaoGrupoSerializer,
+    RegraRecorrenciaSerializer,
+    TarefaSerializer,
+    VerificacaoDuplicatasSerializer
 )
 
 
+# Status das contas ainda em aberto (alvo das operações sobre o restante de um grupo)
+STATUS_EM_ABERTO = ['pendente', 'vencida']
+
+# UUID na URL das ações de grupo (/contas-pagar/grupo/{uuid}/...)
+GRUPO_URL = r'grupo/(?P<grupo>[0-9a-fA-F-]{36})'
+
+
+def _mensagem_erros(erros):
+    """Erros de um serializer numa mensagem só ("campo: erro; ..."), como nos resultados por item"""
+    return '; '.join(f'{campo}: {" ".join(map(str, mensagens))}' for campo, mensagens in erros.items())
+
+
 class CustomPageNumberPagination(PageNumberPagination):
     """Paginação customizada que permite o cliente definir o page_size"""
     page_size = 25
@@ -27,6 +70,169 @@ class CustomPageNumberPagination(PageNumberPagination):
     max_page_size = 10000  # Limite máximo
 
 
+class Tupla(models.Func):
+    """Tupla SQL "(a, b, c)" usada para comparar linhas na paginação por cursor"""
+    template = '(%(expressions)s)'
+    output_field = models.Field()
+
+
+class ContasPagarPagination(CustomPageNumberPagination):
+    """
+    Paginação de Contas a Pagar.
+
+    Sem o parâmetro `cursor`, funciona como CustomPageNumberPagination.
+    Com `?cursor=` (vazio na primeira página), usa paginação por chave
+    (keyset) sobre (status_order, data_vencimento, id), atendida pelo índice
+    contaspagar_ordem_lista_idx: o custo de cada página é constante,
+    independente da profundidade. A contagem total é opcional:
+    `?contagem=exata` (COUNT(*)) ou `?contagem=estimada` (estimativa do planner).
+    `apaginate_queryset` é a versão com ORM assíncrono (views de views_async.py).
+    """
+    cursor_query_param = 'cursor'
+    contagem_query_param = 'contagem'
+    ordenacao_cursor = ('status_order', 'data_vencimento', 'id')
+
+    modo_cursor = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.modo_cursor = self.cursor_query_param in request.query_params
+        if not self.modo_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.contagem = self.calcular_contagem(queryset, request.query_params.get(self.contagem_query_param))
+        queryset = self.preparar_cursor(queryset, request)
+        return self.finalizar_cursor(list(queryset[:self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset com consultas pelo ORM assíncrono"""
+        self.modo_cursor = self.cursor_query_param in request.query_params
+        if self.modo_cursor:
+            self.contagem = await self.acalcular_contagem(
+                queryset, request.query_params.get(self.contagem_query_param)
+            )
+            queryset = self.preparar_cursor(queryset, request)
+            return self.finalizar_cursor([item async for item in queryset[:self.page_size + 1]])
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        # Mesmo fluxo do PageNumberPagination, com o COUNT e a página lidos de forma assíncrona
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            numero = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        inicio = (numero - 1) * page_size
+        itens = [item async for item in queryset[inicio:inicio + page_size]]
+        self.page = Page(itens, numero, paginator)
+        self.request = request
+        return itens
+
+    def preparar_cursor(self, queryset, request):
+        """Ordena e recorta o queryset a partir do cursor (sem executar a consulta)"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        posicao, reverso = self.decodificar_cursor(request.query_params[self.cursor_query_param])
+        self.posicao, self.reverso = posicao, reverso
+
+        if reverso:
+            queryset = queryset.order_by(*('-' + campo for campo in self.ordenacao_cursor))
+        else:
+            queryset = queryset.order_by(*self.ordenacao_cursor)
+
+        if posicao is not None:
+            lookup = 'lt' if reverso else 'gt'
+            queryset = queryset.alias(
+                posicao_cursor=Tupla(*self.ordenacao_cursor)
+            ).filter(**{
+                f'posicao_cursor__{lookup}': Tupla(*(models.Value(valor) for valor in posicao))
+            })
+        return queryset
+
+    def finalizar_cursor(self, itens):
+        """Recebe até page_size + 1 itens lidos e monta a página e os cursores vizinhos"""
+        posicao, reverso = self.posicao, self.reverso
+        tem_mais = len(itens) > self.page_size
+        itens = itens[:self.page_size]
+        if reverso:
+            itens.reverse()
+
+        # Próxima página: depois do último item / Página anterior: antes do primeiro
+        tem_proxima = tem_mais if not reverso else posicao is not None
+        tem_anterior = tem_mais if reverso else posicao is not None
+        self.cursor_proximo = self.posicao_item(itens[-1]) if itens and tem_proxima else None
+        self.cursor_anterior = self.posicao_item(itens[0]) if itens and tem_anterior else None
+
+        return itens
+
+    def get_paginated_response(self, data):
+        if not self.modo_cursor:
+            return super().get_paginated_response(data)
+
+        return Response({
+            'count': self.contagem,
+            'next': self.montar_link(self.cursor_proximo, reverso=False),
+            'previous': self.montar_link(self.cursor_anterior, reverso=True),
+            'results': data,
+        })
+
+    def posicao_item(self, item):
+        return (item.status_order, item.data_vencimento.isoformat(), str(item.id))
+
+    def montar_link(self, posicao, reverso):
+        if posicao is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.codificar_cursor(posicao, reverso))
+
+    def codificar_cursor(self, posicao, reverso):
+        conteudo = json.dumps([*posicao, int(reverso)]).encode()
+        return base64.urlsafe_b64encode(conteudo).decode()
+
+    def decodificar_cursor(self, cursor):
+        """Retorna ((status_order, data_vencimento, id), reverso) ou (None, False) na primeira página"""
+        if not cursor:
+            return None, False
+        try:
+            status_order, vencimento, pk, reverso = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            posicao = (
+                int(status_order),
+                datetime.strptime(vencimento, '%Y-%m-%d').date(),
+                uuid.UUID(pk),
+            )
+        except (TypeError, ValueError):
+            raise ValidationError({self.cursor_query_param: 'Cursor inválido.'})
+        return posicao, bool(reverso)
+
+    def calcular_contagem(self, queryset, modo):
+        if modo == 'exata':
+            return queryset.count()
+        if modo == 'estimada':
+            return self.contagem_estimada(queryset)
+        return None
+
+    async def acalcular_contagem(self, queryset, modo):
+        if modo == 'exata':
+            return await queryset.acount()
+        if modo == 'estimada':
+            if connections[queryset.db].vendor != 'postgresql':
+                return await queryset.acount()
+            plano = json.loads(await queryset.order_by().aexplain(format='json'))
+            return int(plano[0]['Plan']['Plan Rows'])
+        return None
+
+    def contagem_estimada(self, queryset):
+        """Estimativa de linhas do planner do Postgres (sem executar a consulta)"""
+        if connections[queryset.db].vendor != 'postgresql':
+            return queryset.count()
+        plano = json.loads(queryset.order_by().explain(format='json'))
+        return int(plano[0]['Plan']['Plan Rows'])
+
+
 class NumberInFilter(BaseInFilter, NumberFilter):
     """Filtro que aceita múltiplos valores numéricos separados por vírgula"""
     pass
@@ -50,10 +256,69 @@ class ContasPagarFilter(FilterSet):
     categoria = CharInFilter(field_name='categoria', lookup_expr='in')  # UUID
     fornecedor = CharInFilter(field_name='fornecedor', lookup_expr='in')  # UUID
 
+    # Faixas de valor (colunas calculadas e indexadas)
+    valor_final_min = NumberFilter(field_name='valor_final', lookup_expr='gte')
+    valor_final_max = NumberFilter(field_name='valor_final', lookup_expr='lte')
+    valor_restante_min = NumberFilter(field_name='valor_restante', lookup_expr='gte')
+    valor_restante_max = NumberFilter(field_name='valor_restante', lookup_expr='lte')
+    percentual_pago_min = NumberFilter(field_name='percentual_pago', lookup_expr='gte')
+    percentual_pago_max = NumberFilter(field_name='percentual_pago', lookup_expr='lte')
+
+    # Busca exata por número de NF (?nota_fiscal=123,456), pela tabela de NFs
+    nota_fiscal = CharFilter(method='filtrar_nota_fiscal')
+
     class Meta:
         model = ContasPagar
         fields = ['status', 'filial', 'fornecedor', 'categoria', 'e_parcelada', 'e_recorrente']
 
+    def filtrar_nota_fiscal(self, queryset, name, value):
+        notas = NotaFiscalContaPagar.objects.filter(
+            company=self.request.user.company, numero__in=numeros_nota_fiscal(value)
+        )
+        return queryset.filter(id__in=notas.values('conta_id'))
+
+
+class ResumoContasPagarFilter(FilterSet):
+    """Subconjunto dos filtros de Contas a Pagar que o resumo consegue atender"""
+    data_vencimento_inicio = DateFilter(field_name='data_vencimento', lookup_expr='gte')
+    data_vencimento_fim = DateFilter(field_name='data_vencimento', lookup_expr='lte')
+    status = CharInFilter(field_name='status', lookup_expr='in')
+    filial = CharInFilter(field_name='filial', lookup_expr='in')  # UUID
+
+    class Meta:
+        model = ResumoContasPagar
+        fields = ['status', 'filial']
+
+
+# Parâmetros que não impedem o uso do resumo nas estatísticas
+PARAMETROS_RESUMO = {
+    'status', 'filial', 'data_vencimento_inicio', 'data_vencimento_fim',
+    'ordering', 'page', 'page_size',
+}
+
+
+def get_condicional(metodo):
+    """
+    GET condicional pela versão dos dados da company (financeiro/versao.py):
+    com If-None-Match atual responde 304 antes de qualquer consulta.
+    """
+    @wraps(metodo)
+    def view(self, request, *args, **kwargs):
+        company = request.user.company
+        if not company:
+            return metodo(self, request, *args, **kwargs)
+
+        etag = versao.etag(company.id, request)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = metodo(self, request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+    return view
+
 
 class BaseCompanyViewSet(viewsets.ModelViewSet):
     """ViewSet base com filtro por company"""
@@ -66,6 +331,31 @@ class BaseCompanyViewSet(viewsets.ModelViewSet):
         return self.queryset.none()
 
 
+class OpcoesView(APIView):
+    """
+    Opções dos selects (filiais, fornecedores, categorias e formas de pagamento)
+    em uma única resposta compacta, servida do cache por company.
+    Com If-None-Match igual à versão atual responde 304 lendo só a versão.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        company = request.user.company
+        if not company:
+            return Response({chave: [] for chave, _ in opcoes.CADASTROS.values()})
+
+        versao, dados = opcoes.obter(company.id)
+        etag = f'"{company.id}-{versao}"'
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(dados)
+        response['ETag'] = etag
+        # O navegador guarda a resposta, mas sempre revalida (If-None-Match)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
 class FilialViewSet(BaseCompanyViewSet):
     """ViewSet para CRUD de Filiais"""
     queryset = Filial.objects.all()
@@ -91,9 +381,10 @@ class FornecedorViewSet(BaseCompanyViewSet):
     """ViewSet para CRUD de Fornecedores"""
     queryset = Fornecedor.objects.all()
     serializer_class = FornecedorSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, BuscaTrigramaFilter, filters.OrderingFilter]
     filterset_fields = ['tipo_pessoa', 'ativo', 'cidade', 'estado']
     search_fields = ['nome', 'nome_fantasia', 'cpf_cnpj']
+    busca_campos = ['nome', 'nome_fantasia', 'cpf_cnpj']  # Índices trigram (Postgres)
     ordering_fields = ['nome', 'cidade', 'created_at']
     ordering = ['nome']
 
@@ -108,6 +399,77 @@ class FormaPagamentoViewSet(BaseCompanyViewSet):
     ordering = ['nome']
 
 
+class TarefaViewSet(BaseCompanyViewSet):
+    """
+    Tarefas em segundo plano (importações e exportações grandes).
+    O POST apenas enfileira; o worker (manage.py processar_tarefas) executa
+    e o cliente acompanha o progresso consultando a tarefa.
+    """
+    queryset = Tarefa.objects.all()
+    serializer_class = TarefaSerializer
+    http_method_names = ['get', 'post', 'head', 'options']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['tipo', 'status']
+    ordering_fields = ['created_at', 'finalizada_em']
+    ordering = ['-created_at']
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Baixa o arquivo gerado pela tarefa (exportação ou relatório de erros)"""
+        tarefa = self.get_object()
+        if not tarefa.arquivo_resultado:
+            return Response(
+                {'error': 'Esta tarefa não gerou arquivo.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return FileResponse(
+            tarefa.arquivo_resultado.open('rb'),
+            as_attachment=True,
+            filename=tarefa.nome_resultado or os.path.basename(tarefa.arquivo_resultado.name)
+        )
+
+
+class RegraRecorrenciaViewSet(BaseCompanyViewSet):
+    """
+    Regras de contas recorrentes.
+    Alterações valem para as próximas ocorrências; as já materializadas
+    em contas a pagar não são modificadas. Para encerrar a série, use ativa=false.
+    """
+    queryset = RegraRecorrencia.objects.select_related('filial', 'fornecedor', 'categoria').all()
+    serializer_class = RegraRecorrenciaSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['frequencia', 'ativa', 'filial', 'fornecedor', 'categoria']
+    search_fields = ['descricao', 'fornecedor__nome']
+    ordering_fields = ['descricao', 'proximo_vencimento', 'created_at']
+    ordering = ['descricao']
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        regra = serializer.save()
+        recorrencia.materializar(
+            RegraRecorrencia.objects.filter(pk=regra.pk),
+            max(recorrencia.horizonte_padrao(), regra.data_inicio)
+        )
+        regra.refresh_from_db()
+
+    @action(detail=True, methods=['post'])
+    def materializar(self, request, pk=None):
+        """Gera as ocorrências até a data informada (?ate=AAAA-MM-DD, padrão: horizonte)"""
+        regra = self.get_object()
+        ate = request.data.get('ate') or request.query_params.get('ate')
+        try:
+            ate = date.fromisoformat(ate) if ate else recorrencia.horizonte_padrao()
+        except ValueError:
+            raise ValidationError({'ate': 'Data inválida (use AAAA-MM-DD).'})
+
+        contas = recorrencia.materializar(
+            RegraRecorrencia.objects.filter(pk=regra.pk),
+            min(ate, recorrencia.horizonte_maximo())
+        )
+        return Response({'geradas': len(contas)})
+
+
 class ContasPagarViewSet(BaseCompanyViewSet):
     """ViewSet para CRUD de Contas a Pagar"""
     queryset = ContasPagar.objects.select_related(
@@ -115,94 +477,178 @@ class ContasPagarViewSet(BaseCompanyViewSet):
     ).all()
 
     serializer_class = ContasPagarSerializer
-    pagination_class = CustomPageNumberPagination  # Usar paginação customizada
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = ContasPagarPagination  # Página numerada ou cursor (?cursor=)
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    filter_backends = [DjangoFilterBackend, BuscaTrigramaFilter, filters.OrderingFilter]
     filterset_class = ContasPagarFilter  # Usar FilterSet customizado
     search_fields = ['descricao', 'notas_fiscais', 'numero_boleto', 'fornecedor__nome']
+
+    # Busca indexada (pg_trgm): campos da conta + fornecedores resolvidos antes, ranking pela descrição
+    busca_campos = ['descricao', 'notas_fiscais', 'numero_boleto']
+    busca_relacionados = {'fornecedor': (Fornecedor, ['nome'])}
+    busca_relevancia = 'descricao'
     ordering_fields = [
         'data_vencimento', 'data_emissao', 'data_pagamento',
-        'valor_original', 'created_at'
+        'valor_original', 'valor_final', 'valor_restante', 'percentual_pago', 'created_at'
     ]
 
     def get_queryset(self):
         queryset = super().get_queryset()
         # 🔹 Ordenar primeiro por status, depois por data de vencimento
         queryset = queryset.annotate(
-            status_order=models.Case(
-                models.When(status='vencida', then=models.Value(1)),
-                models.When(status='pendente', then=models.Value(2)),
-                default=models.Value(3),
-                output_field=models.IntegerField(),
-            )
-        ).order_by('status_order', 'data_vencimento')
-
+            status_order=ORDEM_STATUS
+        ).order_by('status_order', 'data_vencimento', 'id')
 
         return queryset
     
+    # Ações que leem janelas de vencimento e precisam das ocorrências recorrentes materializadas
+    acoes_com_recorrencia = {'list', 'estatisticas', 'export'}
+
+    def filter_queryset(self, queryset):
+        if self.action in self.acoes_com_recorrencia:
+            self._materializar_recorrencias()
+        return super().filter_queryset(queryset)
+
+    def _materializar_recorrencias(self):
+        """
+        Garante as ocorrências recorrentes até o horizonte padrão ou até o
+        fim da janela pedida (?data_vencimento_fim=), o que for maior.
+        """
+        company = getattr(self.request.user, 'company', None)
+        if not company:
+            return
+
+        ate = recorrencia.horizonte_padrao()
+        try:
+            fim = date.fromisoformat(self.request.query_params.get('data_vencimento_fim', ''))
+        except ValueError:
+            fim = None
+        if fim and fim > ate:
+            ate = fim
+
+        recorrencia.materializar_company(company.id, ate)
+
     def get_serializer_class(self):
         """Usa serializer simplificado para listagem"""
         if self.action == 'list':
             return ContasPagarListSerializer
         return ContasPagarSerializer
 
+    @get_condicional
     def list(self, request, *args, **kwargs):
-        """Override para adicionar debug"""
-        queryset = self.filter_queryset(self.get_queryset())
-        if queryset.exists():
-            return super().list(request, *args, **kwargs)
-    
+        # Colunas lidas como tuplas e convertidas sem o serializer (financeiro/listagem.py)
+        queryset = listagem.linhas(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(listagem.serializar(page))
+        return Response(listagem.serializar(queryset))
+
     @action(detail=False, methods=['get'])
+    @get_condicional
     def estatisticas(self, request):
-        """Retorna estatísticas agregadas de contas a pagar"""
-        from datetime import date, timedelta
-        from django.db.models import Sum, Q
-        
-        queryset = self.get_queryset()
+        """
+        Retorna estatísticas agregadas de contas a pagar.
+        Aceita os mesmos filtros da listagem. Quando os filtros usados são
+        atendidos pelo resumo pré-calculado (filial, status, vencimento),
+        lê os buckets de ResumoContasPagar em vez de varrer as contas.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        agregados = {}
+        for consulta, agregacoes in self.consultas_estatisticas(queryset):
+            agregados.update(consulta.aggregate(**agregacoes))
+        return Response(self.formatar_estatisticas(agregados))
+
+    def consultas_estatisticas(self, queryset):
+        """
+        Consultas das estatísticas como pares (queryset, agregações), sem executá-las:
+        a view síncrona usa aggregate() e a assíncrona (views_async.py), aaggregate().
+        """
+        request = self.request
         hoje = date.today()
         proximos_7_dias = hoje + timedelta(days=7)
-        
+
         # Contas não pagas (pendente, vencida ou paga_parcial)
-        contas_nao_pagas = queryset.filter(
-            Q(status='pendente') | Q(status='vencida') | Q(status='paga_parcial')
-        )
-        
-        # Total pendente (soma do valor restante de todas as contas não pagas)
-        total_pendente = sum(
-            (conta.valor_final - (conta.valor_pago or 0)) 
-            for conta in contas_nao_pagas
-        )
-        
-        # Contas vencidas (status='vencida' OU status='pendente' com data < hoje)
-        contas_vencidas = queryset.filter(
-            Q(status='vencida') | 
-            (Q(status='pendente') & Q(data_vencimento__lt=hoje))
-        )
-        vencidas_count = contas_vencidas.count()
-        vencidas_valor = sum(
-            (conta.valor_final - (conta.valor_pago or 0)) 
-            for conta in contas_vencidas
+        nao_pagas = Q(status__in=['pendente', 'vencida', 'paga_parcial'])
+
+        # Contas vencidas (mantidas em dia pela varredura diária: manage.py atualizar_vencidas)
+        vencidas = Q(status='vencida')
+
+        proximos = nao_pagas & Q(data_vencimento__range=(hoje, proximos_7_dias))
+        pagas_hoje = Q(status='paga', data_pagamento=hoje)
+
+        zero = models.Value(Decimal('0'), output_field=models.DecimalField(max_digits=15, decimal_places=2))
+
+        if set(request.query_params) <= PARAMETROS_RESUMO:
+            return [
+                (self.get_resumo_queryset().order_by(), {
+                    'total_pendente': Coalesce(Sum('valor_restante', filter=nao_pagas), zero),
+                    'vencidas_count': Coalesce(Sum('quantidade', filter=vencidas), 0),
+                    'vencidas_valor': Coalesce(Sum('valor_restante', filter=vencidas), zero),
+                    'proximos_vencimentos': Coalesce(Sum('quantidade', filter=proximos), 0),
+                }),
+                # data_pagamento não faz parte do resumo: contagem pelo índice (company, status, data_pagamento)
+                (queryset.filter(pagas_hoje).order_by(), {'pagas_hoje': Count('id')}),
+            ]
+
+        return [
+            (queryset.order_by(), {
+                'total_pendente': Coalesce(Sum('valor_restante', filter=nao_pagas), zero),
+                'vencidas_count': Count('id', filter=vencidas),
+                'vencidas_valor': Coalesce(Sum('valor_restante', filter=vencidas), zero),
+                'pagas_hoje': Count('id', filter=pagas_hoje),
+                'proximos_vencimentos': Count('id', filter=proximos),
+            }),
+        ]
+
+    def formatar_estatisticas(self, agregados):
+        return {
+            'total_pendente': float(agregados['total_pendente']),
+            'vencidas_count': agregados['vencidas_count'],
+            'vencidas_valor': float(agregados['vencidas_valor']),
+            'pagas_hoje': agregados['pagas_hoje'],
+            'proximos_vencimentos': agregados['proximos_vencimentos']
+        }
+
+    def get_resumo_queryset(self):
+        """Buckets do resumo da company do usuário, com os filtros da requisição"""
+        company = self.request.user.company
+        if not company:
+            return ResumoContasPagar.objects.none()
+
+        filterset = ResumoContasPagarFilter(
+            self.request.query_params,
+            queryset=ResumoContasPagar.objects.filter(company=company),
+            request=self.request
         )
-        
-        # Contas pagas hoje
-        pagas_hoje = queryset.filter(
-            status='paga',
-            data_pagamento=hoje
-        ).count()
-        
-        # Próximos vencimentos (próximos 7 dias, não pagas)
-        proximos_vencimentos = contas_nao_pagas.filter(
-            data_vencimento__gte=hoje,
-            data_vencimento__lte=proximos_7_dias
-        ).count()
-        
-        return Response({
-            'total_pendente': float(total_pendente),
-            'vencidas_count': vencidas_count,
-            'vencidas_valor': float(vencidas_valor),
-            'pagas_hoje': pagas_hoje,
-            'proximos_vencimentos': proximos_vencimentos
-        })
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return filterset.qs
     
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporta as contas filtradas em CSV (?formato=csv, padrão) ou NDJSON
+        (?formato=ndjson) via streaming. Aceita os mesmos filtros e busca da
+        listagem; as linhas são lidas do banco em lotes por cursor no servidor,
+        então o consumo de memória não depende do volume exportado.
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in exportacao.FORMATOS:
+            return Response(
+                {'error': 'Formato inválido. Use csv ou ndjson.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        conteudo = exportacao.gerar(formato, exportacao.linhas(self.get_export_queryset()))
+        response = StreamingHttpResponse(conteudo, content_type=exportacao.FORMATOS[formato])
+        nome_arquivo = f"contas_pagar_{date.today():%Y%m%d}.{formato}"
+        response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+        return response
+
+    def get_export_queryset(self):
+        """Queryset da exportação: mesmos filtros e busca da listagem"""
+        return self.filter_queryset(self.get_queryset())
+
     @action(detail=False, methods=['get'])
     def pendentes(self, request):
         """Retorna apenas contas pendentes"""
@@ -228,36 +674,453 @@ class ContasPagarViewSet(BaseCompanyViewSet):
     def pagar(self, request, pk=None):
         """Marca uma conta como paga"""
         conta = self.get_object()
-        valor_pago = request.data.get('valor_pago', conta.valor_final)
-        data_pagamento = request.data.get('data_pagamento')
+
+        pagamento = PagamentoContaPagarSerializer(data=request.data)
+        if not pagamento.is_valid():
+            return Response(
+                {'error': _mensagem_erros(pagamento.errors)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        dados = pagamento.validated_data
+        self._aplicar_pagamento(conta, dados.get('valor_pago', conta.valor_final), dados.get('data_pagamento'))
+        conta.save()
         
+        serializer = self.get_serializer(conta)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['post'], url_path='pagar-lote')
+    def pagar_lote(self, request):
+        """
+        Paga várias contas em uma única requisição e transação.
+
+        Corpo: {"pagamentos": [{"id": "...", "valor_pago": 100.0, "data_pagamento": "2025-01-31"}, ...],
+                "data_pagamento": "2025-01-31"}
+        `valor_pago` é opcional (padrão: valor final da conta) e `data_pagamento`
+        por item sobrepõe a data geral. Cada item é validado pelo PagamentoContaPagarSerializer
+        (valor não negativo, data válida); um item inválido vira erro só dele. Uma conta
+        repetida na lista não é paga (erro em cada item). As contas são travadas com um único
+        SELECT ... FOR UPDATE e gravadas com bulk_update. Retorna o resultado por item.
+        """
+        pagamentos = request.data.get('pagamentos')
+        if not isinstance(pagamentos, list) or not pagamentos:
+            return Response(
+                {'error': 'Informe a lista de pagamentos.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        geral = PagamentoContaPagarSerializer(data={'data_pagamento': request.data.get('data_pagamento')})
+        if not geral.is_valid():
+            return Response({'error': _mensagem_erros(geral.errors)}, status=status.HTTP_400_BAD_REQUEST)
+        data_padrao = geral.validated_data['data_pagamento']
+
+        resultados = []
+        lidos = []
+        for item in pagamentos:
+            item_id = item.get('id') if isinstance(item, dict) else item
+            try:
+                lidos.append((uuid.UUID(str(item_id)), item if isinstance(item, dict) else {}))
+            except ValueError:
+                resultados.append({'id': item_id, 'sucesso': False, 'erro': 'ID inválido'})
+
+        # Conta repetida na lista: não se sabe qual pagamento vale, então nenhum é aplicado
+        ocorrencias = Counter(conta_id for conta_id, _ in lidos)
+        validos = {}
+        for conta_id, item in lidos:
+            if ocorrencias[conta_id] > 1:
+                resultados.append({'id': str(conta_id), 'sucesso': False, 'erro': 'ID repetido na lista'})
+                continue
+
+            pagamento = PagamentoContaPagarSerializer(data=item)
+            if pagamento.is_valid():
+                validos[conta_id] = pagamento.validated_data
+            else:
+                resultados.append({'id': str(conta_id), 'sucesso': False, 'erro': _mensagem_erros(pagamento.errors)})
+
+        with transaction.atomic():
+            contas = {
+                conta.id: conta
+                for conta in self.get_queryset().select_related(None).select_for_update().filter(id__in=validos)
+            }
+
+            alteradas = []
+            alteracoes_resumo = []
+            agora = timezone.now()
+            for conta_id, dados in validos.items():
+                conta = contas.get(conta_id)
+                if conta is None:
+                    resultados.append({'id': str(conta_id), 'sucesso': False, 'erro': 'Conta não encontrada'})
+                    continue
+
+                anterior = conta._estado_resumo
+                self._aplicar_pagamento(
+                    conta, dados.get('valor_pago', conta.valor_final), dados.get('data_pagamento') or data_padrao
+                )
+                conta.normalizar()
+                conta.updated_by = request.user
+                conta.updated_at = agora
+                conta._estado_resumo = estado_resumo(conta)
+
+                alteradas.append(conta)
+                alteracoes_resumo.append((anterior, conta._estado_resumo))
+                resultados.append({
+                    'id': str(conta_id),
+                    'sucesso': True,
+                    'status': conta.status,
+                    'valor_pago': conta.valor_pago,
+                    'valor_restante': conta.valor_restante,
+                    'data_pagamento': conta.data_pagamento,
+                })
+
+            ContasPagar.objects.bulk_update(
+                alteradas,
+                ['valor_pago', 'valor_restante', 'percentual_pago', 'data_pagamento', 'status', 'updated_by', 'updated_at'],
+                batch_size=500
+            )
+            registrar_alteracoes_em_lote(alteracoes_resumo)
+
+        return Response({
+            'pagas': len(alteradas),
+            'erros': len(resultados) - len(alteradas),
+            'resultados': resultados,
+        })
+
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Operações em massa: atualizar, cancelar ou excluir várias contas de uma vez.
+
+        Corpo: {"operacao": "atualizar" | "cancelar" | "excluir",
+                "ids": [...]  OU  "filtros": {"status": "pendente", "fornecedor": "<uuid>", ...},
+                "categoria": "<uuid>", "fornecedor": ..., "filial": ..., "forma_pagamento": ...,
+                "data_vencimento": "2025-02-10"}
+        `filtros` aceita os mesmos parâmetros do ContasPagarFilter. A alteração é
+        feita com um único UPDATE/DELETE restrito à company do usuário.
+        """
+        serializer = OperacaoLoteContasPagarSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        dados = serializer.validated_data
+        operacao = dados['operacao']
+
+        queryset = self._queryset_lote(dados)
+
+        with transaction.atomic():
+            if operacao == 'excluir':
+                _, por_modelo = queryset.delete()
+                return Response({
+                    'operacao': operacao,
+                    'afetadas': por_modelo.get(ContasPagar._meta.label, 0),
+                })
+
+            chaves = chaves_resumo(queryset)
+            valores = dict(dados['valores'])
+            if operacao == 'cancelar':
+                valores = {'status': 'cancelada'}
+            elif valores.get('data_vencimento') and valores['data_vencimento'] < date.today():
+                # Mesma regra do save(): pendente com vencimento passado vira vencida
+                valores['status'] = models.Case(
+                    models.When(status='pendente', then=models.Value('vencida')),
+                    default=F('status')
+                )
+
+            # Fornecedor/vencimento entram na assinatura: guarda os ids antes (o filtro pode deixar de casar)
+            ids = None
+            if {'fornecedor', 'data_vencimento'} & set(valores):
+                ids = list(queryset.values_list('id', flat=True))
+
+            afetadas = queryset.update(updated_by=request.user, updated_at=timezone.now(), **valores)
+            recalcular_buckets(chaves | self._chaves_apos_lote(chaves, dados['valores'], operacao))
+            if ids is not None:
+                ContasPagar.objects.filter(id__in=ids).recalcular_assinaturas()
+
+        return Response({'operacao': operacao, 'afetadas': afetadas})
+
+    def _queryset_lote(self, dados):
+        """Contas alvo da operação em massa: por ids ou pelos filtros da listagem"""
+        queryset = self.get_queryset()
+        if dados.get('ids'):
+            return queryset.filter(id__in=dados['ids'])
+
+        filtros = dados['filtros']
+        desconhecidos = set(filtros) - set(ContasPagarFilter.base_filters)
+        if desconhecidos:
+            raise ValidationError({'filtros': f'Filtros desconhecidos: {", ".join(sorted(desconhecidos))}'})
+
+        # Listas viram valores separados por vírgula, como na query string
+        filtros = {
+            chave: ','.join(map(str, valor)) if isinstance(valor, list) else valor
+            for chave, valor in filtros.items()
+        }
+        filterset = ContasPagarFilter(filtros, queryset=queryset, request=self.request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+
+        # O django-filter ignora valores vazios: {"status": ""} atingiria todas as contas da company
+        if all(valor in EMPTY_VALUES for valor in filterset.form.cleaned_data.values()):
+            raise ValidationError({'filtros': 'Informe ao menos um filtro com valor.'})
+        return filterset.qs
+
+    def _chaves_apos_lote(self, chaves, valores, operacao):
+        """Buckets do resumo que as contas passam a ocupar após o UPDATE em massa"""
+        novas = set()
+        for company_id, filial_id, status_conta, vencimento in chaves:
+            filial = valores['filial'].pk if 'filial' in valores else filial_id
+            vencimento = valores.get('data_vencimento', vencimento)
+            if operacao == 'cancelar':
+                novas.add((company_id, filial, 'cancelada', vencimento))
+            else:
+                novas.add((company_id, filial, status_conta, vencimento))
+                novas.add((company_id, filial, 'vencida', vencimento))
+        return novas
+
+    @action(detail=False, methods=['get', 'post'], url_path='notas-fiscais')
+    def notas_fiscais(self, request):
+        """
+        Conciliação de NFs: retorna as contas de cada número informado, numa única consulta.
+        GET ?numeros=123,456 ou POST {"numeros": ["123", "456", ...]} (lotes grandes).
+        """
+        numeros = request.data.get('numeros') if request.method == 'POST' else request.query_params.get('numeros')
+        if isinstance(numeros, list):
+            numeros = ','.join(map(str, numeros))
+        numeros = numeros_nota_fiscal(numeros)
+        if not numeros:
+            return Response(
+                {'error': 'Informe os números das notas fiscais.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        notas = NotaFiscalContaPagar.objects.filter(
+            company=request.user.company, numero__in=numeros
+        ).select_related('conta__filial', 'conta__fornecedor', 'conta__categoria')
+
+        contas_por_numero = {}
+        for nota in notas:
+            contas_por_numero.setdefault(nota.numero, []).append(nota.conta)
+
+        return Response({
+            'encontradas': [
+                {'numero': numero, 'contas': ContasPagarListSerializer(contas_por_numero[numero], many=True).data}
+                for numero in numeros if numero in contas_por_numero
+            ],
+            'nao_encontradas': [numero for numero in numeros if numero not in contas_por_numero],
+        })
+
+    @action(detail=False, methods=['post'])
+    def duplicatas(self, request):
+        """
+        Verifica se as contas informadas já existem (mesmo fornecedor, boleto, valor e vencimento).
+        POST {"contas": [{"fornecedor", "numero_boleto", "valor_original", "data_vencimento"}, ...]}
+        Uma única consulta pelo índice (company, assinatura), qualquer que seja o tamanho do lote.
+        """
+        serializer = VerificacaoDuplicatasSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        assinaturas = [
+            assinatura_conta(c['fornecedor'], c['numero_boleto'], c['valor_original'], c['data_vencimento'])
+            for c in serializer.validated_data['contas']
+        ]
+
+        existentes = {}
+        contas = ContasPagar.objects.filter(
+            company=request.user.company, assinatura__in=set(assinaturas)
+        ).select_related('filial', 'fornecedor', 'categoria')
+        for conta in contas:
+            existentes.setdefault(conta.assinatura, []).append(conta)
+
+        # Duplicatas dentro do próprio lote: índice da primeira ocorrência
+        primeira = {}
+        duplicatas = []
+        for indice, assinatura in enumerate(assinaturas):
+            repetida_de = primeira.setdefault(assinatura, indice)
+            if assinatura in existentes or repetida_de != indice:
+                duplicatas.append({
+                    'indice': indice,
+                    'repetida_no_lote': repetida_de if repetida_de != indice else None,
+                    'contas': ContasPagarListSerializer(existentes.get(assinatura, []), many=True).data,
+                })
+
+        return Response({'total': len(assinaturas), 'duplicatas': duplicatas})
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def alteracoes(self, request):
+        """
+        Sincronização incremental: contas criadas/alteradas e ids excluídos desde ?since=<versao>.
+        Sem since retorna todas as contas. Enquanto tem_mais for true, repita com a versão
+        retornada; ao terminar, guarde a versão para a próxima sincronização.
+        Versões mais antigas que a retenção das exclusões respondem 410 (refazer a cópia completa).
+        Exige Postgres (marca d'água por transação, ver financeiro/sincronizacao.py).
+        """
+        company = request.user.company
+        if not company:
+            raise PermissionDenied('Usuário não possui empresa associada.')
+        if not sincronizacao.disponivel():
+            return Response(
+                {'error': 'Sincronização incremental disponível apenas com PostgreSQL.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
         try:
-            if isinstance(valor_pago, float):
-                valor_pago = Decimal(str(valor_pago))
-            elif isinstance(valor_pago, str):
-                valor_pago = Decimal(valor_pago)
-            elif isinstance(valor_pago, int):
-                valor_pago = Decimal(str(valor_pago))
-        except (ValueError, TypeError):
+            limite = int(request.query_params.get('limite', sincronizacao.LIMITE_PADRAO))
+        except ValueError:
+            limite = 0
+        if not 1 <= limite <= sincronizacao.LIMITE_MAXIMO:
             return Response(
-                {'error': 'Valor de pagamento inválido'}, 
+                {'error': f'Limite inválido. Use um inteiro entre 1 e {sincronizacao.LIMITE_MAXIMO}.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
+
+        posicao = None
+        if request.query_params.get('since'):
+            posicao = sincronizacao.decodificar_versao(request.query_params['since'])
+            if sincronizacao.versao_expirada(posicao):
+                return Response(
+                    {'error': 'Versão expirada. Refaça a sincronização completa (sem since).'},
+                    status=status.HTTP_410_GONE
+                )
+
+        queryset = ContasPagar.objects.filter(company=company).select_related('filial', 'fornecedor', 'categoria')
+        contas, excluidas, proxima, tem_mais = sincronizacao.alteracoes(queryset, company.id, posicao, limite)
+        return Response({
+            'versao': proxima,
+            'tem_mais': tem_mais,
+            'alteradas': ContasPagarListSerializer(contas, many=True).data,
+            'excluidas': excluidas,
+        })
+
+    def _grupo_queryset(self, grupo):
+        """Contas do grupo (parcelamento ou recorrência) na company do usuário; 404 se não houver"""
+        queryset = self.get_queryset().filter(grupo_parcelamento=grupo)
+        if not queryset.exists():
+            raise NotFound('Grupo não encontrado.')
+        return queryset
+
+    @action(detail=False, methods=['get'], url_path=GRUPO_URL)
+    def grupo(self, request, grupo=None):
+        """Lista todas as contas de um grupo, em ordem de vencimento"""
+        queryset = self._grupo_queryset(grupo).order_by('data_vencimento', 'parcela_atual')
+        serializer = ContasPagarListSerializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['post'], url_path=GRUPO_URL + '/reagendar')
+    def reagendar_grupo(self, request, grupo=None):
+        """
+        Soma N dias ao vencimento de todas as contas em aberto do grupo, num único UPDATE.
+        Corpo: {"dias": 10}. Pendente/vencida é recalculado pela nova data.
+        """
+        serializer = ReagendamentoGrupoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        deslocamento = timedelta(days=serializer.validated_data['dias'])
+
+        queryset = self._grupo_queryset(grupo).filter(status__in=STATUS_EM_ABERTO)
+        if self._colisoes_reagendamento(queryset, deslocamento):
+            # Recorrência: o novo vencimento coincide com o de outra ocorrência já paga/cancelada
+            raise ValidationError({'dias': 'O reagendamento coincide com vencimentos já existentes na série.'})
+        try:
+            afetadas = self._reagendar(queryset, grupo, deslocamento)
+        except IntegrityError:
+            # Colisão criada por uma gravação concorrente (a constraint é verificada no commit)
+            raise ValidationError({'dias': 'O reagendamento coincide com vencimentos já existentes na série.'})
+
+        return Response({'grupo': grupo, 'afetadas': afetadas})
+
+    def _colisoes_reagendamento(self, queryset, deslocamento):
+        """
+        Ocorrências fora do conjunto reagendado (pagas/canceladas da série) que já ocupam
+        algum dos novos vencimentos. Dentro do conjunto não há colisão: a série inteira
+        se desloca e contaspagar_ocorrencia_unica só é verificada no commit.
+        """
+        novos = {
+            (regra_id, vencimento + deslocamento)
+            for regra_id, vencimento in queryset.filter(regra_recorrencia__isnull=False)
+            .values_list('regra_recorrencia_id', 'data_vencimento')
+        }
+        if not novos:
+            return False
+        ocupados = ContasPagar.objects.filter(
+            regra_recorrencia_id__in={regra_id for regra_id, _ in novos},
+            data_vencimento__in={vencimento for _, vencimento in novos},
+        ).exclude(id__in=queryset.values('id')).values_list('regra_recorrencia_id', 'data_vencimento')
+        return any(ocupado in novos for ocupado in ocupados)
+
+    @transaction.atomic
+    def _reagendar(self, queryset, grupo, deslocamento):
+        """UPDATE dos vencimentos + resumo + regra de recorrência do grupo"""
+        chaves = chaves_resumo(queryset)
+        afetadas = queryset.update(
+            data_vencimento=models.ExpressionWrapper(
+                F('data_vencimento') + deslocamento, output_field=models.DateField()
+            ),
+            # A condição usa o vencimento antigo: antigo + N < hoje  ⇔  antigo < hoje - N
+            status=models.Case(
+                models.When(data_vencimento__lt=date.today() - deslocamento, then=models.Value('vencida')),
+                default=models.Value('pendente')
+            ),
+            updated_by=self.request.user,
+            updated_at=timezone.now(),
+        )
+        novas = {
+            (company_id, filial_id, status_conta, vencimento + deslocamento)
+            for company_id, filial_id, _, vencimento in chaves
+            for status_conta in STATUS_EM_ABERTO
+        }
+        recalcular_buckets(chaves | novas)
+        queryset.recalcular_assinaturas()
+
+        # Série recorrente: as próximas ocorrências seguem o novo calendário
+        RegraRecorrencia.objects.filter(pk=grupo, company=self.request.user.company).update(
+            data_inicio=models.ExpressionWrapper(F('data_inicio') + deslocamento, output_field=models.DateField()),
+            proximo_vencimento=models.ExpressionWrapper(
+                F('proximo_vencimento') + deslocamento, output_field=models.DateField()
+            ),
+        )
+
+        return afetadas
+
+    @action(detail=False, methods=['post'], url_path=GRUPO_URL + '/cancelar')
+    def cancelar_grupo(self, request, grupo=None):
+        """Cancela o restante do grupo (contas em aberto) num único UPDATE"""
+        queryset = self._grupo_queryset(grupo).filter(status__in=STATUS_EM_ABERTO)
+        with transaction.atomic():
+            chaves = chaves_resumo(queryset)
+            afetadas = queryset.update(status='cancelada', updated_by=request.user, updated_at=timezone.now())
+            recalcular_buckets(chaves | {(c, f, 'cancelada', d) for c, f, _, d in chaves})
+
+            # Série recorrente: encerra a regra para não gerar novas ocorrências
+            RegraRecorrencia.objects.filter(pk=grupo, company=request.user.company).update(ativa=False)
+
+        return Response({'grupo': grupo, 'afetadas': afetadas})
+
+    @action(detail=False, methods=['post'], url_path=GRUPO_URL + '/alterar')
+    def alterar_grupo(self, request, grupo=None):
+        """
+        Troca fornecedor/categoria/forma de pagamento das contas em aberto do grupo, num único UPDATE.
+        Corpo: {"fornecedor": "<uuid>", "categoria": "<uuid>", "forma_pagamento": "<uuid>"}
+        """
+        serializer = AlteracaoGrupoSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        valores = serializer.validated_data
+
+        queryset = self._grupo_queryset(grupo).filter(status__in=STATUS_EM_ABERTO)
+        with transaction.atomic():
+            # Não muda filial/status/vencimento: o resumo não é afetado
+            afetadas = queryset.update(updated_by=request.user, updated_at=timezone.now(), **valores)
+            if 'fornecedor' in valores:
+                queryset.recalcular_assinaturas()
+            RegraRecorrencia.objects.filter(pk=grupo, company=request.user.company).update(**valores)
+
+        return Response({'grupo': grupo, 'afetadas': afetadas})
+
+    def _aplicar_pagamento(self, conta, valor_pago, data_pagamento):
+        """Regras de pagamento compartilhadas entre pagar e pagar-lote"""
         conta.valor_pago = valor_pago
         if data_pagamento:
             conta.data_pagamento = data_pagamento
-        
+
         # Atualizar status baseado no valor pago
         if valor_pago >= conta.valor_final:
             conta.status = 'paga'
         else:
             conta.status = 'pendente'
-            
-        conta.save()
-        
-        serializer = self.get_serializer(conta)
-        return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
     def cancelar(self, request, pk=None):
@@ -279,7 +1142,6 @@ class ContasPagarViewSet(BaseCompanyViewSet):
         quantidade = int(data.get('quantidade_recorrencias', 1))
         e_recorrente = data.get('e_recorrente', False)
         frequencia = data.get('frequencia_recorrencia')
-        contas_criadas = []
 
         # Serializa e valida os dados de entrada
         serializer = self.get_serializer(data=data)
@@ -290,56 +1152,83 @@ class ContasPagarViewSet(BaseCompanyViewSet):
             self.perform_create(serializer)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        # Caso seja recorrente → cria várias contas com vencimentos diferentes
-        primeira_data = serializer.validated_data['data_vencimento']
-
-        for i in range(quantidade):
-            nova_data = self._adicionar_periodo(primeira_data, frequencia, i)
-            nova_conta_data = serializer.validated_data.copy()
-
-            # 🔹 Remove campos que não pertencem ao modelo
-            nova_conta_data.pop('quantidade_recorrencias', None)
+        # Caso seja recorrente → grava a regra e materializa só as ocorrências do horizonte
+        contas_criadas = self._criar_recorrencia(serializer.validated_data, quantidade, frequencia)
 
-            # 🔹 Ajusta campos dinâmicos
-            nova_conta_data['data_vencimento'] = nova_data
-            nova_conta_data['descricao'] = f"{nova_conta_data['descricao']} ({i+1}/{quantidade})"
-            nova_conta_data['e_recorrente'] = True
-            nova_conta_data['grupo_parcelamento'] = uuid.uuid4()
+        # Serializa o retorno com todas as contas criadas
+        output_serializer = self.get_serializer(contas_criadas, many=True)
+        return Response(output_serializer.data, status=status.HTTP_201_CREATED)
 
-            # 🔹 Define empresa e usuário criador (compatível com BaseCompanyModel)
-            company = getattr(request.user, 'company', None)
-            if company:
-                nova_conta_data['company'] = company
-            nova_conta_data['created_by'] = request.user
-            nova_conta_data['updated_by'] = request.user
 
-            # Cria a nova conta
-            conta = ContasPagar.objects.create(**nova_conta_data)
-            contas_criadas.append(conta)
+    @action(detail=False, methods=['post'])
+    def parcelar(self, request):
+        """
+        Cria uma compra parcelada: valor_original/desconto/juros/multa são os TOTAIS
+        da compra, total_parcelas a quantidade e frequencia_parcelas o intervalo entre
+        vencimentos (data_vencimento é o da 1ª parcela). Ação separada do POST comum,
+        que continua gravando uma conta por requisição (inclusive parcelas já divididas
+        pelo cliente, com e_parcelada/parcela_atual/total_parcelas).
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        # Serializa o retorno com todas as contas criadas
+        contas_criadas = self._criar_parcelas(serializer.validated_data)
         output_serializer = self.get_serializer(contas_criadas, many=True)
         return Response(output_serializer.data, status=status.HTTP_201_CREATED)
 
+    def _criar_parcelas(self, dados):
+        """Divide os valores totais em total_parcelas e grava todas as parcelas de uma vez"""
+        dados = dados.copy()
+        total_parcelas = dados.pop('total_parcelas', 1)
+        frequencia = dados.pop('frequencia_parcelas', 'mensal')
+        for campo in ['quantidade_recorrencias', 'e_parcelada', 'parcela_atual', 'grupo_parcelamento']:
+            dados.pop(campo, None)
+
+        if total_parcelas < 2:
+            raise ValidationError({'total_parcelas': 'Informe ao menos 2 parcelas.'})
+        if total_parcelas > parcelamento.MAX_PARCELAS:
+            raise ValidationError({'total_parcelas': f'Máximo de {parcelamento.MAX_PARCELAS} parcelas.'})
+        if dados['valor_original'] < total_parcelas * parcelamento.CENTAVO:
+            raise ValidationError({'total_parcelas': 'Valor total insuficiente para a quantidade de parcelas.'})
 
-    def _adicionar_periodo(self, data_inicial, frequencia, n):
-        if not data_inicial or n == 0:
-            return data_inicial
-
-        if frequencia == 'semanal':
-            return data_inicial + timedelta(weeks=n)
-        elif frequencia == 'quinzenal':
-            return data_inicial + timedelta(days=15 * n)
-        elif frequencia == 'mensal':
-            return data_inicial + relativedelta(months=n)
-        elif frequencia == 'bimestral':
-            return data_inicial + relativedelta(months=2 * n)
-        elif frequencia == 'trimestral':
-            return data_inicial + relativedelta(months=3 * n)
-        elif frequencia == 'semestral':
-            return data_inicial + relativedelta(months=6 * n)
-        elif frequencia == 'anual':
-            return data_inicial + relativedelta(years=n)
-
-        # Caso a frequência não seja reconhecida, retorna a data original
-        return data_inicial
+        user = self.request.user
+        dados['company'] = user.company
+        dados['created_by'] = user
+        dados['updated_by'] = user
+        return parcelamento.criar_parcelas(dados, total_parcelas, frequencia)
+
+    def _criar_recorrencia(self, dados, quantidade, frequencia):
+        """
+        Cria a RegraRecorrencia da série e materializa as ocorrências dentro
+        do horizonte (ao menos a primeira). As demais são geradas conforme o
+        horizonte avança (manage.py materializar_recorrencias) ou sob demanda.
+        """
+        if frequencia not in dict(ContasPagar.FREQUENCIA_CHOICES):
+            raise ValidationError({'frequencia_recorrencia': 'Informe uma frequência válida para a recorrência.'})
+
+        user = self.request.user
+        with transaction.atomic():
+            regra = RegraRecorrencia.objects.create(
+                company=user.company,
+                filial=dados['filial'],
+                fornecedor=dados['fornecedor'],
+                categoria=dados['categoria'],
+                forma_pagamento=dados.get('forma_pagamento'),
+                descricao=dados['descricao'],
+                valor_original=dados['valor_original'],
+                desconto=dados.get('desconto', 0),
+                juros=dados.get('juros', 0),
+                multa=dados.get('multa', 0),
+                notas_fiscais=dados.get('notas_fiscais', ''),
+                numero_boleto=dados.get('numero_boleto', ''),
+                observacoes=dados.get('observacoes', ''),
+                frequencia=frequencia,
+                data_inicio=dados['data_vencimento'],
+                quantidade_total=quantidade,
+                created_by=user,
+                updated_by=user,
+            )
+            return recorrencia.materializar(
+                RegraRecorrencia.objects.filter(pk=regra.pk),
+                max(recorrencia.horizonte_padrao(), regra.data_inicio)
+            )
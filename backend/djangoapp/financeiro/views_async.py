@@ -0,0 +1,162 @@
+"""
+Leituras assíncronas de contas a pagar: listagem, detalhe, estatísticas,
+os atalhos pendentes/vencidas/pagas e o feed de eventos (SSE).
+
+O DRF 3.14 não tem views assíncronas, então estas são views `async def` do
+Django, servidas pelo project/asgi.py (uvicorn/daphne). Filtros, busca,
+paginação e serializers são os do ContasPagarViewSet; só as consultas mudam
+para o ORM assíncrono (acount/aget/aaggregate/async for), de modo que um
+worker ASGI atende outras requisições enquanto espera o Postgres.
+As respostas são as mesmas de /api/financeiro/contas-pagar/.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+from rest_framework.exceptions import APIException, MethodNotAllowed, NotAuthenticated, NotFound, PermissionDenied
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.authentication import CachedJWTAuthentication
+from . import eventos as feed, listagem, versao
+from .models import ContasPagar
+from .views import ContasPagarViewSet
+
+
+# Relacionamentos lidos pelo ContasPagarSerializer (inclusive o `company` dos aninhados):
+# no contexto assíncrono não pode haver carga preguiçosa de FK
+RELACOES_DETALHE = [
+    'company', 'filial__company', 'fornecedor__company',
+    'categoria__company', 'forma_pagamento__company',
+]
+
+
+def _autenticar(request):
+    """Usuário do token JWT (reaproveita a autenticação já feita pelo CompanyMiddleware)"""
+    resultado = CachedJWTAuthentication().authenticate(request)
+    if resultado is None:
+        raise NotAuthenticated()
+    return resultado[0]
+
+
+def leitura_async(acao, condicional=False):
+    """
+    Decora uma leitura assíncrona: exige GET e JWT, monta o ContasPagarViewSet
+    da requisição (`acao` define serializer e materialização de recorrências)
+    e converte o retorno/erros do DRF em JsonResponse.
+    `condicional`: ETag/304 pela versão dos dados, como o get_condicional das views síncronas.
+    """
+    def decorator(funcao):
+        @wraps(funcao)
+        async def view(request, *args, **kwargs):
+            try:
+                if request.method != 'GET':
+                    raise MethodNotAllowed(request.method)
+
+                drf_request = Request(request)
+                drf_request.user = await sync_to_async(_autenticar)(request)
+
+                etag = None
+                if condicional and drf_request.user.company:
+                    etag = await sync_to_async(versao.etag)(drf_request.user.company.id, request)
+                    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                        return _condicional(HttpResponseNotModified(), etag)
+
+                viewset = ContasPagarViewSet(
+                    request=drf_request, action=acao, format_kwarg=None, args=args, kwargs=kwargs
+                )
+                dados = await funcao(viewset, *args, **kwargs)
+            except APIException as exc:
+                detalhe = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+                return JsonResponse(detalhe, status=exc.status_code, encoder=JSONEncoder, safe=False)
+            response = JsonResponse(dados, encoder=JSONEncoder, safe=False)
+            return _condicional(response, etag) if etag else response
+        return view
+    return decorator
+
+
+def _condicional(response, etag):
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+async def _filtrar(viewset):
+    # Os filtros podem consultar o banco (busca nos fornecedores, materialização de recorrências)
+    return await sync_to_async(viewset.filter_queryset)(viewset.get_queryset())
+
+
+@leitura_async('list', condicional=True)
+async def listar(viewset):
+    queryset = listagem.linhas(await _filtrar(viewset))
+    paginator = viewset.paginator
+    itens = await paginator.apaginate_queryset(queryset, viewset.request, view=viewset)
+    return paginator.get_paginated_response(listagem.serializar(itens)).data
+
+
+@leitura_async('retrieve')
+async def detalhar(viewset, pk):
+    try:
+        conta = await viewset.get_queryset().select_related(*RELACOES_DETALHE).aget(pk=pk)
+    except ContasPagar.DoesNotExist:
+        raise NotFound()
+    return viewset.get_serializer(conta).data
+
+
+@leitura_async('estatisticas', condicional=True)
+async def estatisticas(viewset):
+    queryset = await _filtrar(viewset)
+    consultas = await sync_to_async(viewset.consultas_estatisticas)(queryset)
+    agregados = {}
+    for consulta, agregacoes in consultas:
+        agregados.update(await consulta.aaggregate(**agregacoes))
+    return viewset.formatar_estatisticas(agregados)
+
+
+async def _por_status(viewset, status_conta):
+    queryset = viewset.get_queryset().select_related(*RELACOES_DETALHE).filter(status=status_conta)
+    return viewset.get_serializer([conta async for conta in queryset], many=True).data
+
+
+@leitura_async('pendentes')
+async def pendentes(viewset):
+    return await _por_status(viewset, 'pendente')
+
+
+@leitura_async('vencidas')
+async def vencidas(viewset):
+    return await _por_status(viewset, 'vencida')
+
+
+@leitura_async('pagas')
+async def pagas(viewset):
+    return await _por_status(viewset, 'paga')
+
+
+async def eventos(request):
+    """
+    Feed SSE das alterações de contas da company do usuário (financeiro/eventos.py):
+    `event: conta` com id, operação, status, valores e vencimento; `event: recarregar`
+    quando eventos foram descartados. Exige ASGI e Postgres (LISTEN/NOTIFY).
+    """
+    try:
+        if request.method != 'GET':
+            raise MethodNotAllowed(request.method)
+        usuario = await sync_to_async(_autenticar)(request)
+        if not usuario.company:
+            raise PermissionDenied('Usuário sem empresa.')
+    except APIException as exc:
+        return JsonResponse({'detail': exc.detail}, status=exc.status_code, encoder=JSONEncoder)
+
+    # Sob WSGI o Django consumiria o stream inteiro de forma síncrona, prendendo um worker por cliente
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Feed de eventos disponível apenas com servidor ASGI.'}, status=503)
+    if not feed.disponivel():
+        return JsonResponse({'detail': 'Feed de eventos disponível apenas com PostgreSQL.'}, status=503)
+
+    response = StreamingHttpResponse(feed.fluxo(usuario.company.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: entregar cada evento sem bufferizar
+    return response
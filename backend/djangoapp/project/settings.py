@@ -144,6 +144,11 @@ MEDIA_URL = '/media/'
 # /data/web/media
 MEDIA_ROOT = DATA_DIR / 'media'
 
+# Arquivos privados (entrada e resultado das tarefas): fora do MEDIA_ROOT, que
+# o nginx serve sem autenticação. Só saem pela API (/tarefas/{id}/download/)
+# /data/web/privado
+PRIVATE_MEDIA_ROOT = DATA_DIR / 'privado'
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -162,7 +167,7 @@ CORS_ALLOW_CREDENTIALS = True
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -194,3 +199,25 @@ SIMPLE_JWT = {
 }
 
 AUTH_USER_MODEL = 'authentication.CustomUser'
+
+# Cache (usuários autenticados, etc.): Redis compartilhado se REDIS_URL, senão memória do processo
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Tempo (s) que o usuário autenticado (com a company) fica em cache
+JWT_CACHE_USUARIO_SEGUNDOS = int(os.getenv('JWT_CACHE_USUARIO_SEGUNDOS', 60))
+
+# Financeiro
+# Ocorrências de contas recorrentes são materializadas até hoje + N dias
+FINANCEIRO_HORIZONTE_RECORRENCIA_DIAS = int(os.getenv('FINANCEIRO_HORIZONTE_RECORRENCIA_DIAS', 90))
@@ -13,4 +13,5 @@ echo "✅ Postgres Database Started Successfully ($POSTGRES_HOST:$POSTGRES_PORT)
 python manage.py collectstatic --noinput
 python manage.py makemigrations --noinput
 python manage.py migrate --noinput
-python manage.py runserver 0.0.0.0:8000
+# Servidor ASGI: views assíncronas e o feed de eventos (SSE) precisam dele
+uvicorn project.asgi:application --host 0.0.0.0 --port 8000 --reload
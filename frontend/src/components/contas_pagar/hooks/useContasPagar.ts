@@ -1,5 +1,5 @@
 import { useState, useEffect, useCallback } from 'react';
-import { contasPagarService, filiaisService, categoriasService, fornecedoresService } from '@/services/contas-pagar.service';
+import { contasPagarService, opcoesService } from '@/services/contas-pagar.service';
 import { useToast } from '@/hooks/use-toast';
 import type { ContaPagar, Options, Filters } from '@/types/contasPagar';
 
@@ -106,11 +106,7 @@ export function useContasPagar(filters?: Filters, searchTerm?: string) {
 
   const fetchOptions = useCallback(async () => {
     try {
-      const [filiais, categorias, fornecedores] = await Promise.all([
-        filiaisService.listar(),
-        categoriasService.listar(),
-        fornecedoresService.listar()
-      ]);
+      const { filiais, categorias, fornecedores } = await opcoesService.obter();
 
       setOptions({
         filiais: filiais.map((f: any) => ({ value: f.id, label: f.nome })),
@@ -43,10 +43,7 @@ import { toast } from "sonner";
 
 // Services
 import {
-  filiaisService,
-  fornecedoresService,
-  categoriasService,
-  formasPagamentoService,
+  opcoesService,
   contasPagarService,
 } from "@/services/contas-pagar.service";
 
@@ -124,59 +121,32 @@ export default function ContasPagarForm() {
     setErrorMessage("");
 
     try {
-      // Tenta carregar cada endpoint separadamente para identificar qual está falhando
-      try {
-        const filiaisData = await filiaisService.listar();
-        setFiliais(
-          filiaisData
-            .filter((f) => f.ativa)
-            .map((f) => ({ value: f.id, label: f.nome.toUpperCase() }))
-        );
-      } catch (error: any) {
-        console.error("❌ Erro ao carregar filiais:", error);
-        console.error("Detalhes:", error.response?.data || error.message);
-      }
-
-      try {
-        const fornecedoresData = await fornecedoresService.listar();
-        setFornecedores(
-          fornecedoresData
-            .filter((f) => f.ativo)
-            .map((f) => ({
-              value: f.id,
-              label: (f.nome_fantasia || f.nome).toUpperCase()
-            }))
-        );
-      } catch (error: any) {
-        console.error("❌ Erro ao carregar fornecedores:", error);
-        console.error("Detalhes:", error.response?.data || error.message);
-      }
-
-      try {
-        const categoriasData = await categoriasService.listar();
-        setCategorias(
-          categoriasData
-            .filter((c) => c.ativa && c.tipo === 'despesa')
-            .map((c) => ({ value: c.id, label: c.nome.toUpperCase() }))
-        );
-      } catch (error: any) {
-        console.error("❌ Erro ao carregar categorias:", error);
-        console.error("Detalhes:", error.response?.data || error.message);
-      }
-
-      try {
-        const formasPagData = await formasPagamentoService.listar();
-        setFormasPagamento(
-          formasPagData
-            .filter((fp) => fp.ativa)
-            .map((fp) => ({ value: fp.id, label: fp.nome.toUpperCase() }))
-        );
-      } catch (error: any) {
-        console.error("❌ Erro ao carregar formas de pagamento:", error);
-        console.error("Detalhes:", error.response?.data || error.message);
-      }
-
-
+      // Todas as opções numa única requisição (revalidada por ETag)
+      const opcoes = await opcoesService.obter();
+
+      setFiliais(
+        opcoes.filiais
+          .filter((f) => f.ativa)
+          .map((f) => ({ value: f.id, label: f.nome.toUpperCase() }))
+      );
+      setFornecedores(
+        opcoes.fornecedores
+          .filter((f) => f.ativo)
+          .map((f) => ({
+            value: f.id,
+            label: (f.nome_fantasia || f.nome).toUpperCase()
+          }))
+      );
+      setCategorias(
+        opcoes.categorias
+          .filter((c) => c.ativa && c.tipo === 'despesa')
+          .map((c) => ({ value: c.id, label: c.nome.toUpperCase() }))
+      );
+      setFormasPagamento(
+        opcoes.formas_pagamento
+          .filter((fp) => fp.ativa)
+          .map((fp) => ({ value: fp.id, label: fp.nome.toUpperCase() }))
+      );
     } catch (error: any) {
       console.error("❌ Erro geral ao carregar dados:", error);
 
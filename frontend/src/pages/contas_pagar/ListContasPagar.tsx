@@ -148,21 +148,31 @@ export default function ContasPagarPage() {
     const handleConfirmarPagamento = async (pagamentos: PagamentoData[]) => {
         setPayLoading(true);
         try {
-            for (const pagamento of pagamentos) {
-                const conta = contas.find(c => c.id === pagamento.id);
-                if (!conta) continue;
-
-                const valorTotal = pagamento.valor + pagamento.multa + pagamento.juros;
-                await contasPagarService.pagar(String(pagamento.id), {
-                    valor_pago: valorTotal,
+            const resposta = await contasPagarService.pagarLote(
+                pagamentos.map(pagamento => ({
+                    id: String(pagamento.id),
+                    valor_pago: pagamento.valor + pagamento.multa + pagamento.juros,
                     data_pagamento: pagamento.data
-                });
+                }))
+            );
+
+            // Soma só os pagamentos aceitos pelo backend (os com erro não foram gravados)
+            const valorTotal = resposta.resultados
+                .filter(r => r.sucesso)
+                .reduce((soma, r) => soma + Number(r.valor_pago ?? 0), 0);
+            toast({
+                title: `${resposta.pagas} conta(s) marcada(s) como paga(s)`,
+                description: `Valor total: ${formatCurrency(valorTotal)}`
+            });
 
+            const falhas = resposta.resultados.filter(r => !r.sucesso);
+            if (falhas.length > 0) {
                 toast({
-                    title: `Conta "${conta.descricao}" marcada como paga`,
-                    description: `Valor: ${formatCurrency(valorTotal)} | Multa: ${formatCurrency(pagamento.multa)} | Juros: ${formatCurrency(pagamento.juros)}`
+                    title: `${falhas.length} pagamento(s) não realizado(s)`,
+                    description: falhas.map(f => f.erro).join(', ')
                 });
             }
+
             await refetchContas();
             setStatsRefreshTrigger(prev => prev + 1); // Atualiza as estatísticas
             setPayDialogOpen(false);
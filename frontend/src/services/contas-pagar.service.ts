@@ -73,6 +73,14 @@ export interface FormaPagamento {
   ativa: boolean;
 }
 
+// Opções compactas dos selects (/financeiro/opcoes/)
+export interface Opcoes {
+  filiais: Pick<Filial, 'id' | 'nome' | 'ativa'>[];
+  fornecedores: Pick<Fornecedor, 'id' | 'nome' | 'nome_fantasia' | 'ativo'>[];
+  categorias: Pick<Categoria, 'id' | 'nome' | 'tipo' | 'ativa'>[];
+  formas_pagamento: Pick<FormaPagamento, 'id' | 'nome' | 'ativa'>[];
+}
+
 // Tipo para resposta paginada do Django REST Framework
 interface PaginatedResponse<T> {
   count: number;
@@ -111,6 +119,20 @@ export interface ContasPagarEstatisticas {
   proximos_vencimentos: number;
 }
 
+export interface PagamentoLoteResposta {
+  pagas: number;
+  erros: number;
+  resultados: {
+    id: string;
+    sucesso: boolean;
+    erro?: string;
+    status?: string;
+    valor_pago?: number;
+    valor_restante?: number;
+    data_pagamento?: string;
+  }[];
+}
+
 export const contasPagarService = {
   /**
    * Lista todas as contas a pagar
@@ -251,6 +273,14 @@ export const contasPagarService = {
     return response.data;
   },
 
+  /**
+   * Paga várias contas em uma única requisição
+   */
+  pagarLote: async (pagamentos: { id: string; valor_pago?: number; data_pagamento?: string }[]): Promise<PagamentoLoteResposta> => {
+    const response = await api.post<PagamentoLoteResposta>('/financeiro/contas-pagar/pagar-lote/', { pagamentos });
+    return response.data;
+  },
+
   /**
    * Cancela uma conta
    */
@@ -321,6 +351,17 @@ export const contasPagarService = {
 
 // Serviços auxiliares para dados de formulário
 
+/**
+ * Opções de filiais, fornecedores, categorias e formas de pagamento numa única
+ * requisição (cache no servidor por empresa; o navegador revalida com ETag)
+ */
+export const opcoesService = {
+  obter: async (): Promise<Opcoes> => {
+    const response = await api.get<Opcoes>('/financeiro/opcoes/');
+    return response.data;
+  },
+};
+
 export const filiaisService = {
   listar: async (): Promise<Filial[]> => {
     return fetchAllPages<Filial>('/financeiro/filiais/');